@@ -8,19 +8,22 @@
 NOTE: You should use typing.List instead of list to do type annotation. Because in the markdown extraction process,
   we can use typing to extract the type of the node, but we cannot use built-in list to extract.
 """
+import asyncio
 import json
 import re
 import typing
 from enum import Enum
-from typing import Any, Dict, List, Optional, Tuple, Type, Union
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Tuple, Type, Union
 
 from pydantic import BaseModel, Field, create_model, model_validator
 from tenacity import retry, stop_after_attempt, wait_random_exponential
 
+from metagpt.actions.action_node_stream import FieldCallback, StreamingOutputParser
 from metagpt.actions.action_outcls_registry import register_action_outcls
 from metagpt.const import USE_CONFIG_TIMEOUT
 from metagpt.llm import BaseLLM
-from metagpt.logs import logger
+from metagpt.logs import LLM_STREAM_HOOK, logger
 from metagpt.provider.postprocess.llm_output_postprocess import llm_output_postprocess
 from metagpt.utils.common import OutputParser, general_after_log
 from metagpt.utils.human_interaction import HumanInteraction
@@ -130,6 +133,15 @@ def dict_to_markdown(d, prefix="- ", kv_sep="\n", postfix="\n"):
     return markdown_str
 
 
+@lru_cache(maxsize=256)
+def _model_json_schema(output_class: Type[BaseModel]) -> dict:
+    return output_class.model_json_schema()
+
+
+# Attributes of a node that change its compiled prompt and output class
+STRUCTURAL_ATTRS = {"key", "expected_type", "instruction", "example", "schema"}
+
+
 class ActionNode:
     """ActionNode is a tree of nodes."""
 
@@ -148,6 +160,7 @@ class ActionNode:
     # context: str  # everything in the history.
     instruction: str  # the instructions should be followed.
     example: Any  # example for In Context-Learning.
+    dependencies: List[str]  # keys of sibling nodes whose output is needed to fill this node, for complex fill
 
     # Action Output
     content: str
@@ -157,6 +170,13 @@ class ActionNode:
     prevs: List["ActionNode"]  # previous nodes
     nexts: List["ActionNode"]  # next nodes
 
+    # Compiled instruction/example texts and output classes, valid while the node tree keeps the same structure
+    _signature: Optional[tuple] = None
+    _compiled: Optional[dict] = None
+    _compiled_fingerprint: Optional[tuple] = None
+    # Outputs of the children already filled by an unfinished complex fill, keyed by the fill arguments
+    _fill_checkpoint: Optional[tuple] = None
+
     def __init__(
         self,
         key: str,
@@ -166,6 +186,7 @@ class ActionNode:
         content: str = "",
         children: dict[str, "ActionNode"] = None,
         schema: str = "",
+        dependencies: List[str] = None,
     ):
         self.key = key
         self.expected_type = expected_type
@@ -174,6 +195,7 @@ class ActionNode:
         self.content = content
         self.children = children if children is not None else {}
         self.schema = schema
+        self.dependencies = dependencies or []
         self.prevs = []
         self.nexts = []
 
@@ -186,6 +208,30 @@ class ActionNode:
     def __repr__(self):
         return self.__str__()
 
+    def __setattr__(self, name, value):
+        super().__setattr__(name, value)
+        if name in STRUCTURAL_ATTRS:
+            super().__setattr__("_signature", None)
+
+    def _fingerprint(self) -> tuple:
+        """Structural fingerprint of the node tree, recomputed for the children on every call so that changes of
+        `children` are always seen, while each node's own signature is cached until one of its attributes is set.
+        Mutating `example` in place is not detected.
+        """
+        if self._signature is None:
+            self._signature = (self.key, str(self.expected_type), self.instruction, repr(self.example), self.schema)
+        return self._signature, tuple((key, child._fingerprint()) for key, child in self.children.items())
+
+    def _cached(self, key: tuple, build: Callable[[], Any]) -> Any:
+        """Return the artifact built by `build`, cached per node tree structure."""
+        fingerprint = self._fingerprint()
+        if self._compiled_fingerprint != fingerprint:
+            self._compiled = {}
+            self._compiled_fingerprint = fingerprint
+        if key not in self._compiled:
+            self._compiled[key] = build()
+        return self._compiled[key]
+
     def add_prev(self, node: "ActionNode"):
         """增加前置ActionNode"""
         self.prevs.append(node)
@@ -281,14 +327,18 @@ class ActionNode:
 
     def create_class(self, mode: str = "auto", class_name: str = None, exclude=None):
         class_name = class_name if class_name else f"{self.key}_AN"
-        mapping = self.get_mapping(mode=mode, exclude=exclude)
-        return self.create_model_class(class_name, mapping)
+        return self._cached(
+            ("class", mode, class_name, tuple(exclude or ())),
+            lambda: self.create_model_class(class_name, self.get_mapping(mode=mode, exclude=exclude)),
+        )
 
     def _create_children_class(self, exclude=None):
         """使用object内有的字段直接生成model_class"""
         class_name = f"{self.key}_AN"
-        mapping = self._get_children_mapping(exclude=exclude)
-        return self.create_model_class(class_name, mapping)
+        return self._cached(
+            ("children_class", class_name, tuple(exclude or ())),
+            lambda: self.create_model_class(class_name, self._get_children_mapping(exclude=exclude)),
+        )
 
     def to_dict(self, format_func=None, mode="auto", exclude=None) -> Dict:
         """将当前节点与子节点都按照node: format的格式组织成字典"""
@@ -367,7 +417,10 @@ class ActionNode:
     def compile_instruction(self, schema="markdown", mode="children", tag="", exclude=None) -> str:
         """compile to raw/json/markdown template with all/root/children nodes"""
         format_func = lambda i: f"{i.expected_type}  # {i.instruction}"
-        return self._compile_f(schema, mode, tag, format_func, kv_sep=": ", exclude=exclude)
+        return self._cached(
+            ("instruction", schema, mode, tag, tuple(exclude or ())),
+            lambda: self._compile_f(schema, mode, tag, format_func, kv_sep=": ", exclude=exclude),
+        )
 
     def compile_example(self, schema="json", mode="children", tag="", exclude=None) -> str:
         """compile to raw/json/markdown examples with all/root/children nodes"""
@@ -375,7 +428,10 @@ class ActionNode:
         # 这里不能使用f-string，因为转译为str后再json.dumps会额外加上引号，无法作为有效的example
         # 错误示例："File list": "['main.py', 'const.py', 'game.py']", 注意这里值不是list，而是str
         format_func = lambda i: i.example
-        return self._compile_f(schema, mode, tag, format_func, kv_sep="\n", exclude=exclude)
+        return self._cached(
+            ("example", schema, mode, tag, tuple(exclude or ())),
+            lambda: self._compile_f(schema, mode, tag, format_func, kv_sep="\n", exclude=exclude),
+        )
 
     def compile(self, context, schema="json", mode="children", template=SIMPLE_TEMPLATE, exclude=[]) -> str:
         """
@@ -432,21 +488,58 @@ class ActionNode:
         system_msgs: Optional[list[str]] = None,
         schema="markdown",  # compatible to original format
         timeout=USE_CONFIG_TIMEOUT,
+        output_class: Type[BaseModel] = None,
+        stream: bool = False,
+        field_callbacks: Optional[dict[str, FieldCallback]] = None,
+        defer_callbacks: bool = False,
     ) -> (str, BaseModel):
-        """Use ActionOutput to wrap the output of aask"""
-        content = await self.llm.aask(prompt, system_msgs, images=images, timeout=timeout)
-        logger.debug(f"llm raw output:\n{content}")
-        output_class = self.create_model_class(output_class_name, output_data_mapping)
+        """Use ActionOutput to wrap the output of aask
 
-        if schema == "json":
-            parsed_data = llm_output_postprocess(
-                output=content, schema=output_class.model_json_schema(), req_key=f"[/{TAG}]"
-            )
-        else:  # using markdown parser
-            parsed_data = OutputParser.parse_data_with_mapping(content, output_data_mapping)
+        With `stream`, the output is parsed while it is streamed: `field_callbacks` are called as soon as their field
+        is complete, and a field failing validation aborts the generation right away to retry it. The retry runs the
+        callbacks again with the values of the new generation, so callbacks may see values of an attempt which is
+        discarded afterwards; with `defer_callbacks` they are only called with the values of the accepted output.
 
-        logger.debug(f"parsed_data:\n{parsed_data}")
-        instruct_content = output_class(**parsed_data)
+        An output which cannot be parsed or validated is dropped from the response cache before it is retried.
+        """
+        parser = None
+        if stream:
+            parser = StreamingOutputParser(
+                output_data_mapping,
+                schema=schema,
+                callbacks=field_callbacks,
+                tag=TAG,
+                defer_callbacks=defer_callbacks,
+            )
+            token = LLM_STREAM_HOOK.set(parser.feed)
+            try:
+                content = await self.llm.aask(prompt, system_msgs, images=images, timeout=timeout, stream=True)
+            except Exception:
+                parser.cancel()
+                raise
+            finally:
+                LLM_STREAM_HOOK.reset(token)
+        else:
+            content = await self.llm.aask(prompt, system_msgs, images=images, timeout=timeout)
+        logger.debug(f"llm raw output:\n{content}")
+        output_class = output_class or self.create_model_class(output_class_name, output_data_mapping)
+
+        try:
+            if schema == "json":
+                parsed_data = llm_output_postprocess(
+                    output=content, schema=_model_json_schema(output_class), req_key=f"[/{TAG}]"
+                )
+            else:  # using markdown parser
+                parsed_data = OutputParser.parse_data_with_mapping(content, output_data_mapping)
+
+            logger.debug(f"parsed_data:\n{parsed_data}")
+            instruct_content = output_class(**parsed_data)
+            if parser:
+                await parser.finish(instruct_content.model_dump())
+        except Exception:
+            # a cached response would be replayed as is by the retry, and by every later run
+            await self.llm.ainvalidate_cache(prompt, system_msgs, images=images)
+            raise
         return content, instruct_content
 
     def get(self, key):
@@ -464,14 +557,32 @@ class ActionNode:
         self.set_recursive("context", context)
 
     async def simple_fill(
-        self, schema, mode, images: Optional[Union[str, list[str]]] = None, timeout=USE_CONFIG_TIMEOUT, exclude=None
+        self,
+        schema,
+        mode,
+        images: Optional[Union[str, list[str]]] = None,
+        timeout=USE_CONFIG_TIMEOUT,
+        exclude=None,
+        stream: bool = False,
+        field_callbacks: Optional[dict[str, FieldCallback]] = None,
+        defer_callbacks: bool = False,
     ):
         prompt = self.compile(context=self.context, schema=schema, mode=mode, exclude=exclude)
         if schema != "raw":
             mapping = self.get_mapping(mode, exclude=exclude)
             class_name = f"{self.key}_AN"
+            output_class = self.create_class(mode=mode, class_name=class_name, exclude=exclude)
             content, scontent = await self._aask_v1(
-                prompt, class_name, mapping, images=images, schema=schema, timeout=timeout
+                prompt,
+                class_name,
+                mapping,
+                images=images,
+                schema=schema,
+                timeout=timeout,
+                output_class=output_class,
+                stream=stream,
+                field_callbacks=field_callbacks,
+                defer_callbacks=defer_callbacks,
             )
             self.content = content
             self.instruct_content = scontent
@@ -602,6 +713,10 @@ class ActionNode:
         timeout=USE_CONFIG_TIMEOUT,
         exclude=[],
         function_name: str = None,
+        max_concurrency: int = 1,
+        stream: bool = False,
+        field_callbacks: Optional[dict[str, FieldCallback]] = None,
+        defer_callbacks: bool = False,
     ):
         """Fill the node(s) with mode.
 
@@ -621,6 +736,13 @@ class ActionNode:
         :param images: the list of image url or base64 for gpt4-v
         :param timeout: Timeout for llm invocation.
         :param exclude: The keys of ActionNode to exclude.
+        :param max_concurrency: The max number of children filled at the same time with complex strgy, 0 is unlimited.
+        :param stream: Parse the json/markdown output while the LLM streams it, validating each field as soon as it is
+            complete and aborting a generation as soon as a field is invalid.
+        :param field_callbacks: Async callbacks by field key, called with the field value once it is parsed, implies
+            `stream`.
+        :param defer_callbacks: Call `field_callbacks` only with the values of the accepted output, instead of as soon
+            as each field is parsed, which may be from a generation that is retried afterwards.
         :return: self
         """
         self.set_llm(llm)
@@ -644,19 +766,124 @@ class ActionNode:
             self.instruct_content = self.create_class()(**result)
             return self
 
+        stream = stream or bool(field_callbacks)
         if strgy == "simple":
-            return await self.simple_fill(schema=schema, mode=mode, images=images, timeout=timeout, exclude=exclude)
+            return await self.simple_fill(
+                schema=schema,
+                mode=mode,
+                images=images,
+                timeout=timeout,
+                exclude=exclude,
+                stream=stream,
+                field_callbacks=field_callbacks,
+                defer_callbacks=defer_callbacks,
+            )
         elif strgy == "complex":
-            # 这里隐式假设了拥有children
-            tmp = {}
-            for _, i in self.children.items():
-                if exclude and i.key in exclude:
-                    continue
-                child = await i.simple_fill(schema=schema, mode=mode, images=images, timeout=timeout, exclude=exclude)
-                tmp.update(child.instruct_content.model_dump())
-            cls = self._create_children_class()
-            self.instruct_content = cls(**tmp)
-            return self
+            return await self.complex_fill(
+                schema=schema,
+                mode=mode,
+                images=images,
+                timeout=timeout,
+                exclude=exclude,
+                max_concurrency=max_concurrency,
+                stream=stream,
+                field_callbacks=field_callbacks,
+                defer_callbacks=defer_callbacks,
+            )
+
+    async def complex_fill(
+        self,
+        schema,
+        mode,
+        images: Optional[Union[str, list[str]]] = None,
+        timeout=USE_CONFIG_TIMEOUT,
+        exclude=None,
+        max_concurrency: int = 1,
+        stream: bool = False,
+        field_callbacks: Optional[dict[str, FieldCallback]] = None,
+        defer_callbacks: bool = False,
+    ):
+        """Fill each child with `simple_fill`, up to `max_concurrency` at the same time, 0 is unlimited.
+
+        A child waits for the children listed in its `dependencies`, whose outputs are appended to its context.
+        Outputs of the children filled successfully are checkpointed: if some children fail, the first error is raised
+        and calling `fill` again with the same arguments only re-fills the failed ones.
+        """
+        # 这里隐式假设了拥有children
+        children = {key: child for key, child in self.children.items() if not (exclude and key in exclude)}
+        self._check_dependencies(children)
+
+        fill_args = (self.context, schema, mode, str(images), tuple(exclude or ()))
+        if not self._fill_checkpoint or self._fill_checkpoint[0] != fill_args:
+            self._fill_checkpoint = (fill_args, {})
+        checkpoint: dict[str, dict] = self._fill_checkpoint[1]
+        semaphore = asyncio.Semaphore(max_concurrency if max_concurrency > 0 else max(len(children), 1))
+        tasks: dict[str, asyncio.Task] = {}
+
+        async def _fill_child(key: str, child: "ActionNode"):
+            if key in checkpoint:
+                return
+            for dep in child.dependencies:
+                if dep not in checkpoint:
+                    await tasks[dep]
+            async with semaphore:
+                if child.dependencies:
+                    filled = {k: v for dep in child.dependencies for k, v in checkpoint[dep].items()}
+                    child.set_context(
+                        f"{self.context}\n\n## filled nodes\n{json.dumps(filled, ensure_ascii=False, default=str)}"
+                    )
+                await child.simple_fill(
+                    schema=schema,
+                    mode=mode,
+                    images=images,
+                    timeout=timeout,
+                    exclude=exclude,
+                    stream=stream,
+                    field_callbacks=field_callbacks,
+                    defer_callbacks=defer_callbacks,
+                )
+            checkpoint[key] = child.instruct_content.model_dump()
+
+        for key, child in children.items():
+            tasks[key] = asyncio.create_task(_fill_child(key, child))
+        results = await asyncio.gather(*tasks.values(), return_exceptions=True)
+        errors = [r for r in results if isinstance(r, BaseException)]
+        if errors:
+            failed = [key for key in children if key not in checkpoint]
+            logger.warning(f"Failed to fill {failed}, {len(checkpoint)} filled children are checkpointed for retry")
+            raise errors[0]
+
+        tmp = {}
+        for key in children:
+            tmp.update(checkpoint[key])
+        self._fill_checkpoint = None
+        cls = self._create_children_class(exclude=exclude)
+        self.instruct_content = cls(**tmp)
+        return self
+
+    @staticmethod
+    def _check_dependencies(children: dict[str, "ActionNode"]):
+        """Raise ValueError if a child depends on a key that is not filled, or on itself through a cycle."""
+        for key, child in children.items():
+            unknown = [dep for dep in child.dependencies if dep not in children]
+            if unknown:
+                raise ValueError(f"Node {key} depends on {unknown}, which are not filled")
+
+        visited, visiting = set(), set()
+
+        def _visit(key: str):
+            if key in visited:
+                return
+            if key in visiting:
+                raise ValueError(f"Cyclic dependencies of node {key}")
+            visiting.add(key)
+            for dep in children[key].dependencies:
+                _visit(dep)
+            visiting.remove(key)
+            visited.add(key)
+
+        for key in children:
+            _visit(key)
 
     async def human_review(self) -> dict[str, str]:
         review_comments = HumanInteraction().interact_with_instruct_content(
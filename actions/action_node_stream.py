@@ -0,0 +1,208 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+@File    : action_node_stream.py
+@Desc    : Incremental parser of the [CONTENT] section streamed by the LLM for `ActionNode`.
+    Each field is validated against its type as soon as its value is complete, field callbacks are scheduled right
+    away, and a field whose value can never pass validation aborts the generation instead of waiting for the end.
+"""
+import asyncio
+import json
+from functools import lru_cache
+from typing import Any, Awaitable, Callable, Optional
+
+from pydantic import TypeAdapter, ValidationError
+
+from metagpt.logs import LLM_STREAM_HOOK, logger
+from metagpt.utils.common import OutputParser
+
+FieldCallback = Callable[[Any], Awaitable[None]]
+
+
+class StreamAbortError(ValueError):
+    """Raised from the stream hook to stop a generation that is doomed to fail validation"""
+
+
+@lru_cache(maxsize=256)
+def _type_adapter(tp) -> TypeAdapter:
+    return TypeAdapter(tp)
+
+
+class StreamingOutputParser:
+    """Parse the json or markdown fields of an `ActionNode` output while it is streamed.
+
+    Feed it with `feed`, usually installed as `LLM_STREAM_HOOK`, then call `finish` with the fully parsed data, which
+    fires the callbacks of the fields that could not be parsed incrementally, e.g. repaired json or cached responses.
+    Values passed to callbacks are the raw streamed values, before the repair of the full output.
+
+    A callback fires as soon as its field validates, so it may see values of a generation that is thrown away later,
+    when another field aborts the stream or the full output fails validation. `ActionNode._aask_v1` then retries with
+    a new parser, and the callbacks fire again with the values of the new generation. With `defer_callbacks`, fields
+    are still validated while streaming, but the callbacks only fire in `finish`, with the values of the accepted
+    output.
+    """
+
+    def __init__(
+        self,
+        mapping: dict,
+        schema: str = "json",
+        callbacks: dict[str, FieldCallback] = None,
+        tag: str = "CONTENT",
+        defer_callbacks: bool = False,
+    ):
+        self.mapping = mapping
+        self.schema = schema
+        self.callbacks = callbacks or {}
+        self.defer_callbacks = defer_callbacks
+        self.begin_tag = f"[{tag}]"
+        self.end_tag = f"[/{tag}]"
+        self.fields: dict[str, Any] = {}  # fields parsed and validated so far
+        self._buffer = ""
+        self._pos = 0
+        self._body_start: Optional[int] = None
+        self._done = False
+        self._tasks: list[asyncio.Task] = []
+        # json scanner state
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._key_start: Optional[int] = None
+        self._key: Optional[str] = None
+        self._value_start: Optional[int] = None
+
+    def feed(self, chunk: str):
+        """Consume a streamed chunk, raise StreamAbortError on a field that can never be valid"""
+        if self._done or not chunk:
+            return
+        self._buffer += chunk
+        if self._body_start is None:
+            idx = self._buffer.find(self.begin_tag, max(self._pos - len(self.begin_tag), 0))
+            if idx < 0:
+                self._pos = len(self._buffer)
+                return
+            self._body_start = self._pos = idx + len(self.begin_tag)
+        if self.schema == "json":
+            self._scan_json()
+        else:
+            self._scan_markdown()
+
+    def _scan_json(self):
+        buffer = self._buffer
+        i = self._pos
+        while i < len(buffer) and not self._done:
+            c = buffer[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+                    if self._depth == 1 and self._key_start is not None:
+                        self._key = self._loads(buffer[self._key_start : i + 1])
+                        self._key_start = None
+            elif c == '"':
+                self._in_string = True
+                if self._depth == 1 and self._value_start is None:
+                    self._key_start = i
+            elif c in "{[":
+                self._depth += 1
+            elif c in "}]":
+                if self._depth == 1:
+                    self._end_json_value(buffer, i)
+                    self._done = True
+                self._depth -= 1
+            elif c == ":" and self._depth == 1 and self._key is not None and self._value_start is None:
+                self._value_start = i + 1
+            elif c == "," and self._depth == 1:
+                self._end_json_value(buffer, i)
+            i += 1
+        self._pos = i
+
+    def _end_json_value(self, buffer: str, end: int):
+        if self._key is not None and self._value_start is not None:
+            raw = buffer[self._value_start : end].strip()
+            try:
+                value = json.loads(raw)
+            except ValueError:
+                pass  # leave it to the repair of the full output
+            else:
+                self._on_field(self._key, value)
+        self._key = self._value_start = None
+
+    def _scan_markdown(self):
+        buffer = self._buffer
+        while not self._done:
+            # a block ends at the next "##" or at the end tag
+            next_block = buffer.find("##", self._pos)
+            end = buffer.find(self.end_tag, self._pos)
+            if end >= 0 and (next_block < 0 or end < next_block):
+                self._end_markdown_block(buffer[self._pos : end])
+                self._done = True
+            elif next_block >= 0:
+                self._end_markdown_block(buffer[self._pos : next_block])
+                self._pos = next_block + 2
+            else:
+                break
+
+    def _end_markdown_block(self, block: str):
+        if not block.strip() or "\n" not in block:
+            return
+        try:
+            parsed = OutputParser.parse_data_with_mapping(f"##{block}", self.mapping)
+        except Exception:
+            return  # leave it to the parsing of the full output
+        for key, value in parsed.items():
+            self._on_field(key, value)
+
+    @staticmethod
+    def _loads(text: str) -> Optional[str]:
+        try:
+            return json.loads(text)
+        except ValueError:
+            return None
+
+    def _on_field(self, key: str, value: Any):
+        field = self.mapping.get(key)
+        adapter = None
+        if isinstance(field, tuple):
+            try:
+                adapter = _type_adapter(field[0])
+            except Exception:
+                pass  # unhashable or unsupported type, validated with the full output
+        if adapter:
+            try:
+                value = adapter.validate_python(value)
+            except ValidationError as e:
+                raise StreamAbortError(f"Invalid field {key}: {e}")
+        self.fields[key] = value
+        if not self.defer_callbacks:
+            self._schedule(key, value)
+
+    def _schedule(self, key: str, value: Any):
+        callback = self.callbacks.get(key)
+        if callback:
+            self._tasks.append(asyncio.get_running_loop().create_task(self._run_callback(key, callback, value)))
+
+    @staticmethod
+    async def _run_callback(key: str, callback: FieldCallback, value: Any):
+        LLM_STREAM_HOOK.set(None)  # LLM calls of the callback must not feed this parser
+        try:
+            await callback(value)
+        except Exception as e:
+            logger.warning(f"Callback of field {key} failed: {e}")
+
+    async def finish(self, parsed_data: dict):
+        """Fire the callbacks of the fields not seen while streaming, or of all the fields with `defer_callbacks`, and
+        wait for all the callbacks"""
+        for key, value in parsed_data.items():
+            if self.defer_callbacks or key not in self.fields:
+                self.fields[key] = value
+                self._schedule(key, value)
+        await asyncio.gather(*self._tasks)
+        self._tasks.clear()
+
+    def cancel(self):
+        for task in self._tasks:
+            task.cancel()
+        self._tasks.clear()
@@ -5,9 +5,29 @@
 
 from functools import wraps
 
+from pydantic.fields import FieldInfo
+
 action_outcls_registry = dict()
 
 
+def _normalize_type(tp) -> str:
+    # eliminate typing influence
+    return str(tp).replace("typing.List", "list").replace("typing.Dict", "dict")
+
+
+def _freeze(item):
+    """Convert a `create_model_class` argument into a hashable structural key"""
+    if isinstance(item, dict):
+        return tuple(sorted((key, _freeze(value)) for key, value in item.items()))
+    if isinstance(item, (list, tuple)):
+        return tuple(_freeze(i) for i in item)
+    if isinstance(item, FieldInfo):
+        return "FieldInfo", repr(item)  # default, description, alias, constraints and the other set attributes
+    if item is None or isinstance(item, (str, int, float, bool)):
+        return item
+    return _normalize_type(item)
+
+
 def register_action_outcls(func):
     """
     Due to `create_model` return different Class even they have same class name and mapping.
@@ -23,14 +43,9 @@ def register_action_outcls(func):
         arr = list(args) + list(kwargs.values())
         """
         outcls_id example
-            "<class 'metagpt.actions.action_node.ActionNode'>_test_{'field': (str, Ellipsis)}"
+            ("<class 'metagpt.actions.action_node.ActionNode'>", "test", (("field", ("<class 'str'>", "Ellipsis")),))
         """
-        for idx, item in enumerate(arr):
-            if isinstance(item, dict):
-                arr[idx] = dict(sorted(item.items()))
-        outcls_id = "_".join([str(i) for i in arr])
-        # eliminate typing influence
-        outcls_id = outcls_id.replace("typing.List", "list").replace("typing.Dict", "dict")
+        outcls_id = _freeze(arr)
 
         if outcls_id in action_outcls_registry:
             return action_outcls_registry[outcls_id]
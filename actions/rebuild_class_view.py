@@ -26,8 +26,8 @@ from metagpt.logs import logger
 from metagpt.repo_parser import DotClassInfo, RepoParser
 from metagpt.schema import UMLClassView
 from metagpt.utils.common import concat_namespace, split_namespace
-from metagpt.utils.di_graph_repository import DiGraphRepository
 from metagpt.utils.graph_repository import GraphKeyword, GraphRepository
+from metagpt.utils.triple_store_repository import TripleStoreRepository
 
 
 class RebuildClassView(Action):
@@ -49,7 +49,7 @@ class RebuildClassView(Action):
             format (str): The format for the prompt schema.
         """
         graph_repo_pathname = self.context.git_repo.workdir / GRAPH_REPO_FILE_REPO / self.context.git_repo.workdir.name
-        self.graph_db = await DiGraphRepository.load_from(str(graph_repo_pathname.with_suffix(".json")))
+        self.graph_db = await TripleStoreRepository.load_from(str(graph_repo_pathname.with_suffix(".json")))
         repo_parser = RepoParser(base_directory=Path(self.i_context))
         # use pylint
         class_views, relationship_views, package_root = await repo_parser.rebuild_class_views(path=Path(self.i_context))
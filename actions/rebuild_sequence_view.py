@@ -34,8 +34,8 @@ from metagpt.utils.common import (
     read_file_block,
     split_namespace,
 )
-from metagpt.utils.di_graph_repository import DiGraphRepository
 from metagpt.utils.graph_repository import SPO, GraphKeyword, GraphRepository
+from metagpt.utils.triple_store_repository import TripleStoreRepository
 
 
 class ReverseUseCase(BaseModel):
@@ -93,7 +93,7 @@ class RebuildSequenceView(Action):
             format (str): The format for the prompt schema.
         """
         graph_repo_pathname = self.context.git_repo.workdir / GRAPH_REPO_FILE_REPO / self.context.git_repo.workdir.name
-        self.graph_db = await DiGraphRepository.load_from(str(graph_repo_pathname.with_suffix(".json")))
+        self.graph_db = await TripleStoreRepository.load_from(str(graph_repo_pathname.with_suffix(".json")))
         if not self.i_context:
             entries = await self._search_main_entry()
         else:
@@ -201,11 +201,9 @@ class WriteCode(Action):
 
         # Normal scenario
         else:
-            for filename in code_filenames:
-                # Exclude the current file to get the code snippets for generating the current file
-                if filename == exclude:
-                    continue
-                doc = await src_file_repo.get(filename=filename)
+            # Exclude the current file to get the code snippets for generating the current file
+            filenames = [i for i in code_filenames if i != exclude]
+            for filename, doc in zip(filenames, await src_file_repo.get_many(filenames)):
                 if not doc:
                     continue
                 codes.append(f"----- {filename}\n```{doc.content}```")
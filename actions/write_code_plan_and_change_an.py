@@ -227,6 +227,5 @@ class WriteCodePlanAndChange(Action):
     async def get_old_codes(self) -> str:
         self.repo.old_workspace = self.repo.git_repo.workdir / os.path.basename(self.config.project_path)
         old_file_repo = self.repo.git_repo.new_file_repository(relative_path=self.repo.old_workspace)
-        old_codes = await old_file_repo.get_all()
-        codes = [f"----- {code.filename}\n```{code.content}```" for code in old_codes]
+        codes = [f"----- {code.filename}\n```{code.content}```" async for code in old_file_repo.iter_all()]
         return "\n".join(codes)
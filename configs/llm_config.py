@@ -7,7 +7,7 @@
 """
 
 from enum import Enum
-from typing import Optional
+from typing import Literal, Optional
 
 from pydantic import field_validator
 
@@ -101,6 +101,16 @@ class LLMConfig(YamlModel):
     # For Messages Control
     use_system_prompt: bool = True
 
+    # For Rate Limit, used by `BaseLLM.aask_many`
+    max_concurrency: int = 8  # max concurrent requests to the provider
+    tpm_limit: Optional[int] = None  # tokens per minute budget of the provider, unlimited when None
+
+    # For Response Cache, disabled when cache_type is None
+    cache_type: Optional[Literal["memory", "sqlite"]] = None
+    cache_path: Optional[str] = None  # sqlite file, defaults to `workspace/.llm_cache/responses.db`
+    cache_ttl: Optional[int] = None  # seconds, never expire when None
+    cache_max_size: int = 4096  # max number of cached responses
+
     @field_validator("api_key")
     @classmethod
     def check_llm_key(cls, v):
@@ -64,6 +64,7 @@ PROMPT_PATH = SOURCE_ROOT / "prompts"
 SKILL_DIRECTORY = SOURCE_ROOT / "skills"
 TOOL_SCHEMA_PATH = METAGPT_ROOT / "metagpt/tools/schemas"
 TOOL_LIBS_PATH = METAGPT_ROOT / "metagpt/tools/libs"
+TOOL_INDEX_PATH = SERDESER_PATH / "tool_index"
 
 # REAL CONSTS
 
@@ -4,13 +4,22 @@
 
 import asyncio
 from abc import abstractmethod
+from collections import deque
 from enum import Enum
 from typing import TYPE_CHECKING, Any, Dict, Iterable, Optional, Set, Union
 
 from gymnasium import spaces
 from gymnasium.core import ActType, ObsType
-from pydantic import BaseModel, ConfigDict, Field, SerializeAsAny, model_validator
+from pydantic import (
+    BaseModel,
+    ConfigDict,
+    Field,
+    PrivateAttr,
+    SerializeAsAny,
+    model_validator,
+)
 
+from metagpt.const import MESSAGE_ROUTE_TO_ALL
 from metagpt.context import Context
 from metagpt.environment.api.env_api import (
     EnvAPIAbstract,
@@ -20,7 +29,7 @@ from metagpt.environment.api.env_api import (
 from metagpt.environment.base_env_space import BaseEnvAction, BaseEnvObsParams
 from metagpt.logs import logger
 from metagpt.schema import Message
-from metagpt.utils.common import get_function_schema, is_coroutine_func, is_send_to
+from metagpt.utils.common import get_function_schema, is_coroutine_func
 
 if TYPE_CHECKING:
     from metagpt.roles.role import Role  # noqa: F401
@@ -131,9 +140,25 @@ class Environment(ExtEnv):
     desc: str = Field(default="")  # 环境描述
     roles: dict[str, SerializeAsAny["Role"]] = Field(default_factory=dict, validate_default=True)
     member_addrs: Dict["Role", Set] = Field(default_factory=dict, exclude=True)
-    history: str = ""  # For debug
+    history_size: int = Field(default=1000)  # number of most recent messages kept in `history`, for debug
+    event_driven: bool = Field(default=False)  # each `run` only wakes roles with pending messages
+    max_concurrency: int = Field(default=0)  # max roles running at once in event-driven mode, 0 means unlimited
     context: Context = Field(default_factory=Context, exclude=True)
 
+    # address -> subscribers, kept in sync with `member_addrs` by `set_addresses`
+    _routes: Dict[str, Dict["Role", None]] = PrivateAttr(default_factory=dict)
+    _history: deque = PrivateAttr(default_factory=deque)
+    # roles with pending messages, signaled by `Role.put_message`, in signal order
+    _ready: Dict["Role", None] = PrivateAttr(default_factory=dict)
+
+    def model_post_init(self, __context):
+        self._history = deque(maxlen=self.history_size)
+
+    @property
+    def history(self) -> str:
+        """The most recent `history_size` published messages, for debug"""
+        return "".join(f"\n{message}" for message in self._history)
+
     def reset(
         self,
         *,
@@ -160,6 +185,7 @@ class Environment(ExtEnv):
         self.roles[role.profile] = role
         role.set_env(self)
         role.context = self.context
+        self._check_ready(role)
 
     def add_roles(self, roles: Iterable["Role"]):
         """增加一批在当前环境的角色
@@ -171,6 +197,16 @@ class Environment(ExtEnv):
         for role in roles:  # setup system message with roles
             role.context = self.context
             role.set_env(self)
+            self._check_ready(role)
+
+    def notify_ready(self, role: "Role"):
+        """Signal that a role has pending messages, so the event-driven scheduler wakes it on the next `run`"""
+        self._ready[role] = None
+
+    def _check_ready(self, role: "Role"):
+        """Signal roles that received messages before joining, or that were interrupted and need to recover"""
+        if not role.rc.msg_buffer.empty() or role.latest_observed_msg:
+            self.notify_ready(role)
 
     def publish_message(self, message: Message, peekable: bool = True) -> bool:
         """
@@ -182,15 +218,18 @@ class Environment(ExtEnv):
         in RFC 113.
         """
         logger.debug(f"publish_message: {message.dump()}")
-        found = False
         # According to the routing feature plan in Chapter 2.2.3.2 of RFC 113
-        for role, addrs in self.member_addrs.items():
-            if is_send_to(message, addrs):
-                role.put_message(message)
-                found = True
-        if not found:
+        if MESSAGE_ROUTE_TO_ALL in message.send_to:
+            recipients = self.member_addrs.keys()
+        else:
+            recipients = {}
+            for addr in message.send_to:
+                recipients.update(self._routes.get(addr, {}))
+        for role in recipients:
+            role.put_message(message)
+        if not recipients:
             logger.warning(f"Message no recipients: {message.dump()}")
-        self.history += f"\n{message}"  # For debug
+        self._history.append(message)  # For debug
 
         return True
 
@@ -199,6 +238,12 @@ class Environment(ExtEnv):
         Process all Role runs at once
         """
         for _ in range(k):
+            if self.event_driven:
+                await self._run_ready_roles()
+                logger.debug(f"is idle: {self.is_idle}")
+                continue
+
+            self._ready = {}
             futures = []
             for role in self.roles.values():
                 future = role.run()
@@ -207,6 +252,24 @@ class Environment(ExtEnv):
             await asyncio.gather(*futures)
             logger.debug(f"is idle: {self.is_idle}")
 
+    async def _run_ready_roles(self):
+        """Run only the roles signaled as ready, at most `max_concurrency` at a time. Roles receiving messages
+        while this round is running are woken on the next round."""
+        ready, self._ready = list(self._ready), {}
+        semaphore = asyncio.Semaphore(self.max_concurrency) if self.max_concurrency > 0 else None
+
+        async def _run(role: "Role"):
+            if semaphore:
+                async with semaphore:
+                    await role.run()
+            else:
+                await role.run()
+            if role.rc.msg_buffer.empty():
+                # the role already consumed the messages signaled during its own run
+                self._ready.pop(role, None)
+
+        await asyncio.gather(*[_run(role) for role in ready])
+
     def get_roles(self) -> dict[str, "Role"]:
         """获得环境内的所有角色
         Process all Role runs at once
@@ -225,6 +288,8 @@ class Environment(ExtEnv):
     @property
     def is_idle(self):
         """If true, all actions have been executed."""
+        if self.event_driven:
+            return not self._ready
         for r in self.roles.values():
             if not r.is_idle:
                 return False
@@ -236,7 +301,14 @@ class Environment(ExtEnv):
 
     def set_addresses(self, obj, addresses):
         """Set the addresses of the object"""
+        for addr in self.member_addrs.get(obj, set()):
+            subscribers = self._routes.get(addr, {})
+            subscribers.pop(obj, None)
+            if not subscribers:
+                self._routes.pop(addr, None)
         self.member_addrs[obj] = addresses
+        for addr in addresses:
+            self._routes.setdefault(addr, {})[obj] = None
 
     def archive(self, auto_archive=True):
         if auto_archive and self.context.git_repo:
@@ -55,6 +55,7 @@ class EnvObsType(BaseEnvObsType):
     GET_TITLE = 1  # get the tile detail dictionary with given tile coord
     TILE_PATH = 2  # get the tile address with given tile coord
     TILE_NBR = 3  # get the neighbors of given tile coord and its vision radius
+    REGION = 4  # get the tile infos, arena path and events of the vision window of given tile coord in one call
 
 
 class EnvObsParams(BaseEnvObsParams):
@@ -0,0 +1,221 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Desc   : Grid pathfinding of the StanfordTown maze, the connectivity of the collision grid is computed once and
+#           shortest paths are searched with A* or BFS, then cached until the collisions change
+
+from collections import Counter, OrderedDict, deque
+from heapq import heappop, heappush
+from typing import Optional
+
+import numpy as np
+
+Tile = tuple[int, int]  # (x, y)
+
+
+class GridPathFinder:
+    """Shortest 4-connected paths on a collision maze.
+
+    Single queries use A* with the Manhattan distance. Tiles used as destinations `field_threshold` times get a BFS
+    distance field, from which any path to them is read in O(path length). Paths and fields are LRU cached and dropped
+    when a collision changes. As the original wavefront search, an unreachable destination gives `[end]`, so that the
+    caller stays where it is.
+
+    Paths have the length of the original search, but among several shortest paths another one may be returned, and
+    unlike the original search, which gave up after 150 wavefront steps, destinations are searched at any distance.
+
+    :param collision_maze: The maze rows, in (y, x) order.
+    :param collision_block_char: The value of the blocked cells.
+    """
+
+    def __init__(
+        self,
+        collision_maze: list[list],
+        collision_block_char: str,
+        cache_size: int = 4096,
+        field_cache_size: int = 64,
+        field_threshold: int = 3,
+    ):
+        self.collision_block_char = collision_block_char
+        self.blocked = np.asarray(collision_maze) == collision_block_char
+        self.height, self.width = self.blocked.shape
+        self.cache_size = cache_size
+        self.field_cache_size = field_cache_size
+        self.field_threshold = field_threshold
+        self._paths: OrderedDict[tuple[int, int], tuple[Tile, ...]] = OrderedDict()
+        self._fields: OrderedDict[int, list[int]] = OrderedDict()  # destination -> distances, -1 if unreachable
+        self._destination_hits = Counter()
+        self._build_neighbors()
+
+    def _build_neighbors(self):
+        """Free neighbors of every cell, in up, left, down, right order.
+
+        The order only breaks ties between shortest paths: `_path_from_field` walks from the start to the first
+        neighbor one step closer to the destination, and `_astar` follows the parents of its heap. Neither matches the
+        legacy `path_finder_v2`, which walked back from the end, so the tiles of a route may differ from it on ties.
+        """
+        h, w = self.height, self.width
+        free = ~self.blocked
+        idx = np.arange(h * w).reshape(h, w)
+        directions = np.full((4, h, w), -1)
+        directions[0, 1:, :] = np.where(free[:-1, :], idx[:-1, :], -1)  # up
+        directions[1, :, 1:] = np.where(free[:, :-1], idx[:, :-1], -1)  # left
+        directions[2, :-1, :] = np.where(free[1:, :], idx[1:, :], -1)  # down
+        directions[3, :, :-1] = np.where(free[:, 1:], idx[:, 1:], -1)  # right
+        self._free = free.ravel().tolist()
+        self._neighbors = [tuple(i for i in row if i >= 0) for row in directions.reshape(4, -1).T.tolist()]
+
+    def set_collision(self, tile: Tile, blocked: bool):
+        """Change the collision of a tile, cached paths and fields are dropped"""
+        x, y = tile
+        if bool(self.blocked[y, x]) == blocked:
+            return
+        self.blocked[y, x] = blocked
+        self._build_neighbors()
+        self.clear_cache()
+
+    def clear_cache(self):
+        self._paths.clear()
+        self._fields.clear()
+        self._destination_hits.clear()
+
+    def _index(self, tile: Tile) -> int:
+        return int(tile[1]) * self.width + int(tile[0])
+
+    def _tile(self, index: int) -> Tile:
+        y, x = divmod(index, self.width)
+        return x, y
+
+    def _astar(self, start: int, end: int) -> Optional[list[int]]:
+        if start == end:
+            return [start]
+        if not self._free[end]:
+            return None
+        w = self.width
+        end_y, end_x = divmod(end, w)
+        neighbors = self._neighbors
+        g = {start: 0}
+        parent = {start: -1}
+        heap = [(0, 0, start)]
+        while heap:
+            _, neg_cost, u = heappop(heap)
+            if u == end:
+                break
+            cost = -neg_cost
+            if cost > g[u]:
+                continue
+            cost += 1
+            for v in neighbors[u]:
+                if cost < g.get(v, cost + 1):
+                    g[v] = cost
+                    parent[v] = u
+                    y, x = divmod(v, w)
+                    heappush(heap, (cost + abs(y - end_y) + abs(x - end_x), -cost, v))  # deeper first on ties
+        else:
+            return None
+        path = [end]
+        while path[-1] != start:
+            path.append(parent[path[-1]])
+        path.reverse()
+        return path
+
+    def _field(self, end: int) -> list[int]:
+        """BFS distances of all cells to a destination"""
+        field = self._fields.get(end)
+        if field is not None:
+            self._fields.move_to_end(end)
+            return field
+        field = [-1] * (self.width * self.height)
+        field[end] = 0
+        if self._free[end]:
+            neighbors = self._neighbors
+            queue = deque([end])
+            while queue:
+                u = queue.popleft()
+                d = field[u] + 1
+                for v in neighbors[u]:
+                    if field[v] < 0:
+                        field[v] = d
+                        queue.append(v)
+        self._fields[end] = field
+        if len(self._fields) > self.field_cache_size:
+            self._fields.popitem(last=False)
+        return field
+
+    def _path_from_field(self, start: int, end: int, field: list[int]) -> Optional[list[int]]:
+        if start == end:
+            return [start]
+        reachable = [(field[v], v) for v in self._neighbors[start] if field[v] >= 0]
+        if not reachable:
+            return None
+        path = [start, min(reachable)[1]]  # the start itself may be blocked, only its neighbors have distances
+        neighbors = self._neighbors
+        while path[-1] != end:
+            u = path[-1]
+            d = field[u] - 1
+            path.append(next(v for v in neighbors[u] if field[v] == d))
+        return path
+
+    def find_path(self, start: Tile, end: Tile) -> list[Tile]:
+        """Shortest path from start to end, both included, or `[end]` if end is unreachable"""
+        s, e = self._index(start), self._index(end)
+        key = (s, e)
+        path = self._paths.get(key)
+        if path is None:
+            self._destination_hits[e] += 1
+            if e in self._fields or self._destination_hits[e] >= self.field_threshold:
+                indexes = self._path_from_field(s, e, self._field(e))
+            else:
+                indexes = self._astar(s, e)
+            path = tuple(self._tile(i) for i in indexes) if indexes else (self._tile(e),)
+            self._paths[key] = path
+            if len(self._paths) > self.cache_size:
+                self._paths.popitem(last=False)
+        else:
+            self._paths.move_to_end(key)
+        return list(path)
+
+    def find_paths(self, routes: list[tuple[Tile, Tile]]) -> list[list[Tile]]:
+        """Shortest paths of many (start, end) routes, e.g. of all the agents of a step. Destinations shared by several
+        routes are searched once with a BFS distance field."""
+        shared = Counter(self._index(end) for _, end in routes)
+        for end, count in shared.items():
+            if count > 1:
+                self._destination_hits[end] += self.field_threshold  # use a field for them
+        return [self.find_path(start, end) for start, end in routes]
+
+    def find_closest_path(self, start: Tile, targets: list[Tile]) -> tuple[Optional[Tile], list[Tile]]:
+        """The closest reachable target and the path to it, ties are resolved by the order of `targets`.
+
+        One BFS from the start settles all the targets at the minimum distance. If no target is reachable, return the
+        first target and `[target]`, as the original search.
+        """
+        if not targets:
+            return None, []
+        s = self._index(start)
+        wanted = {}
+        for i, target in enumerate(targets):
+            wanted.setdefault(self._index(target), i)
+        parent = {s: -1}
+        found = []
+        if s in wanted:
+            found.append(s)
+        frontier = [s]
+        neighbors = self._neighbors
+        while frontier and not found:
+            next_frontier = []
+            for u in frontier:
+                for v in neighbors[u]:
+                    if v not in parent:
+                        parent[v] = u
+                        next_frontier.append(v)
+                        if v in wanted:
+                            found.append(v)
+            frontier = next_frontier
+        if not found:
+            return targets[0], [targets[0]]
+        best = min(found, key=lambda i: wanted[i])
+        path = [best]
+        while path[-1] != s:
+            path.append(parent[path[-1]])
+        path.reverse()
+        return targets[wanted[best]], [self._tile(i) for i in path]
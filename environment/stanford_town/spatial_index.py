@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Desc   : Spatial indexes of the StanfordTown maze for bulk perception: tile -> address and tile -> arena arrays, and
+#           the tiles holding events, so that a vision window is observed in one call
+
+from typing import Optional
+
+import numpy as np
+
+Tile = tuple[int, int]  # (x, y)
+Bounds = tuple[int, int, int, int]  # x range [x0, x1) and y range [y0, y1)
+
+
+class PerceptionSnapshot:
+    """Immutable view of the tiles holding events at an events version, shared by all the roles perceiving until the
+    events change. Event tiles are sorted in the (x, y) order of `get_nearby_tiles`, a window is located by a binary
+    search on x, so a query costs the events in the x band of the window rather than the tiles of the window.
+    """
+
+    def __init__(self, version: int, event_tiles: dict[Tile, tuple], arena_ids: np.ndarray):
+        self.version = version
+        tiles = sorted(event_tiles)
+        self.tiles = tiles
+        self.events = [event_tiles[i] for i in tiles]
+        xy = np.array(tiles, dtype=np.int64).reshape(-1, 2)
+        self.xs = xy[:, 0]
+        self.ys = xy[:, 1]
+        self.arenas = arena_ids[self.ys, self.xs] if len(tiles) else np.zeros(0, dtype=arena_ids.dtype)
+
+    def events_in(self, bounds: Bounds, arena_id: Optional[int] = None) -> list[tuple[Tile, tuple]]:
+        """The (tile, events) of the tiles in the bounds, optionally only those of an arena"""
+        x0, x1, y0, y1 = bounds
+        lo, hi = np.searchsorted(self.xs, [x0, x1])
+        ys = self.ys[lo:hi]
+        mask = (ys >= y0) & (ys < y1)
+        if arena_id is not None:
+            mask &= self.arenas[lo:hi] == arena_id
+        return [(self.tiles[i], self.events[i]) for i in (np.flatnonzero(mask) + lo).tolist()]
+
+
+class MazeSpatialIndex:
+    """Arrays of the address and arena path of every tile, and the set of tiles holding events.
+
+    The static layers are built once from `tiles`. The event tiles are kept up to date by `update_tile`, called by the
+    writeable event APIs of the env, each change bumps `version` and drops the current snapshot.
+    """
+
+    def __init__(self, tiles: list[list[dict]]):
+        self._tiles = tiles
+        height, width = len(tiles), len(tiles[0]) if tiles else 0
+        self.address_ids = np.zeros((height, width), dtype=np.int32)
+        self.arena_ids = np.zeros((height, width), dtype=np.int32)
+        address_index, arena_index = {}, {}
+        self.event_tiles: set[Tile] = set()
+        for y, row in enumerate(tiles):
+            for x, detail in enumerate(row):
+                address = (detail["world"], detail["sector"], detail["arena"], detail["game_object"])
+                self.address_ids[y, x] = address_index.setdefault(address, len(address_index))
+                arena_path = f"{detail['world']}:{detail['sector']}:{detail['arena']}"
+                self.arena_ids[y, x] = arena_index.setdefault(arena_path, len(arena_index))
+                if detail["events"]:
+                    self.event_tiles.add((x, y))
+        self.addresses: list[tuple[str, str, str, str]] = list(address_index.keys())  # (world, sector, arena, object)
+        self.arena_paths: list[str] = list(arena_index.keys())
+        self.version = 0
+        self._snapshot: Optional[PerceptionSnapshot] = None
+
+    def update_tile(self, tile: Tile):
+        """Take the change of the events of a tile into account"""
+        x, y = int(tile[0]), int(tile[1])
+        if self._tiles[y][x]["events"]:
+            self.event_tiles.add((x, y))
+        else:
+            self.event_tiles.discard((x, y))
+        self.version += 1
+        self._snapshot = None
+
+    def snapshot(self) -> PerceptionSnapshot:
+        if self._snapshot is None:
+            event_tiles = {(x, y): tuple(self._tiles[y][x]["events"]) for x, y in self.event_tiles}
+            self._snapshot = PerceptionSnapshot(self.version, event_tiles, self.arena_ids)
+        return self._snapshot
+
+    def addresses_in(self, bounds: Bounds) -> list[tuple[str, str, str, str]]:
+        """The distinct addresses of the tiles in the bounds, in the order of their first tile"""
+        x0, x1, y0, y1 = bounds
+        window = self.address_ids[y0:y1, x0:x1].T.ravel()  # x-major, as get_nearby_tiles
+        ids, first = np.unique(window, return_index=True)
+        return [self.addresses[i] for i in ids[np.argsort(first)].tolist()]
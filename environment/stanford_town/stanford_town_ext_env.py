@@ -7,7 +7,7 @@ import math
 from pathlib import Path
 from typing import Any, Optional
 
-from pydantic import ConfigDict, Field, model_validator
+from pydantic import ConfigDict, Field, PrivateAttr, model_validator
 
 from metagpt.environment.base_env import ExtEnv, mark_as_readable, mark_as_writeable
 from metagpt.environment.stanford_town.env_space import (
@@ -19,6 +19,11 @@ from metagpt.environment.stanford_town.env_space import (
     get_action_space,
     get_observation_space,
 )
+from metagpt.environment.stanford_town.path_finder import GridPathFinder, Tile
+from metagpt.environment.stanford_town.spatial_index import (
+    MazeSpatialIndex,
+    PerceptionSnapshot,
+)
 from metagpt.utils.common import read_csv_to_list, read_json_file
 
 
@@ -36,6 +41,9 @@ class StanfordTownExtEnv(ExtEnv):
     address_tiles: dict[str, set] = Field(default=dict())
     collision_maze: list[list] = Field(default=[])
 
+    _path_finders: dict[str, GridPathFinder] = PrivateAttr(default_factory=dict)  # collision block char -> finder
+    _spatial_index: Optional[MazeSpatialIndex] = PrivateAttr(default=None)
+
     @model_validator(mode="before")
     @classmethod
     def _init_maze(cls, values):
@@ -245,6 +253,8 @@ class StanfordTownExtEnv(ExtEnv):
             obs = self.get_tile_path(tile=obs_params.coord, level=obs_params.level)
         elif obs_type == EnvObsType.TILE_NBR:
             obs = self.get_nearby_tiles(tile=obs_params.coord, vision_r=obs_params.vision_radius)
+        elif obs_type == EnvObsType.REGION:
+            obs = self.observe_region(tile=obs_params.coord, vision_r=obs_params.vision_radius)
         return obs
 
     def step(self, action: EnvAction) -> tuple[dict[str, EnvObsValType], float, bool, bool, dict[str, Any]]:
@@ -291,6 +301,41 @@ class StanfordTownExtEnv(ExtEnv):
     def get_address_tiles(self) -> dict:
         return self.address_tiles
 
+    def get_path_finder(self, collision_block_char: str) -> GridPathFinder:
+        """The path finder of the collision maze, built once per collision block char"""
+        path_finder = self._path_finders.get(collision_block_char)
+        if not path_finder:
+            path_finder = GridPathFinder(self.collision_maze, collision_block_char)
+            self._path_finders[collision_block_char] = path_finder
+        return path_finder
+
+    @mark_as_readable
+    def find_path(self, start: Tile, end: Tile, collision_block_char: str) -> list[Tile]:
+        """
+        Shortest path between two tiles in (x, y) form, both included. Returns `[end]` if end is unreachable.
+        """
+        return self.get_path_finder(collision_block_char).find_path(tuple(start), tuple(end))
+
+    @mark_as_readable
+    def find_paths(self, routes: list[tuple[Tile, Tile]], collision_block_char: str) -> list[list[Tile]]:
+        """
+        Shortest paths of many (start, end) routes at once, e.g. the routes of all the roles of a step. Destinations
+        shared by several routes are searched once.
+        """
+        routes = [(tuple(start), tuple(end)) for start, end in routes]
+        return self.get_path_finder(collision_block_char).find_paths(routes)
+
+    @mark_as_readable
+    def find_closest_path(
+        self, start: Tile, targets: list[Tile], collision_block_char: str
+    ) -> tuple[Optional[Tile], list[Tile]]:
+        """
+        The closest reachable target tile and the shortest path to it, ties are resolved by the order of targets.
+        """
+        path_finder = self.get_path_finder(collision_block_char)
+        target, path = path_finder.find_closest_path(tuple(start), [tuple(i) for i in targets])
+        return target, path
+
     @mark_as_readable
     def access_tile(self, tile: tuple[int, int]) -> dict:
         """
@@ -370,27 +415,61 @@ class StanfordTownExtEnv(ExtEnv):
         OUTPUT:
           nearby_tiles: a list of tiles that are within the radius.
         """
-        left_end = 0
-        if tile[0] - vision_r > left_end:
-            left_end = tile[0] - vision_r
+        left_end, right_end, top_end, bottom_end = self._nearby_bounds(tile, vision_r)
+        return [(i, j) for i in range(left_end, right_end) for j in range(top_end, bottom_end)]
+
+    def _nearby_bounds(self, tile: tuple[int, int], vision_r: int) -> tuple[int, int, int, int]:
+        """The x range [left_end, right_end) and y range [top_end, bottom_end) of the tiles within the radius"""
+        x, y = int(tile[0]), int(tile[1])
+        left_end = max(x - vision_r, 0)
+        right_end = min(x + vision_r + 1, self.maze_width - 1)
+        top_end = max(y - vision_r, 0)
+        bottom_end = min(y + vision_r + 1, self.maze_height - 1)
+        return left_end, right_end, top_end, bottom_end
+
+    @property
+    def spatial_index(self) -> MazeSpatialIndex:
+        if self._spatial_index is None:
+            self._spatial_index = MazeSpatialIndex(self.tiles)
+        return self._spatial_index
+
+    def _on_tile_events_changed(self, tile: tuple[int, int]):
+        if self._spatial_index is not None:
+            self._spatial_index.update_tile(tile)
 
-        right_end = self.maze_width - 1
-        if tile[0] + vision_r + 1 < right_end:
-            right_end = tile[0] + vision_r + 1
-
-        bottom_end = self.maze_height - 1
-        if tile[1] + vision_r + 1 < bottom_end:
-            bottom_end = tile[1] + vision_r + 1
+    @mark_as_readable
+    def get_perception_snapshot(self) -> PerceptionSnapshot:
+        """The tiles holding events, shared by all the roles perceiving in a step until an event changes"""
+        return self.spatial_index.snapshot()
 
-        top_end = 0
-        if tile[1] - vision_r > top_end:
-            top_end = tile[1] - vision_r
+    @mark_as_readable
+    def observe_region(self, tile: tuple[int, int], vision_r: int) -> dict:
+        """
+        Observe the vision window of a tile in one call, instead of an `access_tile` and a `get_tile_path` per tile.
 
-        nearby_tiles = []
-        for i in range(left_end, right_end):
-            for j in range(top_end, bottom_end):
-                nearby_tiles += [(i, j)]
-        return nearby_tiles
+        INPUT:
+          tile: The tile coordinate of our interest in (x, y) form.
+          vision_r: The radius of the persona's vision, the window is the one of `get_nearby_tiles`.
+        OUTPUT:
+          A dict of
+            tile_infos: the distinct world, sector, arena and game_object of the tiles of the window, as needed to
+              build a spatial memory.
+            arena_path: the arena path of the tile, as `get_tile_path(tile, "arena")`.
+            events: the (tile, events) of the tiles of the window holding events and in the same arena as the tile,
+              in the order of `get_nearby_tiles`.
+        """
+        index = self.spatial_index
+        bounds = self._nearby_bounds(tile, vision_r)
+        arena_id = int(index.arena_ids[int(tile[1]), int(tile[0])])
+        tile_infos = [
+            {"world": world, "sector": sector, "arena": arena, "game_object": game_object}
+            for world, sector, arena, game_object in index.addresses_in(bounds)
+        ]
+        return {
+            "tile_infos": tile_infos,
+            "arena_path": index.arena_paths[arena_id],
+            "events": index.snapshot().events_in(bounds, arena_id=arena_id),
+        }
 
     @mark_as_writeable
     def add_event_from_tile(self, curr_event: tuple[str], tile: tuple[int, int]) -> None:
@@ -406,6 +485,7 @@ class StanfordTownExtEnv(ExtEnv):
           None
         """
         self.tiles[tile[1]][tile[0]]["events"].add(curr_event)
+        self._on_tile_events_changed(tile)
 
     @mark_as_writeable
     def remove_event_from_tile(self, curr_event: tuple[str], tile: tuple[int, int]) -> None:
@@ -424,6 +504,7 @@ class StanfordTownExtEnv(ExtEnv):
         for event in curr_tile_ev_cp:
             if event == curr_event:
                 self.tiles[tile[1]][tile[0]]["events"].remove(event)
+        self._on_tile_events_changed(tile)
 
     @mark_as_writeable
     def turn_event_from_tile_idle(self, curr_event: tuple[str], tile: tuple[int, int]) -> None:
@@ -433,6 +514,25 @@ class StanfordTownExtEnv(ExtEnv):
                 self.tiles[tile[1]][tile[0]]["events"].remove(event)
                 new_event = (event[0], None, None, None)
                 self.tiles[tile[1]][tile[0]]["events"].add(new_event)
+        self._on_tile_events_changed(tile)
+
+    @mark_as_writeable
+    def set_tile_collision(self, tile: tuple[int, int], collision_block_char: str, collision: bool = True) -> None:
+        """
+        Block or unblock a tile. The cached paths of the path finders are invalidated.
+
+        INPUT:
+          tile: The tile coordinate of our interest in (x, y) form.
+          collision_block_char: The value of a blocked cell in the collision maze.
+          collision: Whether the tile is blocked.
+        OUPUT:
+          None
+        """
+        x, y = tile
+        self.collision_maze[y][x] = collision_block_char if collision else "0"
+        self.tiles[y][x]["collision"] = collision
+        for char, path_finder in self._path_finders.items():
+            path_finder.set_collision((x, y), self.collision_maze[y][x] == char)
 
     @mark_as_writeable
     def remove_subject_events_from_tile(self, subject: str, tile: tuple[int, int]) -> None:
@@ -449,3 +549,4 @@ class StanfordTownExtEnv(ExtEnv):
         for event in curr_tile_ev_cp:
             if event[0] == subject:
                 self.tiles[tile[1]][tile[0]]["events"].remove(event)
+        self._on_tile_events_changed(tile)
@@ -6,8 +6,14 @@ from datetime import datetime
 from pathlib import Path
 from typing import Optional
 
-from pydantic import Field, field_serializer, model_validator
-
+from pydantic import Field, PrivateAttr, field_serializer, model_validator
+
+from metagpt.ext.stanford_town.memory.columnar_store import (
+    has_columnar,
+    load_columnar,
+    save_columnar,
+)
+from metagpt.ext.stanford_town.memory.retrieval_engine import RetrievalEngine
 from metagpt.logs import logger
 from metagpt.memory.memory import Memory
 from metagpt.schema import Message
@@ -98,6 +104,8 @@ class AgentMemory(Memory):
     1. embedding.json (Dict embedding_key:embedding)
     2. Node.json (Dict Node_id:Node)
     3. kw_strength.json
+    `save` 使用列式存储: nodes.npz 节点表, embeddings.npy float32 向量矩阵(加载时内存映射) 与 embedding_keys.json,
+    `load` 优先读取列式存储, 否则读取GA的JSON
     """
 
     storage: list[BasicMemory] = []  # 重写Storage，存储BasicMemory所有节点
@@ -115,11 +123,34 @@ class AgentMemory(Memory):
     memory_saved: Optional[Path] = Field(default=None)
     embeddings: dict[str, list[float]] = dict()
 
+    _retrieval_engine: RetrievalEngine = PrivateAttr(default_factory=RetrievalEngine)
+    _nodes_by_id: dict[str, BasicMemory] = PrivateAttr(default_factory=dict)
+
+    @property
+    def retrieval_engine(self) -> RetrievalEngine:
+        """Vectorized retrieval engine, synced with the nodes added since its last use"""
+        self._retrieval_engine.sync(self.storage, self.embeddings)
+        return self._retrieval_engine
+
+    @property
+    def nodes_by_id(self) -> dict[str, BasicMemory]:
+        """memory_id -> node, rebuilt if the storage was replaced"""
+        if len(self._nodes_by_id) != len(self.storage):
+            self._nodes_by_id = {i.memory_id: i for i in self.storage}
+        return self._nodes_by_id
+
     def set_mem_path(self, memory_saved: Path):
         self.memory_saved = memory_saved
         self.load(memory_saved)
 
     def save(self, memory_saved: Path):
+        """
+        列式存储节点表与embedding矩阵, kw_strength仍为JSON
+        """
+        save_columnar(memory_saved, self.storage, self.embeddings)
+        self._save_kw_strength(memory_saved)
+
+    def save_json(self, memory_saved: Path):
         """
         将MemoryBasic类存储为Nodes.json形式。复现GA中的Kw Strength.json形式
         这里添加一个路径即可
@@ -131,8 +162,11 @@ class AgentMemory(Memory):
             memory_node = memory_node.save_to_dict()
             memory_json.update(memory_node)
         write_json_file(memory_saved.joinpath("nodes.json"), memory_json)
-        write_json_file(memory_saved.joinpath("embeddings.json"), self.embeddings)
+        embeddings = {key: [float(i) for i in value] for key, value in self.embeddings.items()}
+        write_json_file(memory_saved.joinpath("embeddings.json"), embeddings)
+        self._save_kw_strength(memory_saved)
 
+    def _save_kw_strength(self, memory_saved: Path):
         strength_json = dict()
         strength_json["kw_strength_event"] = self.kw_strength_event
         strength_json["kw_strength_thought"] = self.kw_strength_thought
@@ -140,8 +174,49 @@ class AgentMemory(Memory):
 
     def load(self, memory_saved: Path):
         """
-        将GA的JSON解析，填充到AgentMemory类之中
+        将列式存储或GA的JSON解析，填充到AgentMemory类之中
+        """
+        if has_columnar(memory_saved):
+            self._load_columnar(memory_saved)
+        else:
+            self._load_json(memory_saved)
+        self._load_kw_strength(memory_saved)
+
+    def _load_columnar(self, memory_saved: Path):
+        """
+        批量构建节点与索引, 与逐个调用add_event/add_thought/add_chat的结果一致, 不重复计算depth与description
         """
+        rows, self.embeddings = load_columnar(memory_saved)
+        memory_lists = {"event": self.event_list, "thought": self.thought_list, "chat": self.chat_list}
+        memory_indexes = {"event": self.event_keywords, "thought": self.thought_keywords, "chat": self.chat_keywords}
+        type_lists = {"event": [], "thought": [], "chat": []}
+        keyword_indexes = {"event": {}, "thought": {}, "chat": {}}
+        strengths = {"event": self.kw_strength_event, "thought": self.kw_strength_thought}
+        nodes_by_id = self.nodes_by_id
+        for row in rows:
+            last_accessed = row.pop("last_accessed")
+            memory_node = BasicMemory(**row)
+            memory_node.last_accessed = last_accessed or memory_node.created
+            memory_type = memory_node.memory_type
+            nodes_by_id[memory_node.memory_id] = memory_node
+            self.storage.append(memory_node)
+            type_lists[memory_type].append(memory_node)
+
+            keywords = [i.lower() for i in memory_node.keywords]
+            for kw in keywords:
+                keyword_indexes[memory_type].setdefault(kw, []).append(memory_node)
+            if memory_type in strengths and f"{memory_node.predicate} {memory_node.object}" != "is idle":
+                for kw in keywords:
+                    strengths[memory_type][kw] = strengths[memory_type].get(kw, 0) + 1
+
+        # 与add方法一致, 列表按从新到旧排列
+        for memory_type, memory_list in memory_lists.items():
+            memory_list[0:0] = type_lists[memory_type][::-1]
+            index = memory_indexes[memory_type]
+            for kw, nodes in keyword_indexes[memory_type].items():
+                index[kw] = nodes[::-1] + index.get(kw, [])
+
+    def _load_json(self, memory_saved: Path):
         self.embeddings = read_json_file(memory_saved.joinpath("embeddings.json"))
         memory_load = read_json_file(memory_saved.joinpath("nodes.json"))
         for count in range(len(memory_load.keys())):
@@ -171,6 +246,7 @@ class AgentMemory(Memory):
             if node_type == "chat":
                 self.add_chat(created, expiration, s, p, o, description, keywords, poignancy, embedding_pair, filling)
 
+    def _load_kw_strength(self, memory_saved: Path):
         strength_keywords_load = read_json_file(memory_saved.joinpath("kw_strength.json"))
         if strength_keywords_load["kw_strength_event"]:
             self.kw_strength_event = strength_keywords_load["kw_strength_event"]
@@ -182,8 +258,10 @@ class AgentMemory(Memory):
         Add a new message to storage, while updating the index
         重写add方法，修改原有的Message类为BasicMemory类，并添加不同的记忆类型添加方式
         """
-        if memory_basic.memory_id in self.storage:
+        nodes_by_id = self.nodes_by_id
+        if memory_basic.memory_id in nodes_by_id:
             return
+        nodes_by_id[memory_basic.memory_id] = memory_basic
         self.storage.append(memory_basic)
         if memory_basic.memory_type == "chat":
             self.chat_list[0:0] = [memory_basic]
@@ -250,7 +328,7 @@ class AgentMemory(Memory):
 
         try:
             if filling:
-                depth_list = [memory_node.depth for memory_node in self.storage if memory_node.memory_id in filling]
+                depth_list = [self.nodes_by_id[i].depth for i in filling if i in self.nodes_by_id]
                 depth += max(depth_list)
         except Exception as exp:
             logger.warning(f"filling init occur {exp}")
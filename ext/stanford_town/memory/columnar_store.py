@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Desc   : Columnar persistence of AgentMemory: a compressed node table of NumPy columns and a float32 embedding
+#           matrix which is memory-mapped on load
+
+import json
+import os
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+NODES_FILE = "nodes.npz"
+EMBEDDINGS_FILE = "embeddings.npy"
+EMBEDDING_KEYS_FILE = "embedding_keys.json"
+
+MEMORY_TYPES = ["event", "thought", "chat"]
+LIST_SEP = "\x1f"  # separator of the keywords in a string column
+
+STR_COLUMNS = ["subject", "predicate", "object", "description", "embedding_key", "cause_by"]
+
+
+def has_columnar(memory_saved: Path) -> bool:
+    return memory_saved.joinpath(NODES_FILE).exists() and memory_saved.joinpath(EMBEDDINGS_FILE).exists()
+
+
+def _datetime_column(values: list) -> np.ndarray:
+    return np.array([np.datetime64(i, "s") if i else np.datetime64("NaT") for i in values], dtype="datetime64[s]")
+
+
+def _replace(filename: Path, write):
+    """Write to a temporary file and rename it, so that a memory map of the previous file stays valid"""
+    tmp = filename.with_name(f".{filename.name}.tmp")
+    with open(tmp, "wb") as writer:
+        write(writer)
+    os.replace(tmp, filename)
+
+
+def save_columnar(memory_saved: Path, nodes: list, embeddings: dict[str, list[float]]):
+    """Write the nodes in storage order, and the embeddings as a (keys, dim) float32 matrix"""
+    memory_saved.mkdir(parents=True, exist_ok=True)
+    keys = list(embeddings.keys())
+    if keys:
+        matrix = np.asarray([embeddings[i] for i in keys], dtype=np.float32)
+    else:
+        matrix = np.zeros((0, 0), dtype=np.float32)
+    _replace(memory_saved.joinpath(EMBEDDINGS_FILE), lambda writer: np.save(writer, matrix))
+    keys_data = json.dumps(keys, ensure_ascii=False).encode("utf-8")
+    _replace(memory_saved.joinpath(EMBEDDING_KEYS_FILE), lambda writer: writer.write(keys_data))
+
+    columns = {
+        "memory_count": np.array([i.memory_count for i in nodes], dtype=np.int32),
+        "type_count": np.array([i.type_count for i in nodes], dtype=np.int32),
+        "memory_type": np.array([MEMORY_TYPES.index(i.memory_type) for i in nodes], dtype=np.uint8),
+        "depth": np.array([i.depth for i in nodes], dtype=np.int32),
+        "poignancy": np.array([i.poignancy for i in nodes], dtype=np.int32),
+        "created": _datetime_column([i.created for i in nodes]),
+        "expiration": _datetime_column([i.expiration for i in nodes]),
+        "last_accessed": _datetime_column([i.last_accessed for i in nodes]),
+        "keywords": np.array([LIST_SEP.join(i.keywords) for i in nodes], dtype=str),
+        "filling": np.array([json.dumps(i.filling or [], ensure_ascii=False) for i in nodes], dtype=str),  # ids, chats
+    }
+    for name in STR_COLUMNS:
+        columns[name] = np.array([getattr(i, name) or "" for i in nodes], dtype=str)
+    _replace(memory_saved.joinpath(NODES_FILE), lambda writer: np.savez_compressed(writer, **columns))
+
+
+def load_columnar(memory_saved: Path) -> tuple[list[dict], dict[str, np.ndarray]]:
+    """Read the node table into field dicts of `BasicMemory`, in storage order, and the embeddings as rows of the
+    memory-mapped matrix, which are only paged in when used"""
+    with open(memory_saved.joinpath(EMBEDDING_KEYS_FILE), "r", encoding="utf-8") as reader:
+        keys = json.load(reader)
+    embeddings = {}
+    if keys:
+        matrix = np.load(memory_saved.joinpath(EMBEDDINGS_FILE), mmap_mode="r")
+        embeddings = dict(zip(keys, matrix))
+
+    with np.load(memory_saved.joinpath(NODES_FILE)) as data:
+        columns = {name: data[name].tolist() for name in data.files}  # datetime64[s] columns give datetimes
+    rows = []
+    for i in range(len(columns["memory_count"])):
+        row = {name: columns[name][i] or None for name in STR_COLUMNS}
+        row["cause_by"] = row["cause_by"] or ""
+        row.update(
+            memory_id=f"node_{columns['memory_count'][i]}",
+            memory_count=columns["memory_count"][i],
+            type_count=columns["type_count"][i],
+            memory_type=MEMORY_TYPES[columns["memory_type"][i]],
+            depth=columns["depth"][i],
+            poignancy=columns["poignancy"][i],
+            created=columns["created"][i],
+            expiration=columns["expiration"][i],
+            last_accessed=columns["last_accessed"][i],
+            keywords=_split(columns["keywords"][i]),
+            filling=json.loads(columns["filling"][i]),
+        )
+        rows.append(row)
+    return rows, embeddings
+
+
+def _split(value: Optional[str]) -> list[str]:
+    return value.split(LIST_SEP) if value else []
@@ -0,0 +1,152 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Desc   : Array-backed retrieval engine of AgentMemory, scoring importance, recency and relevance in one pass
+
+from datetime import datetime
+from typing import Optional
+
+import numpy as np
+
+EPOCH = datetime(1970, 1, 1)
+SECONDS_PER_DAY = 86400
+
+
+def _timestamp(dt: Optional[datetime]) -> float:
+    # naive datetimes of the simulation, independent of the local timezone
+    return (dt - EPOCH).total_seconds() if dt else 0.0
+
+
+def _normalize_rows(scores: np.ndarray, target_min: float = 0, target_max: float = 1) -> np.ndarray:
+    """Min-max normalize each row into [target_min, target_max], a constant row is set to the middle value"""
+    min_val = scores.min(axis=-1, keepdims=True)
+    range_val = scores.max(axis=-1, keepdims=True) - min_val
+    safe_range = np.where(range_val == 0, 1, range_val)
+    normalized = (scores - min_val) * (target_max - target_min) / safe_range + target_min
+    return np.where(range_val == 0, (target_max - target_min) / 2, normalized)
+
+
+class RetrievalEngine:
+    """Rows of the retrievable memories of an `AgentMemory`: a contiguous matrix of normalized embeddings, poignancy
+    and creation time arrays, and a memory_id -> row index.
+
+    Rows are appended lazily by `sync` from `AgentMemory.storage`, whose embeddings are only set after the nodes are
+    added. Candidates of retrieval are the event and thought memories not about idling, as in `new_agent_retrieve`.
+    """
+
+    def __init__(self, capacity: int = 256):
+        self.capacity = capacity
+        self.nodes = []  # BasicMemory of each row
+        self.row_of: dict[str, int] = {}
+        self._embeddings: Optional[np.ndarray] = None
+        self._poignancy = np.zeros(capacity, dtype=np.float64)
+        self._created = np.zeros(capacity, dtype=np.float64)
+        self._candidate = np.zeros(capacity, dtype=bool)
+        self._synced = 0  # number of storage nodes seen
+        self._first = None  # first storage node, to detect a replaced storage
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def _grow(self, size: int):
+        if size <= self.capacity:
+            return
+        capacity = max(size, self.capacity * 2)
+        self._poignancy = np.resize(self._poignancy, capacity)
+        self._created = np.resize(self._created, capacity)
+        self._candidate = np.resize(self._candidate, capacity)
+        if self._embeddings is not None:
+            embeddings = np.zeros((capacity, self._embeddings.shape[1]), dtype=np.float32)
+            embeddings[: len(self.nodes)] = self._embeddings[: len(self.nodes)]
+            self._embeddings = embeddings
+        self.capacity = capacity
+
+    def reset(self):
+        self.__init__(capacity=self.capacity)
+
+    def add(self, node, embedding: Optional[list[float]]):
+        row = len(self.nodes)
+        self._grow(row + 1)
+        vector = np.asarray(embedding if embedding is not None else [], dtype=np.float32)
+        if self._embeddings is None and vector.size:
+            self._embeddings = np.zeros((self.capacity, vector.size), dtype=np.float32)
+        if vector.size and self._embeddings is not None and vector.size == self._embeddings.shape[1]:
+            norm = np.linalg.norm(vector)
+            self._embeddings[row] = vector / norm if norm else vector
+        self._poignancy[row] = node.poignancy
+        self._created[row] = _timestamp(node.created)
+        self._candidate[row] = node.memory_type in ("event", "thought") and "idle" not in (node.embedding_key or "")
+        self.nodes.append(node)
+        self.row_of[node.memory_id] = row
+
+    def sync(self, storage: list, embeddings: dict[str, list[float]]):
+        """Index the nodes appended to the storage since the last sync"""
+        if len(storage) < self._synced or (storage and self._first is not None and storage[0] is not self._first):
+            self.reset()
+        for node in storage[self._synced :]:
+            self.add(node, embeddings.get(node.embedding_key))
+        self._synced = len(storage)
+        self._first = storage[0] if storage else None
+
+    def score(
+        self,
+        query_embeddings: list[list[float]],
+        curr_time: datetime,
+        recency_decay: float,
+        weights: tuple[float, float, float] = (1, 1, 1),
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Score the candidate rows against several queries at once.
+
+        :return: The candidate rows, and a (queries, candidates) matrix of the weighted sums of the normalized
+            importance, recency and relevance.
+        """
+        n = len(self.nodes)
+        rows = np.flatnonzero(self._candidate[:n])
+        queries = np.asarray(query_embeddings, dtype=np.float32)
+        if not rows.size or self._embeddings is None:
+            return rows, np.zeros((len(queries), rows.size))
+        norms = np.linalg.norm(queries, axis=1, keepdims=True)
+        queries = queries / np.where(norms == 0, 1, norms)
+
+        importance = _normalize_rows(self._poignancy[rows])
+        days = np.floor((_timestamp(curr_time) - self._created[rows]) / SECONDS_PER_DAY)
+        recency = _normalize_rows(np.power(float(recency_decay), days))
+        relevance = _normalize_rows(queries @ self._embeddings[rows].T)  # all the queries in one matrix multiply
+        total = weights[0] * importance + weights[1] * recency + weights[2] * relevance.astype(np.float64)
+        return rows, total
+
+    def _scan_order(self, rows: np.ndarray, accessed: np.ndarray) -> np.ndarray:
+        """Positions of the candidate rows in the order the legacy retrieval scanned them, which breaks the ties of
+        scores: the most recently accessed first, then the events before the thoughts, each the newest first"""
+        thought = np.array([self.nodes[i].memory_type == "thought" for i in rows.tolist()], dtype=bool)
+        return np.lexsort((-rows, thought, -accessed))
+
+    def retrieve(
+        self,
+        query_embeddings: list[list[float]],
+        curr_time: datetime,
+        recency_decay: float,
+        topk: int,
+        weights: tuple[float, float, float] = (1, 1, 1),
+        accessed_time: Optional[datetime] = None,
+    ) -> list[list]:
+        """Return the top k memories of each query, in descending order of score, ties in the scan order.
+
+        :param accessed_time: If set, the `last_accessed` of the memories retrieved by a query is set to it before the
+            next query is ranked, as the legacy retrieval did between focal points.
+        """
+        rows, total = self.score(query_embeddings, curr_time, recency_decay, weights)
+        if not rows.size or topk <= 0:
+            return [[] for _ in query_embeddings]
+        accessed = np.array([_timestamp(self.nodes[i].last_accessed) for i in rows.tolist()], dtype=np.float64)
+        order = self._scan_order(rows, accessed)
+        results = []
+        for query_total in total:
+            top = order[np.argsort(-query_total[order], kind="stable")[:topk]]
+            nodes = [self.nodes[rows[i]] for i in top.tolist()]
+            if accessed_time is not None:
+                for node in nodes:
+                    node.last_accessed = accessed_time
+                accessed[top] = _timestamp(accessed_time)
+                order = self._scan_order(rows, accessed)
+            results.append(nodes)
+        return results
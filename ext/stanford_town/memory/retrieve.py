@@ -8,7 +8,7 @@ from numpy import dot
 from numpy.linalg import norm
 
 from metagpt.ext.stanford_town.memory.agent_memory import BasicMemory
-from metagpt.ext.stanford_town.utils.utils import get_embedding
+from metagpt.ext.stanford_town.utils.utils import aget_embeddings, get_embedding
 
 
 def agent_retrieve(
@@ -55,33 +55,23 @@ def agent_retrieve(
     return result  # 返回的是一个BasicMemory列表
 
 
-def new_agent_retrieve(role, focus_points: list, n_count=30) -> dict:
+async def new_agent_retrieve(role, focus_points: list, n_count=30) -> dict:
     """
     输入为role，关注点列表,返回记忆数量
     输出为字典，键为focus_point，值为对应的记忆列表
-    """
-    retrieved = dict()
-    for focal_pt in focus_points:
-        nodes = [
-            [i.last_accessed, i]
-            for i in role.memory.event_list + role.memory.thought_list
-            if "idle" not in i.embedding_key
-        ]
-        nodes = sorted(nodes, key=lambda x: x[0])
-        nodes = [i for created, i in nodes]
-        results = agent_retrieve(
-            role.memory, role.scratch.curr_time, role.scratch.recency_decay, focal_pt, nodes, n_count
-        )
-        final_result = []
-        for n in results:
-            for i in role.memory.storage:
-                if i.memory_id == n:
-                    i.last_accessed = role.scratch.curr_time
-                    final_result.append(i)
-
-        retrieved[focal_pt] = final_result
-
-    return retrieved
+    所有关注点在AgentMemory的向量化检索引擎中一次性打分
+    """
+    if not focus_points:
+        return dict()
+    query_embeddings = await aget_embeddings(focus_points)
+    results = role.memory.retrieval_engine.retrieve(
+        query_embeddings,
+        role.scratch.curr_time,
+        role.scratch.recency_decay,
+        n_count,
+        accessed_time=role.scratch.curr_time,
+    )
+    return dict(zip(focus_points, results))
 
 
 def top_highest_x_values(d, x):
@@ -20,7 +20,7 @@ async def agent_conversation(init_role: "STRole", target_role: "STRole", conv_ro
         target_scratch = target_role.rc.scratch
 
         focal_points = [f"{target_scratch.name}"]
-        retrieved = new_agent_retrieve(init_role, focal_points, 50)
+        retrieved = await new_agent_retrieve(init_role, focal_points, 50)
         relationship = await generate_summarize_agent_relationship(init_role, target_role, retrieved)
         logger.info(f"The relationship between {init_role.name} and {target_role.name}: {relationship}")
         last_chat = ""
@@ -30,7 +30,7 @@ async def agent_conversation(init_role: "STRole", target_role: "STRole", conv_ro
             focal_points = [f"{relationship}", f"{target_scratch.name} is {target_scratch.act_description}", last_chat]
         else:
             focal_points = [f"{relationship}", f"{target_scratch.name} is {target_scratch.act_description}"]
-        retrieved = new_agent_retrieve(init_role, focal_points, 15)
+        retrieved = await new_agent_retrieve(init_role, focal_points, 15)
         utt, end = await generate_one_utterance(init_role, target_role, retrieved, curr_chat)
 
         curr_chat += [[scratch.name, utt]]
@@ -38,7 +38,7 @@ async def agent_conversation(init_role: "STRole", target_role: "STRole", conv_ro
             break
 
         focal_points = [f"{scratch.name}"]
-        retrieved = new_agent_retrieve(target_role, focal_points, 50)
+        retrieved = await new_agent_retrieve(target_role, focal_points, 50)
         relationship = await generate_summarize_agent_relationship(target_role, init_role, retrieved)
         logger.info(f"The relationship between {target_role.name} and {init_role.name}: {relationship}")
         last_chat = ""
@@ -48,7 +48,7 @@ async def agent_conversation(init_role: "STRole", target_role: "STRole", conv_ro
             focal_points = [f"{relationship}", f"{scratch.name} is {scratch.act_description}", last_chat]
         else:
             focal_points = [f"{relationship}", f"{scratch.name} is {scratch.act_description}"]
-        retrieved = new_agent_retrieve(target_role, focal_points, 15)
+        retrieved = await new_agent_retrieve(target_role, focal_points, 15)
         utt, end = await generate_one_utterance(target_role, init_role, retrieved, curr_chat)
 
         curr_chat += [[target_scratch.name, utt]]
@@ -43,7 +43,7 @@ from metagpt.ext.stanford_town.utils.mg_ga_transform import (
     save_environment,
     save_movement,
 )
-from metagpt.ext.stanford_town.utils.utils import get_embedding, path_finder
+from metagpt.ext.stanford_town.utils.utils import aget_embedding, aget_embeddings
 from metagpt.logs import logger
 from metagpt.roles.role import Role, RoleContext
 from metagpt.schema import Message
@@ -55,6 +55,15 @@ if TYPE_CHECKING:
     )
 
 
+def event_embedding_key(event: tuple) -> str:
+    """The text embedded for a perceived (s, p, o, desc) event, as in `STRole.observe`"""
+    s, p, o, desc = event
+    desc = f"{s.split(':')[-1]} is {desc if p else 'idle'}"
+    if "(" in desc:
+        desc = desc.split("(")[1].split(")")[0].strip()
+    return desc
+
+
 class STRoleContext(RoleContext):
     model_config = ConfigDict(arbitrary_types_allowed=True)
 
@@ -217,7 +226,7 @@ class STRole(Role):
         s, p, o = await run_event_triple.run(thought, self)
         keywords = set([s, p, o])
         thought_poignancy = await generate_poig_score(self, "event", whisper)
-        thought_embedding_pair = (thought, get_embedding(thought))
+        thought_embedding_pair = (thought, await aget_embedding(thought))
         self.rc.memory.add_thought(
             created, expiration, s, p, o, thought, keywords, thought_poignancy, thought_embedding_pair, None
         )
@@ -238,27 +247,22 @@ class STRole(Role):
             ret_events: a list of <BasicMemory> that are perceived and new.
         """
         # PERCEIVE SPACE
-        # We get the nearby tiles given our current tile and the persona's vision
-        # radius.
-        nearby_tiles = self.rc.env.observe(
-            EnvObsParams(
-                obs_type=EnvObsType.TILE_NBR, coord=self.rc.scratch.curr_tile, vision_radius=self.rc.scratch.vision_r
-            )
+        # We observe the tiles within the persona's vision radius in one call, which
+        # gives the distinct addresses of the tiles, the current arena and the events
+        # of the tiles in the window.
+        curr_tile = self.rc.scratch.curr_tile
+        region = self.rc.env.observe(
+            EnvObsParams(obs_type=EnvObsType.REGION, coord=curr_tile, vision_radius=self.rc.scratch.vision_r)
         )
 
         # We then store the perceived space. Note that the s_mem of the persona is
         # in the form of a tree constructed using dictionaries.
-        for tile in nearby_tiles:
-            tile_info = self.rc.env.observe(EnvObsParams(obs_type=EnvObsType.GET_TITLE, coord=tile))
+        for tile_info in region["tile_infos"]:
             self.rc.spatial_memory.add_tile_info(tile_info)
 
         # PERCEIVE EVENTS.
         # We will perceive events that take place in the same arena as the
-        # persona's current arena.
-
-        curr_arena_path = self.rc.env.observe(
-            EnvObsParams(obs_type=EnvObsType.TILE_PATH, coord=self.rc.scratch.curr_tile, level="arena")
-        )
+        # persona's current arena, the region only holds the events of this arena.
 
         # We do not perceive the same event twice (this can happen if an object is
         # extended across multiple tiles).
@@ -268,22 +272,15 @@ class STRole(Role):
         percept_events_list = []
         # First, we put all events that are occurring in the nearby tiles into the
         # percept_events_list
-        for tile in nearby_tiles:
-            tile_details = self.rc.env.observe(EnvObsParams(obs_type=EnvObsType.GET_TITLE, coord=tile))
-            if tile_details["events"]:
-                tmp_arena_path = self.rc.env.observe(
-                    EnvObsParams(obs_type=EnvObsType.TILE_PATH, coord=tile, level="arena")
-                )
-
-                if tmp_arena_path == curr_arena_path:
-                    # This calculates the distance between the persona's current tile,
-                    # and the target tile.
-                    dist = math.dist([tile[0], tile[1]], [self.rc.scratch.curr_tile[0], self.rc.scratch.curr_tile[1]])
-                    # Add any relevant events to our temp set/list with the distant info.
-                    for event in tile_details["events"]:
-                        if event not in percept_events_set:
-                            percept_events_list += [[dist, event]]
-                            percept_events_set.add(event)
+        for tile, tile_events in region["events"]:
+            # This calculates the distance between the persona's current tile,
+            # and the target tile.
+            dist = math.dist([tile[0], tile[1]], [curr_tile[0], curr_tile[1]])
+            # Add any relevant events to our temp set/list with the distant info.
+            for event in tile_events:
+                if event not in percept_events_set:
+                    percept_events_list += [[dist, event]]
+                    percept_events_set.add(event)
 
         # We sort, and perceive only self.rc.scratch.att_bandwidth of the closest
         # events. If the bandwidth is larger, then it means the persona can perceive
@@ -293,6 +290,11 @@ class STRole(Role):
         for dist, event in percept_events_list[: self.rc.scratch.att_bandwidth]:
             perceived_events += [event]
 
+        # Embed the new descriptions of the perceived events in one batch, the loop
+        # below reads them from the cache of the embedding service.
+        new_descs = [event_embedding_key(event) for event in perceived_events]
+        await aget_embeddings([i for i in new_descs if i not in self.rc.memory.embeddings])
+
         # Storing events.
         # <ret_events> is a list of <BasicMemory> instances from the persona's
         # associative memory.
@@ -329,7 +331,7 @@ class STRole(Role):
                 if desc_embedding_in in self.rc.memory.embeddings:
                     event_embedding = self.rc.memory.embeddings[desc_embedding_in]
                 else:
-                    event_embedding = get_embedding(desc_embedding_in)
+                    event_embedding = await aget_embedding(desc_embedding_in)
                 event_embedding_pair = (desc_embedding_in, event_embedding)
 
                 # Get event poignancy.
@@ -344,7 +346,7 @@ class STRole(Role):
                     if self.rc.scratch.act_description in self.rc.memory.embeddings:
                         chat_embedding = self.rc.memory.embeddings[self.rc.scratch.act_description]
                     else:
-                        chat_embedding = get_embedding(self.rc.scratch.act_description)
+                        chat_embedding = await aget_embedding(self.rc.scratch.act_description)
                     chat_embedding_pair = (self.rc.scratch.act_description, chat_embedding)
                     chat_poignancy = await generate_poig_score(self, "chat", self.rc.scratch.act_description)
                     chat_node = self.rc.memory.add_chat(
@@ -427,31 +429,22 @@ class STRole(Role):
             if "<persona>" in plan:
                 # Executing persona-persona interaction.
                 target_p_tile = roles[plan.split("<persona>")[-1].strip()].scratch.curr_tile
-                collision_maze = self.rc.env.observe()["collision_maze"]
-                potential_path = path_finder(
-                    collision_maze, self.rc.scratch.curr_tile, target_p_tile, collision_block_id
-                )
+                potential_path = self.rc.env.find_path(self.rc.scratch.curr_tile, target_p_tile, collision_block_id)
                 if len(potential_path) <= 2:
                     target_tiles = [potential_path[0]]
                 else:
-                    collision_maze = self.rc.env.observe()["collision_maze"]
-                    potential_1 = path_finder(
-                        collision_maze,
-                        self.rc.scratch.curr_tile,
-                        potential_path[int(len(potential_path) / 2)],
-                        collision_block_id,
-                    )
-
-                    potential_2 = path_finder(
-                        collision_maze,
-                        self.rc.scratch.curr_tile,
-                        potential_path[int(len(potential_path) / 2) + 1],
+                    middle = int(len(potential_path) / 2)
+                    potential_1, potential_2 = self.rc.env.find_paths(
+                        [
+                            (self.rc.scratch.curr_tile, potential_path[middle]),
+                            (self.rc.scratch.curr_tile, potential_path[middle + 1]),
+                        ],
                         collision_block_id,
                     )
                     if len(potential_1) <= len(potential_2):
-                        target_tiles = [potential_path[int(len(potential_path) / 2)]]
+                        target_tiles = [potential_path[middle]]
                     else:
-                        target_tiles = [potential_path[int(len(potential_path) / 2 + 1)]]
+                        target_tiles = [potential_path[middle + 1]]
 
             elif "<waiting>" in plan:
                 # Executing interaction where the persona has decided to wait before
@@ -509,21 +502,10 @@ class STRole(Role):
             # Now that we've identified the target tile, we find the shortest path to
             # one of the target tiles.
             curr_tile = self.rc.scratch.curr_tile
-            closest_target_tile = None
-            path = None
-            for i in target_tiles:
-                # path_finder takes a collision_mze and the curr_tile coordinate as
-                # an input, and returns a list of coordinate tuples that becomes the
-                # path.
-                # e.g., [(0, 1), (1, 1), (1, 2), (1, 3), (1, 4)...]
-                collision_maze = self.rc.env.observe()["collision_maze"]
-                curr_path = path_finder(collision_maze, curr_tile, i, collision_block_id)
-                if not closest_target_tile:
-                    closest_target_tile = i
-                    path = curr_path
-                elif len(curr_path) < len(path):
-                    closest_target_tile = i
-                    path = curr_path
+            # find_closest_path searches all the target tiles at once, and returns the
+            # path as a list of coordinate tuples, including the curr_tile.
+            # e.g., [(0, 1), (1, 1), (1, 2), (1, 3), (1, 4)...]
+            closest_target_tile, path = self.rc.env.find_closest_path(curr_tile, target_tiles, collision_block_id)
 
             # Actually setting the <planned_path> and <act_path_set>. We cut the
             # first element in the planned_path because it includes the curr_tile.
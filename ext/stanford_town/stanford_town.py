@@ -8,6 +8,7 @@ from metagpt.context import Context
 from metagpt.environment import StanfordTownEnv
 from metagpt.ext.stanford_town.roles.st_role import STRole
 from metagpt.ext.stanford_town.utils.const import MAZE_ASSET_PATH
+from metagpt.ext.stanford_town.utils.embedding import get_embedding_service
 from metagpt.logs import logger
 from metagpt.team import Team
 
@@ -36,6 +37,7 @@ class StanfordTown(Team):
             logger.debug(f"{n_round=}")
             self._check_balance()
             await self.env.run()
+            get_embedding_service().save()  # append the embeddings of the round to the cache file
 
         # save simulation result including environment and roles after all rounds
         roles = self.env.get_roles()
@@ -0,0 +1,236 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Desc   : Embedding service of the town simulation: async, batched across the concurrent roles, cached by normalized
+#           text and persisted to disk. `HashEmbedder` is an offline deterministic embedder for tests and replays.
+
+import asyncio
+import hashlib
+import json
+import re
+import time
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+from openai import AsyncOpenAI, OpenAI
+
+from metagpt.config2 import config
+from metagpt.ext.stanford_town.utils.const import EMBEDDING_CACHE_PATH
+from metagpt.logs import logger
+
+BLANK_TEXT = "this is blank"
+
+
+def normalize_text(text: str) -> str:
+    """The cache key of a text: whitespace collapsed, and a placeholder for a blank text as the original embedding"""
+    text = " ".join(text.split())
+    return text or BLANK_TEXT
+
+
+class BaseEmbedder:
+    """Embed a batch of texts. `name` identifies the embedding space, the persisted cache is kept per name."""
+
+    name: str = "base"
+
+    async def aembed(self, texts: list[str]) -> list[list[float]]:
+        raise NotImplementedError
+
+    def embed(self, texts: list[str]) -> list[list[float]]:
+        raise NotImplementedError
+
+
+class OpenAIEmbedder(BaseEmbedder):
+    """OpenAI embeddings with the key of `config.llm`, as the town always used, independent of the RAG embedding
+    config. The clients are created once and a batch of texts is embedded in one request."""
+
+    def __init__(self, model: str = "text-embedding-ada-002", api_key: str = "", base_url: str = ""):
+        self.model = model
+        self.api_key = api_key or config.llm.api_key
+        self.base_url = base_url or None
+        self.name = f"openai-{self.model}"
+        self._aclient: Optional[AsyncOpenAI] = None
+        self._client: Optional[OpenAI] = None
+
+    async def aembed(self, texts: list[str]) -> list[list[float]]:
+        if not self._aclient:
+            self._aclient = AsyncOpenAI(api_key=self.api_key, base_url=self.base_url)
+        rsp = await self._aclient.embeddings.create(input=texts, model=self.model)
+        return [i.embedding for i in sorted(rsp.data, key=lambda i: i.index)]
+
+    def embed(self, texts: list[str]) -> list[list[float]]:
+        if not self._client:
+            self._client = OpenAI(api_key=self.api_key, base_url=self.base_url)
+        rsp = self._client.embeddings.create(input=texts, model=self.model)
+        return [i.embedding for i in sorted(rsp.data, key=lambda i: i.index)]
+
+
+class HashEmbedder(BaseEmbedder):
+    """Offline deterministic embeddings: a signed bag of hashed words and word bigrams, L2 normalized. Texts sharing
+    words are similar, and the same text gives the same vector in any process, which makes runs reproducible."""
+
+    def __init__(self, dimensions: int = 1536):
+        self.dimensions = dimensions
+        self.name = f"hash-{dimensions}"
+
+    def _embed_one(self, text: str) -> list[float]:
+        words = re.findall(r"\w+", text.lower())
+        vector = np.zeros(self.dimensions, dtype=np.float64)
+        for feature in words + [f"{a} {b}" for a, b in zip(words, words[1:])]:
+            digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+            value = int.from_bytes(digest, "little")
+            vector[value % self.dimensions] += 1.0 if value >> 63 else -1.0
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector).tolist()
+
+    async def aembed(self, texts: list[str]) -> list[list[float]]:
+        return self.embed(texts)
+
+    def embed(self, texts: list[str]) -> list[list[float]]:
+        return [self._embed_one(text) for text in texts]
+
+
+class EmbeddingService:
+    """Cached and batched embeddings.
+
+    Concurrent `aget`/`aget_many` calls are collected for `batch_window` seconds, so the texts requested by all the
+    roles in a step go out in a few batched requests, and a text requested twice is embedded once. Failed requests are
+    retried with `asyncio.sleep`, which does not block the other roles. Embeddings are cached by normalized text and
+    appended to `EMBEDDING_CACHE_PATH/<embedder name>.jsonl` by `save`.
+    """
+
+    def __init__(
+        self,
+        embedder: Optional[BaseEmbedder] = None,
+        cache_path: Optional[Path] = None,
+        batch_size: int = 256,
+        batch_window: float = 0.05,
+        max_retries: int = 3,
+        retry_delay: float = 5,
+    ):
+        self.embedder = embedder or OpenAIEmbedder()
+        self.cache_path = cache_path if cache_path is not None else EMBEDDING_CACHE_PATH / f"{self.embedder.name}.jsonl"
+        self.batch_size = batch_size
+        self.batch_window = batch_window
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self._cache: Optional[dict[str, list[float]]] = None
+        self._unsaved: list[str] = []
+        self._pending: dict[str, asyncio.Future] = {}  # text -> future resolved once it is cached
+        self._queue: list[str] = []  # pending texts not sent yet
+        self._flush_task: Optional[asyncio.Task] = None
+
+    @property
+    def cache(self) -> dict[str, list[float]]:
+        if self._cache is None:
+            self._cache = self._load()
+        return self._cache
+
+    def _load(self) -> dict[str, list[float]]:
+        cache = {}
+        if not self.cache_path or not self.cache_path.exists():
+            return cache
+        with open(self.cache_path, "r", encoding="utf-8") as reader:
+            for line in reader:
+                try:
+                    item = json.loads(line)
+                except json.JSONDecodeError:  # a line truncated by an interrupted save
+                    continue
+                cache[item["text"]] = item["embedding"]
+        logger.debug(f"Loaded {len(cache)} embeddings from {self.cache_path}")
+        return cache
+
+    def save(self):
+        """Append the embeddings computed since the last save to the cache file"""
+        if not self._unsaved or not self.cache_path:
+            return
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.cache_path, "a", encoding="utf-8") as writer:
+            for text in self._unsaved:
+                writer.write(json.dumps({"text": text, "embedding": self.cache[text]}) + "\n")
+        self._unsaved = []
+
+    def _put(self, text: str, embedding: list[float]):
+        if text not in self.cache:
+            self._unsaved.append(text)
+        self.cache[text] = embedding
+
+    async def aget(self, text: str) -> list[float]:
+        return (await self.aget_many([text]))[0]
+
+    async def aget_many(self, texts: list[str]) -> list[list[float]]:
+        keys = [normalize_text(text) for text in texts]
+        loop = asyncio.get_running_loop()
+        waiting = {}
+        for key in keys:
+            if key in self.cache or key in waiting:
+                continue
+            if key not in self._pending:
+                self._pending[key] = loop.create_future()
+                self._queue.append(key)
+            waiting[key] = self._pending[key]
+        if waiting:
+            if not self._flush_task or self._flush_task.done():
+                self._flush_task = asyncio.create_task(self._flush())
+            # shared with other roles waiting on the same texts, a cancelled role must not cancel them
+            await asyncio.shield(asyncio.gather(*waiting.values()))
+        return [self.cache[key] for key in keys]
+
+    async def _flush(self):
+        await asyncio.sleep(self.batch_window)
+        while self._queue:
+            batch = self._queue[: self.batch_size]
+            del self._queue[: self.batch_size]
+            try:
+                embeddings = await self._aembed_with_retry(batch)
+            except Exception as e:
+                for key in batch:
+                    future = self._pending.pop(key)
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            for key, embedding in zip(batch, embeddings):
+                self._put(key, embedding)
+                future = self._pending.pop(key)
+                if not future.done():
+                    future.set_result(None)
+
+    async def _aembed_with_retry(self, texts: list[str]) -> list[list[float]]:
+        for idx in range(self.max_retries):
+            try:
+                return await self.embedder.aembed(texts)
+            except Exception as exp:
+                if idx == self.max_retries - 1:
+                    raise ValueError(f"get_embedding failed: {exp}") from exp
+                logger.info(f"get_embedding failed, exp: {exp}, will retry.")
+                await asyncio.sleep(self.retry_delay)
+
+    def get(self, text: str) -> list[float]:
+        """Synchronous embedding for the sync code paths, cached the same way"""
+        key = normalize_text(text)
+        if key not in self.cache:
+            for idx in range(self.max_retries):
+                try:
+                    self._put(key, self.embedder.embed([key])[0])
+                    break
+                except Exception as exp:
+                    if idx == self.max_retries - 1:
+                        raise ValueError(f"get_embedding failed: {exp}") from exp
+                    logger.info(f"get_embedding failed, exp: {exp}, will retry.")
+                    time.sleep(self.retry_delay)
+        return self.cache[key]
+
+
+_embedding_service: Optional[EmbeddingService] = None
+
+
+def get_embedding_service() -> EmbeddingService:
+    global _embedding_service
+    if _embedding_service is None:
+        _embedding_service = EmbeddingService()
+    return _embedding_service
+
+
+def set_embedding_service(service: EmbeddingService):
+    """Use another service, e.g. `EmbeddingService(HashEmbedder())` for offline tests and replays"""
+    global _embedding_service
+    _embedding_service = service
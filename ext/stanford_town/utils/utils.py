@@ -7,13 +7,11 @@ import errno
 import json
 import os
 import shutil
-import time
 from pathlib import Path
 from typing import Union
 
-from openai import OpenAI
-
-from metagpt.config2 import config
+from metagpt.environment.stanford_town.path_finder import GridPathFinder
+from metagpt.ext.stanford_town.utils.embedding import get_embedding_service
 from metagpt.logs import logger
 
 
@@ -47,22 +45,18 @@ def read_csv_to_list(curr_file: str, header=False, strip_trail=True):
         return analysis_list[0], analysis_list[1:]
 
 
-def get_embedding(text, model: str = "text-embedding-ada-002"):
-    text = text.replace("\n", " ")
-    embedding = None
-    if not text:
-        text = "this is blank"
-    for idx in range(3):
-        try:
-            embedding = (
-                OpenAI(api_key=config.llm.api_key).embeddings.create(input=[text], model=model).data[0].embedding
-            )
-        except Exception as exp:
-            logger.info(f"get_embedding failed, exp: {exp}, will retry.")
-            time.sleep(5)
-    if not embedding:
-        raise ValueError("get_embedding failed")
-    return embedding
+def get_embedding(text: str) -> list[float]:
+    """Embedding of a text from the cached embedding service, for the sync code paths"""
+    return get_embedding_service().get(text)
+
+
+async def aget_embedding(text: str) -> list[float]:
+    """Embedding of a text from the cached embedding service, batched with the concurrent requests of other roles"""
+    return await get_embedding_service().aget(text)
+
+
+async def aget_embeddings(texts: list[str]) -> list[list[float]]:
+    return await get_embedding_service().aget_many(texts)
 
 
 def extract_first_json_dict(data_str: str) -> Union[None, dict]:
@@ -155,19 +149,13 @@ def path_finder_v2(a, start, end, collision_block_char) -> list[int]:
 
 
 def path_finder(collision_maze: list, start: list[int], end: list[int], collision_block_char: str) -> list[int]:
-    # EMERGENCY PATCH
-    start = (start[1], start[0])
-    end = (end[1], end[0])
-    # END EMERGENCY PATCH
-
-    path = path_finder_v2(collision_maze, start, end, collision_block_char)
-
-    new_path = []
-    for i in path:
-        new_path += [(i[1], i[0])]
-    path = new_path
+    """Shortest path between (x, y) tiles, `[end]` if unreachable. Prefer `StanfordTownExtEnv.find_path`, which keeps
+    the path finder and its caches across calls.
 
-    return path
+    The path has the length of the one of `path_finder_v2`, but may go through other tiles when several shortest paths
+    tie, and destinations beyond the 150 wavefront steps after which `path_finder_v2` gave up are still found."""
+    path_finder = GridPathFinder(collision_maze, collision_block_char)
+    return path_finder.find_path(tuple(start), tuple(end))
 
 
 def create_folder_if_not_there(curr_path):
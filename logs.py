@@ -7,7 +7,9 @@
 """
 
 import sys
+from contextvars import ContextVar
 from datetime import datetime
+from typing import Callable, Optional
 
 from loguru import logger as _logger
 
@@ -34,7 +36,14 @@ def define_log_level(print_level="INFO", logfile_level="DEBUG", name: str = None
 logger = define_log_level()
 
 
+# Called with each streamed chunk of the LLM calls made in the current context, e.g. by ActionNode streaming parsers
+LLM_STREAM_HOOK: ContextVar[Optional[Callable[[str], None]]] = ContextVar("llm-stream-hook", default=None)
+
+
 def log_llm_stream(msg):
+    hook = LLM_STREAM_HOOK.get()
+    if hook:
+        hook(msg)
     _llm_stream_log(msg)
 
 
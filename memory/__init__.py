@@ -7,11 +7,13 @@
 """
 
 from metagpt.memory.memory import Memory
+from metagpt.memory.indexed_memory import IndexedMemory
 
 # from metagpt.memory.longterm_memory import LongTermMemory
 
 
 __all__ = [
     "Memory",
+    "IndexedMemory",
     # "LongTermMemory",
 ]
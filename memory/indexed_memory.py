@@ -0,0 +1,177 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+@File    : indexed_memory.py
+@Desc    : A `Memory` backed by hash indexes. Dedupe and `find_news` cost O(1) per message instead of a scan over
+    the whole storage, which keeps `Role._observe` flat for long-running roles.
+"""
+from collections import defaultdict
+from typing import Dict, Iterable, Optional, Tuple
+
+from pydantic import Field, PrivateAttr
+
+from metagpt.const import IGNORED_MESSAGE_ID
+from metagpt.memory.memory import Memory
+from metagpt.schema import Message
+
+TRIGRAM_SIZE = 3
+
+
+def _dedupe_key(message: Message) -> Tuple[str, str, str, str, str]:
+    """Hashable fingerprint of a message; equal messages always share the same key."""
+    return message.id, message.role, message.cause_by, message.sent_from, message.content
+
+
+def _trigrams(text: str) -> set[str]:
+    return {text[i : i + TRIGRAM_SIZE] for i in range(len(text) - TRIGRAM_SIZE + 1)}
+
+
+class IndexedMemory(Memory):
+    """Memory with id/role/sent_from/send_to indexes and an optional inverted trigram index over contents.
+
+    The public fields and their serialization are identical to `Memory`; all indexes are private and rebuilt from
+    `storage` after validation, so a serialized `Memory` can be loaded as an `IndexedMemory` and vice versa.
+
+    `add`, dedupe, `find_news` and the `get_by_*` lookups are O(1) per message, but `delete` is O(n): the message is
+    found in O(1), then removed from the `storage` and `index[cause_by]` lists, which stay plain lists to keep the
+    `Memory` fields. The removal scans from the end, so deleting a recent message stays cheap.
+    """
+
+    keyword_index: bool = Field(default=False, exclude=True)  # maintain the trigram index for content lookups
+
+    _dedupe_index: Dict[tuple, list[Message]] = PrivateAttr(default_factory=dict)
+    _role_index: Dict[str, Dict[int, Message]] = PrivateAttr(default_factory=lambda: defaultdict(dict))
+    _sent_from_index: Dict[str, Dict[int, Message]] = PrivateAttr(default_factory=lambda: defaultdict(dict))
+    _send_to_index: Dict[str, Dict[int, Message]] = PrivateAttr(default_factory=lambda: defaultdict(dict))
+    _trigram_index: Dict[str, Dict[int, Message]] = PrivateAttr(default_factory=lambda: defaultdict(dict))
+
+    def model_post_init(self, __context):
+        self._rebuild_index()
+
+    def _rebuild_index(self):
+        self._dedupe_index = {}
+        self._role_index = defaultdict(dict)
+        self._sent_from_index = defaultdict(dict)
+        self._send_to_index = defaultdict(dict)
+        self._trigram_index = defaultdict(dict)
+        for message in self.storage:
+            self._index_message(message)
+
+    def _index_message(self, message: Message):
+        self._dedupe_index.setdefault(_dedupe_key(message), []).append(message)
+        oid = id(message)
+        self._role_index[message.role][oid] = message
+        self._sent_from_index[message.sent_from][oid] = message
+        for addr in message.send_to:
+            self._send_to_index[addr][oid] = message
+        if self.keyword_index:
+            for gram in _trigrams(message.content):
+                self._trigram_index[gram][oid] = message
+
+    def _unindex_message(self, message: Message):
+        key = _dedupe_key(message)
+        bucket = self._dedupe_index.get(key, [])
+        bucket[:] = [m for m in bucket if m is not message]
+        if not bucket:
+            self._dedupe_index.pop(key, None)
+        oid = id(message)
+        self._role_index[message.role].pop(oid, None)
+        self._sent_from_index[message.sent_from].pop(oid, None)
+        for addr in message.send_to:
+            self._send_to_index[addr].pop(oid, None)
+        if self.keyword_index:
+            for gram in _trigrams(message.content):
+                self._trigram_index[gram].pop(oid, None)
+
+    def _find_stored(self, message: Message) -> Optional[Message]:
+        """Return the stored message equal to `message`, if any."""
+        for stored in self._dedupe_index.get(_dedupe_key(message), []):
+            if stored == message:
+                return stored
+        return None
+
+    @staticmethod
+    def _remove_by_identity(messages: list[Message], message: Message):
+        # Most deletions target recent messages, so search from the end.
+        for i in range(len(messages) - 1, -1, -1):
+            if messages[i] is message:
+                del messages[i]
+                return
+
+    def add(self, message: Message):
+        """Add a new message to storage, while updating the indexes"""
+        if self.ignore_id:
+            message.id = IGNORED_MESSAGE_ID
+        if self._find_stored(message) is not None:
+            return
+        self.storage.append(message)
+        if message.cause_by:
+            self.index[message.cause_by].append(message)
+        self._index_message(message)
+
+    def add_batch(self, messages: Iterable[Message]):
+        for message in messages:
+            self.add(message)
+
+    def get_by_role(self, role: str) -> list[Message]:
+        """Return all messages of a specified role"""
+        return list(self._role_index.get(role, {}).values())
+
+    def get_by_sent_from(self, sent_from: str) -> list[Message]:
+        """Return all messages sent from a specified address"""
+        return list(self._sent_from_index.get(sent_from, {}).values())
+
+    def get_by_send_to(self, send_to: str) -> list[Message]:
+        """Return all messages addressed to a specified address"""
+        return list(self._send_to_index.get(send_to, {}).values())
+
+    def get_by_content(self, content: str) -> list[Message]:
+        """Return all messages containing a specified content"""
+        if not self.keyword_index or len(content) < TRIGRAM_SIZE:
+            return super().get_by_content(content)
+        postings = sorted((self._trigram_index.get(gram, {}) for gram in _trigrams(content)), key=len)
+        if not postings[0]:
+            return []
+        smallest, others = postings[0], postings[1:]
+        return [
+            message
+            for oid, message in smallest.items()
+            if all(oid in posting for posting in others) and content in message.content
+        ]
+
+    def try_remember(self, keyword: str) -> list[Message]:
+        """Try to recall all messages containing a specified keyword"""
+        return self.get_by_content(keyword)
+
+    def delete_newest(self) -> "Message":
+        """delete the newest message from the storage"""
+        newest_msg = super().delete_newest()
+        if newest_msg is not None:
+            self._unindex_message(newest_msg)
+        return newest_msg
+
+    def delete(self, message: Message):
+        """Delete the specified message from storage, while updating the indexes"""
+        if self.ignore_id:
+            message.id = IGNORED_MESSAGE_ID
+        stored = self._find_stored(message)
+        if stored is None:
+            raise ValueError(f"{message} not in memory")
+        self._remove_by_identity(self.storage, stored)
+        if stored.cause_by:
+            self._remove_by_identity(self.index[stored.cause_by], stored)
+        self._unindex_message(stored)
+
+    def clear(self):
+        """Clear storage and indexes"""
+        super().clear()
+        self._rebuild_index()
+
+    def find_news(self, observed: list[Message], k=0) -> list[Message]:
+        """find news (previously unseen messages) from the most recent k memories, from all memories when k=0"""
+        if not k:
+            return [i for i in observed if self._find_stored(i) is None]
+        recent: Dict[tuple, list[Message]] = defaultdict(list)
+        for message in self.get(k):
+            recent[_dedupe_key(message)].append(message)
+        return [i for i in observed if i not in recent.get(_dedupe_key(i), [])]
@@ -58,12 +58,9 @@ class LongTermMemory(Memory):
             # memory_storage hasn't initialized, use default `find_news` to get stm_news
             return stm_news
 
-        ltm_news: list[Message] = []
-        for mem in stm_news:
-            # filter out messages similar to those seen previously in ltm, only keep fresh news
-            mem_searched = await self.memory_storage.search_similar(mem)
-            if len(mem_searched) == 0:
-                ltm_news.append(mem)
+        # filter out messages similar to those seen previously in ltm, only keep fresh news
+        mems_searched = await self.memory_storage.search_similar_many(stm_news)
+        ltm_news: list[Message] = [mem for mem, searched in zip(stm_news, mems_searched) if len(searched) == 0]
         return ltm_news[-k:]
 
     def persist(self):
@@ -71,7 +68,8 @@ class LongTermMemory(Memory):
 
     def delete(self, message: Message):
         super().delete(message)
-        # TODO delete message in memory_storage
+        if self.memory_storage.is_initialized:
+            self.memory_storage.delete(message)
 
     def clear(self):
         super().clear()
@@ -3,7 +3,10 @@
 """
 @Desc   : the implement of memory storage
 """
+import asyncio
+import json
 import shutil
+import time
 from pathlib import Path
 
 from llama_index.core.embeddings import BaseEmbedding
@@ -11,6 +14,7 @@ from llama_index.core.embeddings import BaseEmbedding
 from metagpt.const import DATA_PATH, MEM_TTL
 from metagpt.logs import logger
 from metagpt.rag.engines.simple import SimpleEngine
+from metagpt.rag.retrievers.faiss_retriever import FAISSRetriever
 from metagpt.rag.schema import FAISSIndexConfig, FAISSRetrieverConfig
 from metagpt.schema import Message
 from metagpt.utils.embedding import get_embedding
@@ -21,7 +25,15 @@ class MemoryStorage(object):
     The memory storage with Faiss as ANN search engine
     """
 
-    def __init__(self, mem_ttl: int = MEM_TTL, embedding: BaseEmbedding = None):
+    DELETED_IDS_FILENAME = "deleted_ids.json"
+
+    def __init__(
+        self,
+        mem_ttl: int = MEM_TTL,
+        embedding: BaseEmbedding = None,
+        flush_threshold: int = 16,
+        flush_interval: float = 5.0,
+    ):
         self.role_id: str = None
         self.role_mem_path: str = None
         self.mem_ttl: int = mem_ttl  # later use
@@ -31,6 +43,14 @@ class MemoryStorage(object):
 
         self.faiss_engine = None
 
+        # messages are embedded and inserted in batches, see `flush`
+        self.flush_threshold: int = flush_threshold
+        self.flush_interval: float = flush_interval  # seconds
+        self._pending: list[Message] = []
+        self._last_flush: float = time.monotonic()
+        # FAISS indexes do not support removal, deleted messages are filtered out of search results instead
+        self._deleted_ids: set[str] = set()
+
     @property
     def is_initialized(self) -> bool:
         return self._initialized
@@ -51,27 +71,71 @@ class MemoryStorage(object):
             self.faiss_engine = SimpleEngine.from_objs(
                 objs=[], retriever_configs=[FAISSRetrieverConfig()], embed_model=self.embedding
             )
+        deleted_ids_file = self.role_mem_path.joinpath(self.DELETED_IDS_FILENAME)
+        if deleted_ids_file.exists():
+            self._deleted_ids = set(json.loads(deleted_ids_file.read_text()))
         self._initialized = True
 
     def add(self, message: Message) -> bool:
-        """add message into memory storage"""
-        self.faiss_engine.add_objs([message])
-        logger.info(f"Role {self.role_id}'s memory_storage add a message")
+        """add message into memory storage, it is embedded with the next batch"""
+        self._deleted_ids.discard(message.id)
+        self._pending.append(message)
+        if len(self._pending) >= self.flush_threshold or time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
 
-    async def search_similar(self, message: Message, k=4) -> list[Message]:
-        """search for similar messages"""
+    def flush(self):
+        """embed and insert all pending messages in one batch"""
+        self._last_flush = time.monotonic()
+        if not self._pending:
+            return
+        messages, self._pending = self._pending, []
+        self.faiss_engine.add_objs(messages)
+        logger.info(f"Role {self.role_id}'s memory_storage add {len(messages)} messages")
+
+    def delete(self, message: Message):
+        """delete message from memory storage"""
+        self._pending = [i for i in self._pending if i.id != message.id]
+        self._deleted_ids.add(message.id)
+
+    def _filter(self, resp: list) -> list[Message]:
         # filter the result which score is smaller than the threshold
         filtered_resp = []
-        resp = await self.faiss_engine.aretrieve(message.content)
         for item in resp:
-            if item.score < self.threshold:
-                filtered_resp.append(item.metadata.get("obj"))
+            obj = item.metadata.get("obj")
+            if item.score < self.threshold and obj is not None and obj.id not in self._deleted_ids:
+                filtered_resp.append(obj)
         return filtered_resp
 
+    async def search_similar(self, message: Message, k=4) -> list[Message]:
+        """search for similar messages"""
+        self.flush()
+        resp = await self.faiss_engine.aretrieve(message.content)
+        return self._filter(resp)
+
+    async def search_similar_many(self, messages: list[Message], k=4) -> list[list[Message]]:
+        """search for similar messages of each message, embedding all queries in one call and searching them in one
+        vectorized FAISS search"""
+        if not messages:
+            return []
+        self.flush()
+        retriever = self.faiss_engine.retriever
+        if not isinstance(retriever, FAISSRetriever):
+            return list(await asyncio.gather(*[self.search_similar(i, k=k) for i in messages]))
+
+        embeddings = await self.embedding.aget_text_embedding_batch([i.content for i in messages])
+        results = retriever.retrieve_by_embeddings(embeddings, similarity_top_k=k)
+        for resp in results:
+            SimpleEngine._try_reconstruct_obj(resp)
+        return [self._filter(resp) for resp in results]
+
     def clean(self):
         shutil.rmtree(self.cache_dir, ignore_errors=True)
+        self._pending = []
+        self._deleted_ids = set()
         self._initialized = False
 
     def persist(self):
         if self.faiss_engine:
+            self.flush()
             self.faiss_engine.retriever._index.storage_context.persist(self.cache_dir)
+            self.cache_dir.joinpath(self.DELETED_IDS_FILENAME).write_text(json.dumps(sorted(self._deleted_ids)))
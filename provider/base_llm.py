@@ -8,6 +8,7 @@
 """
 from __future__ import annotations
 
+import asyncio
 import json
 from abc import ABC, abstractmethod
 from typing import Optional, Union
@@ -25,9 +26,12 @@ from tenacity import (
 from metagpt.configs.llm_config import LLMConfig
 from metagpt.const import LLM_API_TIMEOUT, USE_CONFIG_TIMEOUT
 from metagpt.logs import logger
+from metagpt.provider.rate_limiter import get_rate_limiter, is_rate_limit_error
 from metagpt.schema import Message
 from metagpt.utils.common import log_and_reraise
 from metagpt.utils.cost_manager import CostManager, Costs
+from metagpt.utils.response_cache import get_response_cache, make_cache_key
+from metagpt.utils.token_counter import TOKEN_COUNTER
 
 
 class BaseLLM(ABC):
@@ -134,6 +138,20 @@ class BaseLLM(ABC):
         timeout=USE_CONFIG_TIMEOUT,
         stream=None,
     ) -> str:
+        message = self._build_messages(msg, system_msgs=system_msgs, format_msgs=format_msgs, images=images)
+        if stream is None:
+            stream = self.config.stream
+        logger.debug(message)
+        rsp = await self._cached_completion_text(message, stream=stream, timeout=self.get_timeout(timeout))
+        return rsp
+
+    def _build_messages(
+        self,
+        msg: Union[str, list[dict[str, str]]],
+        system_msgs: Optional[list[str]] = None,
+        format_msgs: Optional[list[dict[str, str]]] = None,
+        images: Optional[Union[str, list[str]]] = None,
+    ) -> list[dict]:
         if system_msgs:
             message = self._system_msgs(system_msgs)
         else:
@@ -146,12 +164,80 @@ class BaseLLM(ABC):
             message.append(self._user_msg(msg, images=images))
         else:
             message.extend(msg)
-        if stream is None:
-            stream = self.config.stream
-        logger.debug(message)
-        rsp = await self.acompletion_text(message, stream=stream, timeout=self.get_timeout(timeout))
+        return message
+
+    async def aask_many(
+        self,
+        msgs: list[Union[str, list[dict[str, str]]]],
+        system_msgs: Optional[list[str]] = None,
+        timeout=USE_CONFIG_TIMEOUT,
+        max_retries: int = 5,
+    ) -> list[str]:
+        """Ask N independent prompts concurrently, under the provider's `LLMConfig.max_concurrency` and
+        `LLMConfig.tpm_limit`. Rate limit errors back off every pending request to the provider and are retried up to
+        `max_retries` times. Costs of each request are rolled into `cost_manager` as usual.
+
+        Returns:
+            list[str]: The responses, in the order of `msgs`.
+        """
+        limiter = get_rate_limiter(self.config)
+        model = self.pricing_plan or self.model or self.config.model or ""
+
+        async def _ask(msg) -> str:
+            message = self._build_messages(msg, system_msgs=system_msgs)
+            try:
+                tokens = TOKEN_COUNTER.count_messages(message, model)
+            except NotImplementedError:
+                tokens = TOKEN_COUNTER.count_messages(message, "open-llm-model")
+            for attempt in range(max_retries + 1):
+                await limiter.acquire_tokens(tokens)
+                async with limiter:
+                    try:
+                        rsp = await self._cached_completion_text(message, timeout=self.get_timeout(timeout))
+                        limiter.reset_backoff()
+                        return rsp
+                    except Exception as e:
+                        if not is_rate_limit_error(e) or attempt == max_retries:
+                            raise
+                        wait = limiter.backoff()
+                        logger.warning(f"Rate limited, retry {attempt + 1}/{max_retries} in {wait:.1f}s: {e}")
+
+        return list(await asyncio.gather(*[_ask(msg) for msg in msgs]))
+
+    async def _cached_completion_text(
+        self, messages: list[dict], stream: bool = False, timeout: int = USE_CONFIG_TIMEOUT
+    ) -> str:
+        """`acompletion_text` behind the response cache configured by `LLMConfig.cache_type`"""
+        cache = get_response_cache(self.config)
+        if not cache:
+            return await self.acompletion_text(messages, stream=stream, timeout=timeout)
+
+        key = make_cache_key(self.config, self.model or self.config.model, messages)
+        rsp = await cache.aget(key)
+        if self.cost_manager:
+            self.cost_manager.update_cache_stats(hit=rsp is not None)
+        if rsp is None:
+            rsp = await self.acompletion_text(messages, stream=stream, timeout=timeout)
+            await cache.aset(key, rsp)
+        else:
+            logger.debug(f"response cache hit: {key}")
         return rsp
 
+    async def ainvalidate_cache(
+        self,
+        msg: Union[str, list[dict[str, str]]],
+        system_msgs: Optional[list[str]] = None,
+        format_msgs: Optional[list[dict[str, str]]] = None,
+        images: Optional[Union[str, list[str]]] = None,
+    ):
+        """Drop the cached response of the `aask` call with the same arguments, so that asking again, e.g. on the retry
+        of an output that cannot be parsed, reaches the provider instead of replaying the same response."""
+        cache = get_response_cache(self.config)
+        if not cache:
+            return
+        message = self._build_messages(msg, system_msgs=system_msgs, format_msgs=format_msgs, images=images)
+        await cache.adelete(make_cache_key(self.config, self.model or self.config.model, message))
+
     def _extract_assistant_rsp(self, context):
         return "\n".join([i["content"] for i in context if i["role"] == "assistant"])
 
@@ -161,7 +247,7 @@ class BaseLLM(ABC):
         for msg in msgs:
             umsg = self._user_msg(msg)
             context.append(umsg)
-            rsp_text = await self.acompletion_text(context, timeout=self.get_timeout(timeout))
+            rsp_text = await self._cached_completion_text(context, timeout=self.get_timeout(timeout))
             context.append(self._assistant_msg(rsp_text))
         return self._extract_assistant_rsp(context)
 
@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+@File    : rate_limiter.py
+@Desc    : Per-provider request scheduling for `BaseLLM.aask_many`: a concurrency cap, a tokens-per-minute bucket and a
+    backoff shared by every request to the same provider after a rate limit (HTTP 429) error.
+"""
+import asyncio
+import random
+import time
+import weakref
+from typing import Optional
+
+import openai
+
+from metagpt.configs.llm_config import LLMConfig
+
+
+def is_rate_limit_error(e: BaseException) -> bool:
+    """Whether `e` is a rate limit (HTTP 429) error raised by a provider SDK."""
+    if isinstance(e, openai.RateLimitError):
+        return True
+    status_code = getattr(e, "status_code", None) or getattr(getattr(e, "response", None), "status_code", None)
+    return status_code == 429
+
+
+class LLMRateLimiter:
+    """Schedules requests to one provider under `LLMConfig.max_concurrency` and `LLMConfig.tpm_limit`."""
+
+    def __init__(self, max_concurrency: int = 8, tpm_limit: Optional[int] = None):
+        self.max_concurrency = max_concurrency
+        self.tpm_limit = tpm_limit
+        self._semaphore = asyncio.Semaphore(max(max_concurrency, 1))
+        self._tokens = float(tpm_limit or 0)
+        self._refilled_at = time.monotonic()
+        self._backoff_until = 0.0
+        self._backoff = 0.0
+        self._lock = asyncio.Lock()
+
+    async def __aenter__(self):
+        await self._semaphore.acquire()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self._semaphore.release()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.tpm_limit, self._tokens + (now - self._refilled_at) * self.tpm_limit / 60)
+        self._refilled_at = now
+
+    async def acquire_tokens(self, tokens: int):
+        """Wait for the shared backoff to end and for `tokens` to be available in the per-minute budget."""
+        async with self._lock:
+            delay = self._backoff_until - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if not self.tpm_limit:
+                return
+            tokens = min(tokens, self.tpm_limit)  # a request larger than the budget waits for a full bucket
+            self._refill()
+            if self._tokens < tokens:
+                await asyncio.sleep((tokens - self._tokens) * 60 / self.tpm_limit)
+                self._refill()
+            self._tokens -= tokens
+
+    def backoff(self, min_wait: float = 1.0, max_wait: float = 60.0) -> float:
+        """Push back every pending request to this provider after a rate limit error. Returns the wait in seconds."""
+        self._backoff = min(max_wait, max(min_wait, self._backoff * 2))
+        wait = self._backoff * (0.5 + random.random() / 2)
+        self._backoff_until = max(self._backoff_until, time.monotonic() + wait)
+        return wait
+
+    def reset_backoff(self):
+        self._backoff = 0.0
+
+
+# event loop -> provider key -> limiter, asyncio primitives cannot be shared across event loops
+_limiters: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+
+def get_rate_limiter(config: LLMConfig) -> LLMRateLimiter:
+    """Return the rate limiter shared by every LLM talking to the same provider endpoint and model."""
+    limiters = _limiters.setdefault(asyncio.get_running_loop(), {})
+    key = (config.api_type, config.base_url, config.model, config.max_concurrency, config.tpm_limit)
+    limiter = limiters.get(key)
+    if limiter is None:
+        limiter = limiters[key] = LLMRateLimiter(max_concurrency=config.max_concurrency, tpm_limit=config.tpm_limit)
+    return limiter
@@ -172,6 +172,12 @@ class SimpleEngine(RetrieverQueryEngine):
     ) -> "SimpleEngine":
         """Load from previously maintained index by self.persist(), index_config contains persis_path."""
         index = get_index(index_config, embed_model=cls._resolve_embed_model(embed_model, [index_config]))
+        retriever_configs = [
+            config.model_copy(update={"persist_path": index_config.persist_path})
+            if isinstance(config, BM25RetrieverConfig) and not config.persist_path
+            else config
+            for config in retriever_configs or []
+        ]
         return cls._from_index(index, llm=llm, retriever_configs=retriever_configs, ranker_configs=ranker_configs)
 
     async def asearch(self, content: str, **kwargs) -> str:
@@ -5,13 +5,17 @@ from llama_index.core.postprocessor import LLMRerank
 from llama_index.core.postprocessor.types import BaseNodePostprocessor
 
 from metagpt.rag.factories.base import ConfigBasedFactory
-from metagpt.rag.rankers.object_ranker import ObjectSortPostprocessor
+from metagpt.rag.rankers.object_ranker import (
+    ObjectFieldsSortPostprocessor,
+    ObjectSortPostprocessor,
+)
 from metagpt.rag.schema import (
     BaseRankerConfig,
     BGERerankConfig,
     CohereRerankConfig,
     ColbertRerankConfig,
     LLMRankerConfig,
+    ObjectFieldsRankerConfig,
     ObjectRankerConfig,
 )
 
@@ -24,6 +28,7 @@ class RankerFactory(ConfigBasedFactory):
             LLMRankerConfig: self._create_llm_ranker,
             ColbertRerankConfig: self._create_colbert_ranker,
             ObjectRankerConfig: self._create_object_ranker,
+            ObjectFieldsRankerConfig: self._create_object_fields_ranker,
             CohereRerankConfig: self._create_cohere_rerank,
             BGERerankConfig: self._create_bge_rerank,
         }
@@ -72,6 +77,9 @@ class RankerFactory(ConfigBasedFactory):
     def _create_object_ranker(self, config: ObjectRankerConfig, **kwargs) -> LLMRerank:
         return ObjectSortPostprocessor(**config.model_dump())
 
+    def _create_object_fields_ranker(self, config: ObjectFieldsRankerConfig, **kwargs) -> LLMRerank:
+        return ObjectFieldsSortPostprocessor(**config.model_dump())
+
     def _extract_llm(self, config: BaseRankerConfig = None, **kwargs) -> LLM:
         return self._val_from_config_or_kwargs("llm", config, **kwargs)
 
@@ -29,6 +29,7 @@ from metagpt.rag.schema import (
     ElasticsearchKeywordRetrieverConfig,
     ElasticsearchRetrieverConfig,
     FAISSRetrieverConfig,
+    HybridRetrieverConfig,
     MilvusRetrieverConfig,
 )
 
@@ -66,14 +67,23 @@ class RetrieverFactory(ConfigBasedFactory):
     def get_retriever(self, configs: list[BaseRetrieverConfig] = None, **kwargs) -> RAGRetriever:
         """Creates and returns a retriever instance based on the provided configurations.
 
-        If multiple retrievers, using SimpleHybridRetriever.
+        If multiple retrievers, using SimpleHybridRetriever, configured by the HybridRetrieverConfig in configs if any.
         """
+        hybrid_configs = [config for config in configs or [] if isinstance(config, HybridRetrieverConfig)]
+        configs = [config for config in configs or [] if not isinstance(config, HybridRetrieverConfig)]
         if not configs:
             return self._create_default(**kwargs)
 
         retrievers = super().get_instances(configs, **kwargs)
-
-        return SimpleHybridRetriever(*retrievers) if len(retrievers) > 1 else retrievers[0]
+        if len(retrievers) == 1:
+            return retrievers[0]
+
+        return SimpleHybridRetriever(
+            *retrievers,
+            weights=[config.weight for config in configs],
+            timeouts=[config.timeout for config in configs],
+            **(hybrid_configs[0].model_dump() if hybrid_configs else {}),
+        )
 
     def _create_default(self, **kwargs) -> RAGRetriever:
         index = self._extract_index(None, **kwargs) or self._build_default_index(**kwargs)
@@ -2,13 +2,13 @@
 
 import heapq
 import json
-from typing import Literal, Optional
+from typing import Any, Literal, Optional
 
 from llama_index.core.postprocessor.types import BaseNodePostprocessor
 from llama_index.core.schema import NodeWithScore, QueryBundle
 from pydantic import Field
 
-from metagpt.rag.schema import ObjectNode
+from metagpt.rag.schema import OBJ_FIELD_PREFIX, ObjectNode
 
 
 class ObjectSortPostprocessor(BaseNodePostprocessor):
@@ -39,10 +39,15 @@ class ObjectSortPostprocessor(BaseNodePostprocessor):
 
         self._check_metadata(nodes[0].node)
 
-        sort_key = lambda node: json.loads(node.node.metadata["obj_json"])[self.field_name]
-        return self._get_sort_func()(self.top_n, nodes, key=sort_key)
+        # Read each node's field once, instead of parsing obj_json in every comparison
+        keys = [ObjectNode.get_obj_fields(node.node, [self.field_name])[self.field_name] for node in nodes]
+        top = self._get_sort_func()(self.top_n, range(len(nodes)), key=keys.__getitem__)
+        return [nodes[i] for i in top]
 
     def _check_metadata(self, node: ObjectNode):
+        if f"{OBJ_FIELD_PREFIX}{self.field_name}" in node.metadata:
+            return
+
         try:
             obj_dict = json.loads(node.metadata.get("obj_json"))
         except Exception as e:
@@ -53,3 +58,49 @@ class ObjectSortPostprocessor(BaseNodePostprocessor):
 
     def _get_sort_func(self):
         return heapq.nlargest if self.order == "desc" else heapq.nsmallest
+
+
+class ObjectFieldsSortPostprocessor(BaseNodePostprocessor):
+    """Filter objects by their fields, then sort them by several fields, each one desc or asc.
+
+    Fields are read from the typed metadata of ObjectNode, obj_json is parsed at most once per node for the fields
+    missing from the metadata. Objects missing a sort field are ranked last for that field.
+    """
+
+    sort_by: list[tuple[str, Literal["desc", "asc"]]] = Field(
+        ..., description="(field name, order) pairs of the object, the first pair is the primary sort key."
+    )
+    filters: dict[str, Any] = Field(
+        default_factory=dict,
+        description="Keep objects whose field equals the value, or is in the value if it is a list, before sorting.",
+    )
+    top_n: int = 5
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "ObjectFieldsSortPostprocessor"
+
+    def _postprocess_nodes(
+        self,
+        nodes: list[NodeWithScore],
+        query_bundle: Optional[QueryBundle] = None,
+    ) -> list[NodeWithScore]:
+        """Postprocess nodes."""
+        field_names = list(dict.fromkeys([name for name, _ in self.sort_by] + list(self.filters)))
+        rows = [(node, ObjectNode.get_obj_fields(node.node, field_names)) for node in nodes]
+        rows = [(node, fields) for node, fields in rows if self._match(fields)]
+
+        # Stable sorts from the least to the most significant field
+        for name, order in reversed(self.sort_by):
+            if order == "desc":
+                rows.sort(key=lambda row: (row[1][name] is not None, row[1][name]), reverse=True)
+            else:
+                rows.sort(key=lambda row: (row[1][name] is None, row[1][name]))
+        return [node for node, _ in rows[: self.top_n]]
+
+    def _match(self, fields: dict[str, Any]) -> bool:
+        for name, expected in self.filters.items():
+            value = fields[name]
+            if value not in expected if isinstance(expected, list) else value != expected:
+                return False
+        return True
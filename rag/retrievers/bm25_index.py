@@ -0,0 +1,178 @@
+"""Incremental BM25 index."""
+import json
+from collections import Counter
+from pathlib import Path
+from typing import Iterable, Optional, Union
+
+import numpy as np
+
+BM25_INDEX_FILENAME = "bm25_index.json"
+
+
+class BM25Index:
+    """Okapi BM25 index that can be updated document by document.
+
+    Keeps postings lists (term -> {slot: term frequency}), document lengths and document frequencies, so inserting or
+    deleting a document costs O(its tokens) instead of rebuilding the whole corpus. Scores are the same as
+    `rank_bm25.BM25Okapi` over the live documents, computed vectorized over the postings of the query terms.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75, epsilon: float = 0.25):
+        self.k1 = k1
+        self.b = b
+        self.epsilon = epsilon
+        self._doc_ids: list[Optional[str]] = []  # slot -> doc id, None once deleted
+        self._doc_terms: list[tuple[str, ...]] = []  # slot -> distinct terms, to unlink postings on delete
+        self._doc_len = np.zeros(0, dtype=np.float64)
+        self._alive = np.zeros(0, dtype=bool)
+        self._slots: dict[str, int] = {}  # doc id -> slot
+        self._postings: dict[str, dict[int, int]] = {}
+        self._total_len = 0
+        self._avg_idf: Optional[float] = None
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self._slots
+
+    @property
+    def doc_ids(self) -> list[str]:
+        return list(self._slots)
+
+    def add(self, doc_id: str, tokens: list[str]):
+        """Add a document, replacing the document with the same id if any."""
+        if doc_id in self._slots:
+            self.delete(doc_id)
+        slot = len(self._doc_ids)
+        if slot >= len(self._doc_len):
+            grow = max(slot, 16)
+            self._doc_len = np.concatenate([self._doc_len, np.zeros(grow, dtype=np.float64)])
+            self._alive = np.concatenate([self._alive, np.zeros(grow, dtype=bool)])
+        tfs = Counter(tokens)
+        for term, tf in tfs.items():
+            self._postings.setdefault(term, {})[slot] = tf
+        self._doc_ids.append(doc_id)
+        self._doc_terms.append(tuple(tfs))
+        self._doc_len[slot] = len(tokens)
+        self._alive[slot] = True
+        self._slots[doc_id] = slot
+        self._total_len += len(tokens)
+        self._avg_idf = None
+
+    def add_many(self, docs: Iterable[tuple[str, list[str]]]):
+        for doc_id, tokens in docs:
+            self.add(doc_id, tokens)
+
+    def delete(self, doc_id: str) -> bool:
+        """Delete a document, return False if it is not indexed."""
+        slot = self._slots.pop(doc_id, None)
+        if slot is None:
+            return False
+        for term in self._doc_terms[slot]:
+            postings = self._postings[term]
+            del postings[slot]
+            if not postings:
+                del self._postings[term]
+        self._total_len -= int(self._doc_len[slot])
+        self._doc_ids[slot] = None
+        self._doc_terms[slot] = ()
+        self._doc_len[slot] = 0
+        self._alive[slot] = False
+        self._avg_idf = None
+
+        deleted = len(self._doc_ids) - len(self._slots)
+        if deleted > 64 and deleted > len(self._slots):
+            self._compact()
+        return True
+
+    def _compact(self):
+        """Renumber the live documents into dense slots."""
+        remap = {}
+        doc_ids, doc_terms = [], []
+        for slot, doc_id in enumerate(self._doc_ids):
+            if doc_id is not None:
+                remap[slot] = len(doc_ids)
+                doc_ids.append(doc_id)
+                doc_terms.append(self._doc_terms[slot])
+        live = np.fromiter(remap, dtype=np.int64, count=len(remap))
+        self._doc_len = self._doc_len[live].copy()
+        self._alive = np.ones(len(live), dtype=bool)
+        self._doc_ids, self._doc_terms = doc_ids, doc_terms
+        self._slots = {doc_id: slot for slot, doc_id in enumerate(doc_ids)}
+        self._postings = {
+            term: {remap[slot]: tf for slot, tf in postings.items()} for term, postings in self._postings.items()
+        }
+
+    def _idf(self, df: int) -> float:
+        n = len(self._slots)
+        if self._avg_idf is None:
+            dfs = np.fromiter((len(p) for p in self._postings.values()), dtype=np.float64, count=len(self._postings))
+            self._avg_idf = float(np.mean(np.log(n - dfs + 0.5) - np.log(dfs + 0.5))) if len(dfs) else 0.0
+        idf = float(np.log(n - df + 0.5) - np.log(df + 0.5))
+        return idf if idf >= 0 else self.epsilon * self._avg_idf
+
+    def get_scores(self, query_tokens: list[str]) -> np.ndarray:
+        """Return the BM25 score of every slot, deleted slots score -inf."""
+        n_slots = len(self._doc_ids)
+        scores = np.zeros(n_slots, dtype=np.float64)
+        if not self._slots:
+            return scores
+        doc_len = self._doc_len[:n_slots]
+        norm = self.k1 * (1 - self.b + self.b * doc_len / (self._total_len / len(self._slots)))
+        for term, count in Counter(query_tokens).items():
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            slots = np.fromiter(postings.keys(), dtype=np.int64, count=len(postings))
+            tfs = np.fromiter(postings.values(), dtype=np.float64, count=len(postings))
+            scores[slots] += count * self._idf(len(postings)) * tfs * (self.k1 + 1) / (tfs + norm[slots])
+        scores[~self._alive[:n_slots]] = -np.inf
+        return scores
+
+    def top_k(self, query_tokens: list[str], k: int) -> list[tuple[str, float]]:
+        """Return the k best (doc id, score) pairs, best first."""
+        k = min(k, len(self._slots))
+        if k <= 0:
+            return []
+        scores = self.get_scores(query_tokens)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(self._doc_ids[slot], float(scores[slot])) for slot in top]
+
+    def to_dict(self) -> dict:
+        if len(self._doc_ids) != len(self._slots):
+            self._compact()
+        return {
+            "k1": self.k1,
+            "b": self.b,
+            "epsilon": self.epsilon,
+            "doc_ids": self._doc_ids,
+            "doc_len": self._doc_len[: len(self._doc_ids)].astype(int).tolist(),
+            "postings": {term: [list(p.keys()), list(p.values())] for term, p in self._postings.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "BM25Index":
+        index = cls(k1=data["k1"], b=data["b"], epsilon=data["epsilon"])
+        index._doc_ids = list(data["doc_ids"])
+        index._slots = {doc_id: slot for slot, doc_id in enumerate(index._doc_ids)}
+        index._doc_len = np.array(data["doc_len"], dtype=np.float64)
+        index._alive = np.ones(len(index._doc_ids), dtype=bool)
+        index._total_len = int(index._doc_len.sum())
+        doc_terms = [[] for _ in index._doc_ids]
+        for term, (slots, tfs) in data["postings"].items():
+            index._postings[term] = dict(zip(slots, tfs))
+            for slot in slots:
+                doc_terms[slot].append(term)
+        index._doc_terms = [tuple(terms) for terms in doc_terms]
+        return index
+
+    def save(self, path: Union[str, Path]):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.to_dict(), ensure_ascii=False), encoding="utf-8")
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "BM25Index":
+        return cls.from_dict(json.loads(Path(path).read_text(encoding="utf-8")))
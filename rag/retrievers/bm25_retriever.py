@@ -1,16 +1,25 @@
 """BM25 retriever."""
-from typing import Callable, Optional
+from pathlib import Path
+from typing import Callable, Optional, Union
 
 from llama_index.core import VectorStoreIndex
+from llama_index.core.base.base_retriever import BaseRetriever
 from llama_index.core.callbacks.base import CallbackManager
 from llama_index.core.constants import DEFAULT_SIMILARITY_TOP_K
-from llama_index.core.schema import BaseNode, IndexNode
+from llama_index.core.schema import BaseNode, IndexNode, NodeWithScore, QueryBundle
 from llama_index.retrievers.bm25 import BM25Retriever
-from rank_bm25 import BM25Okapi
+from llama_index.retrievers.bm25.base import tokenize_remove_stopwords
+
+from metagpt.logs import logger
+from metagpt.rag.retrievers.bm25_index import BM25_INDEX_FILENAME, BM25Index
 
 
 class DynamicBM25Retriever(BM25Retriever):
-    """BM25 retriever."""
+    """BM25 retriever.
+
+    Backed by an incremental `BM25Index`, so `add_nodes` and `delete_nodes` only tokenize the nodes they touch. The
+    index is persisted next to the vector index, and reloaded from `persist_path` without re-tokenizing the corpus.
+    """
 
     def __init__(
         self,
@@ -22,28 +31,69 @@ class DynamicBM25Retriever(BM25Retriever):
         object_map: Optional[dict] = None,
         verbose: bool = False,
         index: VectorStoreIndex = None,
+        persist_path: Optional[Union[str, Path]] = None,
     ) -> None:
-        super().__init__(
-            nodes=nodes,
-            tokenizer=tokenizer,
-            similarity_top_k=similarity_top_k,
+        # Skip BM25Retriever.__init__, it tokenizes the whole corpus into a static BM25Okapi.
+        BaseRetriever.__init__(
+            self,
             callback_manager=callback_manager,
             object_map=object_map,
             objects=objects,
             verbose=verbose,
         )
+        self._tokenizer = tokenizer or tokenize_remove_stopwords
+        self._similarity_top_k = similarity_top_k
         self._index = index
+        self._node_map: dict[str, BaseNode] = {node.node_id: node for node in nodes}
+        self.bm25 = self._load_bm25(persist_path)
+
+    @property
+    def _nodes(self) -> list[BaseNode]:
+        return list(self._node_map.values())
+
+    def _load_bm25(self, persist_path: Optional[Union[str, Path]]) -> BM25Index:
+        """Load the persisted index if any, then only tokenize the nodes it is missing."""
+        bm25 = BM25Index()
+        filename = Path(persist_path) / BM25_INDEX_FILENAME if persist_path else None
+        if filename and filename.exists():
+            bm25 = BM25Index.load(filename)
+            for doc_id in bm25.doc_ids:
+                if doc_id not in self._node_map:
+                    bm25.delete(doc_id)
+        missing = [node for node_id, node in self._node_map.items() if node_id not in bm25]
+        if filename and missing:
+            logger.info(f"BM25 index {filename} is missing {len(missing)} nodes, tokenizing them")
+        bm25.add_many((node.node_id, self._tokenizer(node.get_content())) for node in missing)
+        return bm25
+
+    def _retrieve(self, query_bundle: QueryBundle) -> list[NodeWithScore]:
+        if query_bundle.custom_embedding_strs or query_bundle.embedding:
+            logger.warning("BM25Retriever does not support embeddings, skipping...")
+
+        # raw BM25 scores, unbounded, the higher the more relevant
+        hits = self.bm25.top_k(self._tokenizer(query_bundle.query_str), self._similarity_top_k)
+        return [NodeWithScore(node=self._node_map[node_id], score=score) for node_id, score in hits]
 
     def add_nodes(self, nodes: list[BaseNode], **kwargs) -> None:
         """Support add nodes."""
-        self._nodes.extend(nodes)
-        self._corpus = [self._tokenizer(node.get_content()) for node in self._nodes]
-        self.bm25 = BM25Okapi(self._corpus)
+        for node in nodes:
+            self._node_map[node.node_id] = node
+            self.bm25.add(node.node_id, self._tokenizer(node.get_content()))
 
         if self._index:
             self._index.insert_nodes(nodes, **kwargs)
 
+    def delete_nodes(self, node_ids: list[str], **kwargs) -> None:
+        """Support delete nodes."""
+        for node_id in node_ids:
+            self._node_map.pop(node_id, None)
+            self.bm25.delete(node_id)
+
+        if self._index:
+            self._index.delete_nodes(node_ids, **kwargs)
+
     def persist(self, persist_dir: str, **kwargs) -> None:
         """Support persist."""
         if self._index:
             self._index.storage_context.persist(persist_dir)
+        self.bm25.save(Path(persist_dir) / BM25_INDEX_FILENAME)
@@ -1,7 +1,8 @@
 """FAISS retriever."""
 
+import numpy as np
 from llama_index.core.retrievers import VectorIndexRetriever
-from llama_index.core.schema import BaseNode
+from llama_index.core.schema import BaseNode, NodeWithScore
 
 
 class FAISSRetriever(VectorIndexRetriever):
@@ -14,3 +15,27 @@ class FAISSRetriever(VectorIndexRetriever):
     def persist(self, persist_dir: str, **kwargs) -> None:
         """Support persist."""
         self._index.storage_context.persist(persist_dir)
+
+    def retrieve_by_embeddings(
+        self, query_embeddings: list[list[float]], similarity_top_k: int = None
+    ) -> list[list[NodeWithScore]]:
+        """Search many query embeddings with a single vectorized FAISS search, one result list per query."""
+        faiss_index = self._index.vector_store.client
+        if not query_embeddings or faiss_index.ntotal == 0:
+            return [[] for _ in query_embeddings]
+
+        top_k = min(similarity_top_k or self._similarity_top_k, faiss_index.ntotal)
+        dists, indices = faiss_index.search(np.array(query_embeddings, dtype="float32"), top_k)
+
+        nodes_dict = self._index.index_struct.nodes_dict
+        node_ids = {nodes_dict[str(i)] for i in indices.flatten() if i >= 0 and str(i) in nodes_dict}
+        nodes = {node.node_id: node for node in self._index.docstore.get_nodes(list(node_ids))}
+        results = []
+        for row_dists, row_indices in zip(dists, indices):
+            row = []
+            for dist, i in zip(row_dists, row_indices):
+                node = nodes.get(nodes_dict.get(str(i))) if i >= 0 else None
+                if node is not None:
+                    row.append(NodeWithScore(node=node, score=float(dist)))
+            results.append(row)
+        return results
@@ -1,42 +1,107 @@
 """Hybrid retriever."""
 
+import asyncio
 import copy
+from typing import Literal, Optional
 
-from llama_index.core.schema import BaseNode, QueryType
+from llama_index.core.schema import BaseNode, NodeWithScore, QueryType
 
+from metagpt.logs import logger
 from metagpt.rag.retrievers.base import RAGRetriever
 
 
 class SimpleHybridRetriever(RAGRetriever):
-    """A composite retriever that aggregates search results from multiple retrievers."""
+    """A composite retriever that aggregates search results from multiple retrievers.
 
-    def __init__(self, *retrievers):
+    All retrievers are queried concurrently, each one bounded by its own timeout. With `fusion`, results are merged
+    by reciprocal rank fusion ("rrf") or by the weighted sum of rank normalized scores ("weighted"), and cut to a global
+    `similarity_top_k`. Both only use the order of each result list, as raw scores are not comparable across
+    retrievers and some are distances, e.g. FAISS L2, where lower is better.
+    """
+
+    def __init__(
+        self,
+        *retrievers,
+        fusion: Optional[Literal["rrf", "weighted"]] = None,
+        similarity_top_k: Optional[int] = None,
+        rrf_k: int = 60,
+        weights: Optional[list[float]] = None,
+        timeouts: Optional[list[Optional[float]]] = None,
+    ):
         self.retrievers: list[RAGRetriever] = retrievers
+        self.fusion = fusion
+        self.similarity_top_k = similarity_top_k
+        self.rrf_k = rrf_k
+        self.weights = weights or [1.0] * len(retrievers)
+        self.timeouts = timeouts or [None] * len(retrievers)
         super().__init__()
 
     async def _aretrieve(self, query: QueryType, **kwargs):
         """Asynchronously retrieves and aggregates search results from all configured retrievers.
 
-        This method queries each retriever in the `retrievers` list with the given query and
-        additional keyword arguments. It then combines the results, ensuring that each node is
-        unique, based on the node's ID.
+        This method queries each retriever in the `retrievers` list concurrently with the given query and
+        additional keyword arguments. It then combines the results, ensuring that each node is unique, based on
+        the node's ID.
         """
-        all_nodes = []
-        for retriever in self.retrievers:
-            # Prevent retriever changing query
-            query_copy = copy.deepcopy(query)
-            nodes = await retriever.aretrieve(query_copy, **kwargs)
-            all_nodes.extend(nodes)
-
-        # combine all nodes
+        results = await asyncio.gather(
+            *[
+                self._aretrieve_one(retriever, query, timeout, **kwargs)
+                for retriever, timeout in zip(self.retrievers, self.timeouts)
+            ]
+        )
+
+        if self.fusion == "rrf":
+            result = self._rrf_fuse(results)
+        elif self.fusion == "weighted":
+            result = self._weighted_fuse(results)
+        else:
+            result = self._dedupe(results)
+        return result[: self.similarity_top_k] if self.similarity_top_k else result
+
+    @staticmethod
+    async def _aretrieve_one(
+        retriever: RAGRetriever, query: QueryType, timeout: Optional[float], **kwargs
+    ) -> list[NodeWithScore]:
+        # Prevent retriever changing query, e.g. setting the embedding of a QueryBundle
+        query_copy = query if isinstance(query, str) else copy.copy(query)
+        try:
+            return await asyncio.wait_for(retriever.aretrieve(query_copy, **kwargs), timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"{type(retriever).__name__} timed out after {timeout}s, skipping its results")
+            return []
+
+    @staticmethod
+    def _dedupe(results: list[list[NodeWithScore]]) -> list[NodeWithScore]:
         result = []
         node_ids = set()
-        for n in all_nodes:
-            if n.node.node_id not in node_ids:
-                result.append(n)
-                node_ids.add(n.node.node_id)
+        for nodes in results:
+            for n in nodes:
+                if n.node.node_id not in node_ids:
+                    result.append(n)
+                    node_ids.add(n.node.node_id)
         return result
 
+    def _rrf_fuse(self, results: list[list[NodeWithScore]]) -> list[NodeWithScore]:
+        scores: dict[str, float] = {}
+        for nodes, weight in zip(results, self.weights):
+            for rank, n in enumerate(nodes):
+                scores[n.node.node_id] = scores.get(n.node.node_id, 0.0) + weight / (self.rrf_k + rank + 1)
+        return self._rank(results, scores)
+
+    def _weighted_fuse(self, results: list[list[NodeWithScore]]) -> list[NodeWithScore]:
+        scores: dict[str, float] = {}
+        for nodes, weight in zip(results, self.weights):
+            for rank, n in enumerate(nodes):
+                normalized = 1.0 - rank / len(nodes)  # the best hit of each list is 1.0
+                scores[n.node.node_id] = scores.get(n.node.node_id, 0.0) + weight * normalized
+        return self._rank(results, scores)
+
+    def _rank(self, results: list[list[NodeWithScore]], scores: dict[str, float]) -> list[NodeWithScore]:
+        """Sort the deduped nodes by fused score, ties keep their first appearance order."""
+        nodes = self._dedupe(results)
+        nodes = sorted(nodes, key=lambda n: scores.get(n.node.node_id, 0.0), reverse=True)
+        return [NodeWithScore(node=n.node, score=scores.get(n.node.node_id, 0.0)) for n in nodes]
+
     def add_nodes(self, nodes: list[BaseNode]) -> None:
         """Support add nodes."""
         for r in self.retrievers:
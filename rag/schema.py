@@ -1,4 +1,5 @@
 """RAG schemas."""
+import json
 from enum import Enum
 from pathlib import Path
 from typing import Any, ClassVar, List, Literal, Optional, Union
@@ -6,7 +7,7 @@ from typing import Any, ClassVar, List, Literal, Optional, Union
 from chromadb.api.types import CollectionMetadata
 from llama_index.core.embeddings import BaseEmbedding
 from llama_index.core.indices.base import BaseIndex
-from llama_index.core.schema import TextNode
+from llama_index.core.schema import BaseNode, TextNode
 from llama_index.core.vector_stores.types import VectorStoreQueryMode
 from pydantic import BaseModel, ConfigDict, Field, PrivateAttr, model_validator
 
@@ -24,6 +25,30 @@ class BaseRetrieverConfig(BaseModel):
 
     model_config = ConfigDict(arbitrary_types_allowed=True)
     similarity_top_k: int = Field(default=5, description="Number of top-k similar results to return during retrieval.")
+    weight: float = Field(
+        default=1.0, exclude=True, description="Weight of the retriever's results when fused by a hybrid retriever."
+    )
+    timeout: Optional[float] = Field(
+        default=None, exclude=True, description="Seconds a hybrid retriever waits for the retriever, None is unlimited."
+    )
+
+
+class HybridRetrieverConfig(BaseRetrieverConfig):
+    """Config for combining the results of several retrievers.
+
+    Put it along with the retriever configs, it only takes effect when there are several retrievers.
+    """
+
+    similarity_top_k: Optional[int] = Field(
+        default=None, description="Number of fused results to return, None returns all of them."
+    )
+    fusion: Optional[Literal["rrf", "weighted"]] = Field(
+        default="rrf",
+        description="Reciprocal rank fusion, weighted sum of normalized scores, or None to dedupe in retriever order.",
+    )
+    rrf_k: int = Field(default=60, description="Rank offset of reciprocal rank fusion.")
+
+    _no_embedding: bool = PrivateAttr(default=True)
 
 
 class IndexRetrieverConfig(BaseRetrieverConfig):
@@ -59,6 +84,10 @@ class FAISSRetrieverConfig(IndexRetrieverConfig):
 class BM25RetrieverConfig(IndexRetrieverConfig):
     """Config for BM25-based retrievers."""
 
+    persist_path: Optional[Union[str, Path]] = Field(
+        default=None, description="The directory of the persisted BM25 index, reloaded without re-tokenizing."
+    )
+
     _no_embedding: bool = PrivateAttr(default=True)
 
 
@@ -171,6 +200,16 @@ class ObjectRankerConfig(BaseRankerConfig):
     order: Literal["desc", "asc"] = Field(default="desc", description="the direction of order.")
 
 
+class ObjectFieldsRankerConfig(BaseRankerConfig):
+    sort_by: list[tuple[str, Literal["desc", "asc"]]] = Field(
+        ..., description="(field name, order) pairs of the object, the first pair is the primary sort key."
+    )
+    filters: dict[str, Any] = Field(
+        default_factory=dict,
+        description="Keep objects whose field equals the value, or is in the value if it is a list, before sorting.",
+    )
+
+
 class BaseIndexConfig(BaseModel):
     """Common config for index.
 
@@ -230,6 +269,12 @@ class ElasticsearchKeywordIndexConfig(ElasticsearchIndexConfig):
     _no_embedding: bool = PrivateAttr(default=True)
 
 
+# Prefix of the metadata keys holding typed object fields, e.g. `obj_field_created_at`
+OBJ_FIELD_PREFIX = "obj_field_"
+# Longer string fields are not copied into metadata, they can still be read from obj_json
+OBJ_FIELD_MAX_STR_LEN = 256
+
+
 class ObjectNodeMetadata(BaseModel):
     """Metadata of ObjectNode."""
 
@@ -245,16 +290,47 @@ class ObjectNode(TextNode):
 
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
-        self.excluded_llm_metadata_keys = list(ObjectNodeMetadata.model_fields.keys())
+        self.excluded_llm_metadata_keys = list(ObjectNodeMetadata.model_fields.keys()) + [
+            k for k in self.metadata if k.startswith(OBJ_FIELD_PREFIX)
+        ]
         self.excluded_embed_metadata_keys = self.excluded_llm_metadata_keys
 
     @staticmethod
-    def get_obj_metadata(obj: RAGObject) -> dict:
+    def get_obj_metadata(obj: RAGObject, fields: Optional[list[str]] = None) -> dict:
+        """Metadata of the object node.
+
+        Besides the object json, the object's `fields` are stored as typed `obj_field_<name>` metadata, so rankers
+        can sort and filter without parsing the json. By default, all the top-level int, float, bool and short str
+        fields are stored.
+        """
+        obj_json = obj.model_dump_json()
         metadata = ObjectNodeMetadata(
-            obj_json=obj.model_dump_json(), obj_cls_name=obj.__class__.__name__, obj_mod_name=obj.__class__.__module__
-        )
+            obj_json=obj_json, obj_cls_name=obj.__class__.__name__, obj_mod_name=obj.__class__.__module__
+        ).model_dump()
+
+        obj_dict = json.loads(obj_json)
+        for name in obj_dict.keys() if fields is None else fields:
+            value = obj_dict.get(name)
+            if isinstance(value, (int, float, bool)) or (
+                isinstance(value, str) and (fields is not None or len(value) <= OBJ_FIELD_MAX_STR_LEN)
+            ):
+                metadata[f"{OBJ_FIELD_PREFIX}{name}"] = value
 
-        return metadata.model_dump()
+        return metadata
+
+    @staticmethod
+    def get_obj_fields(node: BaseNode, field_names: list[str]) -> dict[str, Any]:
+        """Read the object's fields from typed metadata, parsing obj_json at most once for the missing ones."""
+        fields, obj_dict = {}, None
+        for name in field_names:
+            key = f"{OBJ_FIELD_PREFIX}{name}"
+            if key in node.metadata:
+                fields[name] = node.metadata[key]
+                continue
+            if obj_dict is None:
+                obj_dict = json.loads(node.metadata["obj_json"])
+            fields[name] = obj_dict.get(name)
+        return fields
 
 
 class OmniParseType(str, Enum):
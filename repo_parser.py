@@ -12,19 +12,21 @@ This script is designed to create a symbols repository from the provided source
 from __future__ import annotations
 
 import ast
+import csv
+import hashlib
 import json
 import re
 import subprocess
+import textwrap
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, Iterator, List, Optional
 
-import pandas as pd
-from pydantic import BaseModel, Field, field_validator
+from pydantic import BaseModel, Field, PrivateAttr, field_validator
 
 from metagpt.const import AGGREGATION, COMPOSITION, GENERALIZATION
 from metagpt.logs import logger
 from metagpt.utils.common import any_to_str, aread, remove_white_spaces
-from metagpt.utils.exceptions import handle_exception
 
 
 class RepoFileInfo(BaseModel):
@@ -425,23 +427,17 @@ class RepoParser(BaseModel):
 
     Attributes:
         base_directory (Path): The base directory of the project.
+        max_workers (int): Number of processes used to parse files, 0 to parse in the current process.
+        cache_path (Optional[Path]): JSON file persisting parsed symbols between runs, so that only changed files
+            are re-parsed. Parsed symbols are always cached in memory for the lifetime of the parser.
     """
 
     base_directory: Path = Field(default=None)
+    max_workers: int = 0
+    cache_path: Optional[Path] = None
 
-    @classmethod
-    @handle_exception(exception_type=Exception, default_return=[])
-    def _parse_file(cls, file_path: Path) -> list:
-        """
-        Parses a Python file in the repository.
-
-        Args:
-            file_path (Path): The path to the Python file to be parsed.
-
-        Returns:
-            list: A list containing the parsed symbols from the file.
-        """
-        return ast.parse(file_path.read_text()).body
+    # relative file path -> {"mtime": int, "size": int, "hash": str, "info": dict}
+    _symbol_cache: Optional[Dict[str, Dict]] = PrivateAttr(default=None)
 
     def extract_class_and_function_info(self, tree, file_path) -> RepoFileInfo:
         """
@@ -477,40 +473,113 @@ class RepoParser(BaseModel):
         Returns:
             List[RepoFileInfo]: A list of RepoFileInfo objects containing the extracted information.
         """
-        files_classes = []
-        directory = self.base_directory
+        return list(self.iter_symbols())
 
+    def iter_symbols(self, files: Optional[List[Path]] = None) -> Iterator[RepoFileInfo]:
+        """
+        Yields the symbols of each file in the order of `files`: unchanged files from the symbol cache, the others
+        re-parsed, across `max_workers` processes if set. A file is yielded once it and all the files before it are
+        available, so the output does not depend on which worker finishes first.
+
+        Args:
+            files (Optional[List[Path]]): The files to parse, all '.py' files under `base_directory` by default.
+
+        Yields:
+            RepoFileInfo: The extracted information of one file.
+        """
+        files = self._matching_files() if files is None else files
+        cache = self._load_symbol_cache()
+        keys = []
+        stale = {}  # relative path -> (path, stat)
+        for path in files:
+            key = str(path.relative_to(self.base_directory))
+            keys.append(key)
+            stat = path.stat()
+            entry = cache.get(key)
+            if not entry or entry["mtime"] != stat.st_mtime_ns or entry["size"] != stat.st_size:
+                stale[key] = (path, stat)
+        removed = set(cache) - set(keys)
+        for key in removed:
+            cache.pop(key)
+
+        parsed = self._parse_files(stale, cache)  # in the order of `stale`, which is the one of `files`
+        for key in keys:
+            if key in stale:
+                _, content_hash, info = next(parsed)
+                path, stat = stale[key]
+                if info is None:  # content unchanged, only the timestamp moved
+                    info = cache[key]["info"]
+                cache[key] = {"mtime": stat.st_mtime_ns, "size": stat.st_size, "hash": content_hash, "info": info}
+            yield _load_file_info(cache[key]["info"])
+        if stale or removed:
+            self._save_symbol_cache()
+
+    def _matching_files(self) -> List[Path]:
         matching_files = []
         extensions = ["*.py"]
         for ext in extensions:
-            matching_files += directory.rglob(ext)
-        for path in matching_files:
-            tree = self._parse_file(path)
-            file_info = self.extract_class_and_function_info(tree, path)
-            files_classes.append(file_info)
-
-        return files_classes
+            matching_files += self.base_directory.rglob(ext)
+        return matching_files
+
+    def _parse_files(self, stale: Dict[str, tuple], cache: Dict[str, Dict]) -> Iterator[tuple]:
+        jobs = [(self.base_directory, path, cache.get(key, {}).get("hash")) for key, (path, _) in stale.items()]
+        if self.max_workers <= 0 or len(jobs) <= 1:
+            for job in jobs:
+                yield _parse_repo_file(*job)
+            return
+        with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+            yield from executor.map(_parse_repo_file, *zip(*jobs))
+
+    def _load_symbol_cache(self) -> Dict[str, Dict]:
+        if self._symbol_cache is None:
+            self._symbol_cache = {}
+            if self.cache_path and Path(self.cache_path).exists():
+                try:
+                    self._symbol_cache = json.loads(Path(self.cache_path).read_text())
+                except (OSError, ValueError) as e:
+                    logger.warning(f"Ignore broken symbol cache {self.cache_path}: {e}")
+        return self._symbol_cache
+
+    def _save_symbol_cache(self):
+        if not self.cache_path:
+            return
+        Path(self.cache_path).parent.mkdir(parents=True, exist_ok=True)
+        Path(self.cache_path).write_text(json.dumps(self._symbol_cache))
 
     def generate_json_structure(self, output_path: Path):
         """
-        Generates a JSON file documenting the repository structure.
+        Generates a JSON file documenting the repository structure. Files are dumped one at a time as `iter_symbols`
+        yields them, rather than as a whole list.
 
         Args:
             output_path (Path): The path to the JSON file to be generated.
         """
-        files_classes = [i.model_dump() for i in self.generate_symbols()]
-        output_path.write_text(json.dumps(files_classes, indent=4))
+        with open(output_path, "w") as writer:
+            count = 0
+            for file_info in self.iter_symbols():
+                writer.write("[\n" if count == 0 else ",\n")
+                writer.write(textwrap.indent(json.dumps(file_info.model_dump(), indent=4), " " * 4))
+                count += 1
+            writer.write("\n]" if count else "[]")
 
     def generate_dataframe_structure(self, output_path: Path):
         """
-        Generates a DataFrame documenting the repository structure and saves it as a CSV file.
+        Generates a CSV file documenting the repository structure, one row per file written as `iter_symbols` yields
+        it, in the format of the former `DataFrame.to_csv`.
 
         Args:
             output_path (Path): The path to the CSV file to be generated.
         """
-        files_classes = [i.model_dump() for i in self.generate_symbols()]
-        df = pd.DataFrame(files_classes)
-        df.to_csv(output_path, index=False)
+        with open(output_path, "w", newline="") as writer:
+            csv_writer = None
+            for file_info in self.iter_symbols():
+                row = file_info.model_dump()
+                if csv_writer is None:
+                    csv_writer = csv.DictWriter(writer, fieldnames=list(row.keys()), lineterminator="\n")
+                    csv_writer.writeheader()
+                csv_writer.writerow(row)
+            if csv_writer is None:
+                writer.write("\n")  # an empty DataFrame
 
     def generate_structure(self, output_path: str | Path = None, mode="json") -> Path:
         """
@@ -1010,6 +1079,41 @@ class RepoParser(BaseModel):
         return "." + full_key[0:ix]
 
 
+def _parse_repo_file(base_directory: Path, file_path: Path, known_hash: Optional[str]) -> tuple:
+    """
+    Parses one file for `RepoParser.iter_symbols`. Top-level so that it can run in a worker process.
+
+    A file which cannot be read or parsed, e.g. on a SyntaxError, is logged and yields empty symbols, so that one
+    broken file does not fail the whole repository.
+
+    Returns:
+        tuple: (relative path, content hash, dumped RepoFileInfo or None if the content hash equals `known_hash`).
+    """
+    key = str(file_path.relative_to(base_directory))
+    try:
+        content = file_path.read_bytes()
+    except OSError as e:
+        logger.warning(f"Failed to read {file_path}: {e}")
+        content = b""
+    content_hash = hashlib.sha256(content).hexdigest()
+    if content_hash == known_hash:
+        return key, content_hash, None
+    try:
+        tree = ast.parse(content).body
+    except Exception as e:
+        logger.warning(f"Failed to parse {file_path}: {e}")
+        tree = []
+    file_info = RepoParser(base_directory=base_directory).extract_class_and_function_info(tree, file_path)
+    return key, content_hash, file_info.model_dump()
+
+
+def _load_file_info(info: dict) -> RepoFileInfo:
+    """Rebuilds a RepoFileInfo from its dump, restoring the `CodeBlockInfo` objects of `page_info`."""
+    file_info = RepoFileInfo.model_validate(info)
+    file_info.page_info = [CodeBlockInfo.model_validate(i) for i in file_info.page_info]
+    return file_info
+
+
 def is_func(node) -> bool:
     """
     Returns True if the given node represents a function.
@@ -32,7 +32,7 @@ from metagpt.actions.action_node import ActionNode
 from metagpt.actions.add_requirement import UserRequirement
 from metagpt.context_mixin import ContextMixin
 from metagpt.logs import logger
-from metagpt.memory import Memory
+from metagpt.memory import IndexedMemory, Memory
 from metagpt.provider import HumanProvider
 from metagpt.schema import Message, MessageQueue, SerializationMixin
 from metagpt.strategy.planner import Planner
@@ -96,7 +96,7 @@ class RoleContext(BaseModel):
     msg_buffer: MessageQueue = Field(
         default_factory=MessageQueue, exclude=True
     )  # Message Buffer with Asynchronous Updates
-    memory: Memory = Field(default_factory=Memory)
+    memory: IndexedMemory = Field(default_factory=IndexedMemory)
     # long_term_memory: LongTermMemory = Field(default_factory=LongTermMemory)
     working_memory: Memory = Field(default_factory=Memory)
     state: int = Field(default=-1)  # -1 indicates initial or termination state where todo is None
@@ -427,12 +427,10 @@ class Role(SerializationMixin, ContextMixin, BaseModel):
         if not news:
             news = self.rc.msg_buffer.pop_all()
         # Store the read messages in your own memory to prevent duplicate processing.
-        old_messages = [] if ignore_memory else self.rc.memory.get()
+        unseen = news if ignore_memory else self.rc.memory.find_news(news)
         self.rc.memory.add_batch(news)
         # Filter out messages of interest.
-        self.rc.news = [
-            n for n in news if (n.cause_by in self.rc.watch or self.name in n.send_to) and n not in old_messages
-        ]
+        self.rc.news = [n for n in unseen if n.cause_by in self.rc.watch or self.name in n.send_to]
         self.latest_observed_msg = self.rc.news[-1] if self.rc.news else None  # record the latest observed msg
 
         # Design Rules:
@@ -457,6 +455,8 @@ class Role(SerializationMixin, ContextMixin, BaseModel):
         if not message:
             return
         self.rc.msg_buffer.push(message)
+        if self.rc.env:
+            self.rc.env.notify_ready(self)
 
     async def _react(self) -> Message:
         """Think first, then act, until the Role _think it is time to stop and requires no more todo.
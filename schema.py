@@ -15,12 +15,11 @@
 
 from __future__ import annotations
 
-import asyncio
 import json
 import os.path
 import uuid
 from abc import ABC
-from asyncio import Queue, QueueEmpty, wait_for
+from collections import deque
 from json import JSONDecodeError
 from pathlib import Path
 from typing import Any, Dict, Iterable, List, Optional, Type, TypeVar, Union
@@ -533,61 +532,43 @@ class Plan(BaseModel):
 
 
 class MessageQueue(BaseModel):
-    """Message queue which supports asynchronous updates."""
+    """Message queue which supports asynchronous updates.
+
+    Backed by a deque, which lets `snapshot` and `dump` read the pending messages in one pass without draining them.
+    """
 
     model_config = ConfigDict(arbitrary_types_allowed=True)
 
-    _queue: Queue = PrivateAttr(default_factory=Queue)
+    _queue: deque = PrivateAttr(default_factory=deque)
 
     def pop(self) -> Message | None:
         """Pop one message from the queue."""
         try:
-            item = self._queue.get_nowait()
-            if item:
-                self._queue.task_done()
-            return item
-        except QueueEmpty:
+            return self._queue.popleft()
+        except IndexError:
             return None
 
     def pop_all(self) -> List[Message]:
         """Pop all messages from the queue."""
-        ret = []
-        while True:
-            msg = self.pop()
-            if not msg:
-                break
-            ret.append(msg)
+        ret = list(self._queue)
+        self._queue.clear()
         return ret
 
     def push(self, msg: Message):
         """Push a message into the queue."""
-        self._queue.put_nowait(msg)
+        self._queue.append(msg)
 
     def empty(self):
         """Return true if the queue is empty."""
-        return self._queue.empty()
+        return not self._queue
+
+    def snapshot(self) -> List[Message]:
+        """Return the pending messages in order, leaving the queue untouched."""
+        return list(self._queue)
 
     async def dump(self) -> str:
         """Convert the `MessageQueue` object to a json string."""
-        if self.empty():
-            return "[]"
-
-        lst = []
-        msgs = []
-        try:
-            while True:
-                item = await wait_for(self._queue.get(), timeout=1.0)
-                if item is None:
-                    break
-                msgs.append(item)
-                lst.append(item.dump())
-                self._queue.task_done()
-        except asyncio.TimeoutError:
-            logger.debug("Queue is empty, exiting...")
-        finally:
-            for m in msgs:
-                self._queue.put_nowait(m)
-        return json.dumps(lst, ensure_ascii=False)
+        return json.dumps([m.dump() for m in self.snapshot()], ensure_ascii=False)
 
     @staticmethod
     def load(data) -> "MessageQueue":
@@ -0,0 +1,62 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Desc   : unittest of the ActionNode retries with the LLM response cache
+
+import pytest
+from tenacity import stop_after_attempt, wait_none
+
+from metagpt.actions.action_node import ActionNode
+from metagpt.configs.llm_config import LLMConfig
+from metagpt.provider.base_llm import BaseLLM
+
+BAD_RSP = "[CONTENT]\nnot a json\n[/CONTENT]"
+GOOD_RSP = '[CONTENT]\n{"Answer": "42"}\n[/CONTENT]'
+
+
+class ScriptedLLM(BaseLLM):
+    """Returns the scripted responses in turn"""
+
+    def __init__(self, config: LLMConfig, responses: list[str]):
+        self.config = config
+        self.responses = list(responses)
+        self.calls = 0
+
+    async def acompletion_text(self, messages: list[dict], stream: bool = False, timeout: int = 3) -> str:
+        self.calls += 1
+        return self.responses.pop(0)
+
+    async def _achat_completion(self, messages: list[dict], timeout: int = 3):
+        raise NotImplementedError
+
+    async def acompletion(self, messages: list[dict], timeout: int = 3):
+        raise NotImplementedError
+
+    async def _achat_completion_stream(self, messages: list[dict], timeout: int = 3) -> str:
+        raise NotImplementedError
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("cache_type", ["memory", "sqlite"])
+async def test_retry_skips_cached_bad_response(tmp_path, cache_type):
+    config = LLMConfig(
+        api_key="mock",
+        model="mock-model",
+        base_url=f"http://localhost/{cache_type}/{tmp_path.name}",  # a cache key of its own
+        cache_type=cache_type,
+        cache_path=str(tmp_path / "responses.db"),
+    )
+    node = ActionNode(key="Answer", expected_type=str, instruction="the answer", example="42")
+    node.llm = ScriptedLLM(config, [BAD_RSP, GOOD_RSP])
+    aask_v1 = ActionNode._aask_v1.retry_with(wait=wait_none(), stop=stop_after_attempt(3))
+
+    content, instruct_content = await aask_v1(node, "prompt", "Answer_AN", {"Answer": (str, ...)}, schema="json")
+
+    assert content == GOOD_RSP
+    assert instruct_content.Answer == "42"
+    assert node.llm.calls == 2
+
+    # the accepted response is cached, the bad one is not replayed
+    node.llm.responses = [BAD_RSP]
+    content, _ = await aask_v1(node, "prompt", "Answer_AN", {"Answer": (str, ...)}, schema="json")
+    assert content == GOOD_RSP
+    assert node.llm.calls == 2
@@ -0,0 +1,81 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Desc   : unittest of the field callbacks of streamed ActionNode outputs across retries
+
+import asyncio
+
+import pytest
+from tenacity import stop_after_attempt, wait_none
+
+from metagpt.actions.action_node import ActionNode
+from metagpt.configs.llm_config import LLMConfig
+from metagpt.logs import log_llm_stream
+from metagpt.provider.base_llm import BaseLLM
+
+MAPPING = {"A": (int, ...), "B": (int, ...)}
+REJECTED_RSP = '[CONTENT]\n{"A": 1, "B": "not an int"}\n[/CONTENT]'
+ACCEPTED_RSP = '[CONTENT]\n{"A": 2, "B": 3}\n[/CONTENT]'
+
+
+class StreamingLLM(BaseLLM):
+    """Streams the scripted responses in turn, a few characters per chunk"""
+
+    def __init__(self, responses: list[str]):
+        self.config = LLMConfig(api_key="mock", model="mock-model")
+        self.responses = list(responses)
+
+    async def acompletion_text(self, messages: list[dict], stream: bool = False, timeout: int = 3) -> str:
+        rsp = self.responses.pop(0)
+        for i in range(0, len(rsp), 4):
+            log_llm_stream(rsp[i : i + 4])
+            await asyncio.sleep(0)  # hand over to the callbacks as a network stream would
+        return rsp
+
+    async def _achat_completion(self, messages: list[dict], timeout: int = 3):
+        raise NotImplementedError
+
+    async def acompletion(self, messages: list[dict], timeout: int = 3):
+        raise NotImplementedError
+
+    async def _achat_completion_stream(self, messages: list[dict], timeout: int = 3) -> str:
+        raise NotImplementedError
+
+
+async def ask_with_callbacks(defer_callbacks: bool) -> tuple[list, list]:
+    values_a, values_b = [], []
+
+    async def on_a(value):
+        values_a.append(value)
+
+    async def on_b(value):
+        values_b.append(value)
+
+    node = ActionNode(key="AB", expected_type=str, instruction="", example="")
+    node.llm = StreamingLLM([REJECTED_RSP, ACCEPTED_RSP])
+    aask_v1 = ActionNode._aask_v1.retry_with(wait=wait_none(), stop=stop_after_attempt(3))
+    _, instruct_content = await aask_v1(
+        node,
+        "prompt",
+        "AB_AN",
+        MAPPING,
+        schema="json",
+        stream=True,
+        field_callbacks={"A": on_a, "B": on_b},
+        defer_callbacks=defer_callbacks,
+    )
+    assert instruct_content.model_dump() == {"A": 2, "B": 3}
+    return values_a, values_b
+
+
+@pytest.mark.asyncio
+async def test_callbacks_fire_for_each_attempt():
+    values_a, values_b = await ask_with_callbacks(defer_callbacks=False)
+    assert values_a == [1, 2]  # the value of the aborted generation was already delivered
+    assert values_b == [3]
+
+
+@pytest.mark.asyncio
+async def test_deferred_callbacks_fire_for_accepted_output_only():
+    values_a, values_b = await ask_with_callbacks(defer_callbacks=True)
+    assert values_a == [2]
+    assert values_b == [3]
@@ -0,0 +1,122 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Desc   : unittest of GridPathFinder
+
+import random
+from collections import deque
+
+import pytest
+
+from metagpt.environment.stanford_town.path_finder import GridPathFinder
+
+BLOCK = "#"
+
+
+def random_maze(width: int, height: int, density: float, seed: int) -> list[list[str]]:
+    rnd = random.Random(seed)
+    return [[BLOCK if rnd.random() < density else "0" for _ in range(width)] for _ in range(height)]
+
+
+def bfs_distance(maze: list[list[str]], start: tuple, end: tuple) -> int:
+    """Reference distance between (x, y) tiles, -1 if unreachable"""
+    if maze[end[1]][end[0]] == BLOCK:
+        return -1
+    dist = {start: 0}
+    queue = deque([start])
+    while queue:
+        x, y = queue.popleft()
+        if (x, y) == end:
+            return dist[(x, y)]
+        for nx, ny in ((x, y - 1), (x - 1, y), (x, y + 1), (x + 1, y)):
+            if 0 <= ny < len(maze) and 0 <= nx < len(maze[0]) and maze[ny][nx] != BLOCK and (nx, ny) not in dist:
+                dist[(nx, ny)] = dist[(x, y)] + 1
+                queue.append((nx, ny))
+    return -1
+
+
+def assert_valid_path(maze: list[list[str]], path: list[tuple], start: tuple, end: tuple):
+    assert path[0] == start
+    assert path[-1] == end
+    for (x0, y0), (x1, y1) in zip(path, path[1:]):
+        assert abs(x0 - x1) + abs(y0 - y1) == 1
+        assert maze[y1][x1] != BLOCK
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_astar_and_field_give_shortest_paths(seed):
+    maze = random_maze(30, 20, 0.3, seed)
+    astar = GridPathFinder(maze, BLOCK, field_threshold=10**9)
+    field = GridPathFinder(maze, BLOCK, field_threshold=1)
+    rnd = random.Random(seed)
+    free = [(x, y) for y, row in enumerate(maze) for x, cell in enumerate(row) if cell != BLOCK]
+    for _ in range(100):
+        start, end = rnd.choice(free), rnd.choice(free)
+        distance = bfs_distance(maze, start, end)
+        astar_path = astar.find_path(start, end)
+        field_path = field.find_path(start, end)
+        if distance < 0:
+            assert astar_path == field_path == [end]
+            continue
+        assert len(astar_path) == len(field_path) == distance + 1
+        assert_valid_path(maze, astar_path, start, end)
+        assert_valid_path(maze, field_path, start, end)
+
+
+def test_find_paths_shared_destination():
+    maze = random_maze(30, 20, 0.2, 7)
+    finder = GridPathFinder(maze, BLOCK)
+    free = [(x, y) for y, row in enumerate(maze) for x, cell in enumerate(row) if cell != BLOCK]
+    end = free[-1]
+    routes = [(start, end) for start in free[:10]]
+    paths = finder.find_paths(routes)
+    for (start, _), path in zip(routes, paths):
+        distance = bfs_distance(maze, start, end)
+        assert len(path) == (distance + 1 if distance >= 0 else 1)
+
+
+def test_unreachable_end():
+    maze = [list(row) for row in ["00000", "0###0", "0#0#0", "0###0", "00000"]]
+    finder = GridPathFinder(maze, BLOCK)
+    assert finder.find_path((0, 0), (2, 2)) == [(2, 2)]  # walled in
+    assert finder.find_path((0, 0), (1, 1)) == [(1, 1)]  # blocked
+    assert finder.find_path((2, 2), (2, 2)) == [(2, 2)]
+    assert finder.find_path((0, 0), (4, 0)) == [(0, 0), (1, 0), (2, 0), (3, 0), (4, 0)]
+
+
+def test_find_closest_path_tie_order():
+    maze = [["0"] * 5 for _ in range(5)]
+    maze[0][0] = BLOCK
+    finder = GridPathFinder(maze, BLOCK)
+    start = (2, 2)
+
+    target, path = finder.find_closest_path(start, [(4, 2), (0, 2), (2, 4)])
+    assert target == (4, 2)
+    assert path == [(2, 2), (3, 2), (4, 2)]
+    target, _ = finder.find_closest_path(start, [(2, 4), (0, 2), (4, 2)])
+    assert target == (2, 4)
+
+    # a closer target wins whatever its position, an unreachable one is skipped
+    target, path = finder.find_closest_path(start, [(0, 0), (4, 4), (3, 2)])
+    assert target == (3, 2)
+    assert path == [(2, 2), (3, 2)]
+
+    assert finder.find_closest_path(start, [(0, 0)]) == ((0, 0), [(0, 0)])
+    assert finder.find_closest_path(start, []) == (None, [])
+
+
+def test_set_collision_invalidates_cache():
+    maze = [list(row) for row in ["00000", "0###0", "00000"]]
+    finder = GridPathFinder(maze, BLOCK, field_threshold=1)
+    start, end = (0, 0), (4, 0)
+    assert len(finder.find_path(start, end)) == 5
+
+    finder.set_collision((2, 0), True)
+    path = finder.find_path(start, end)
+    assert (2, 0) not in path
+    assert len(path) == 9
+
+    finder.set_collision((2, 2), True)
+    assert finder.find_path(start, end) == [end]
+
+    finder.set_collision((2, 0), False)
+    assert len(finder.find_path(start, end)) == 5
@@ -0,0 +1,76 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Desc   : unittest of the bulk perception of StanfordTownExtEnv against the per-tile access
+
+import random
+
+import pytest
+
+from metagpt.environment.stanford_town.stanford_town_ext_env import (
+    StanfordTownExtEnv,
+)
+from metagpt.ext.stanford_town.utils.const import MAZE_ASSET_PATH
+
+
+@pytest.fixture(scope="module")
+def env():
+    return StanfordTownExtEnv(maze_asset_path=MAZE_ASSET_PATH)
+
+
+def observe_per_tile(env: StanfordTownExtEnv, tile: tuple, vision_r: int) -> dict:
+    """The vision window observed with an access_tile and a get_tile_path per tile, as STRole.observe used to"""
+    nearby_tiles = env.get_nearby_tiles(tile, vision_r)
+    tile_infos = []
+    for i in nearby_tiles:
+        detail = env.access_tile(i)
+        info = {key: detail[key] for key in ("world", "sector", "arena", "game_object")}
+        if info not in tile_infos:
+            tile_infos.append(info)
+    arena_path = env.get_tile_path(tile, "arena")
+    events = [
+        (i, set(env.access_tile(i)["events"]))
+        for i in nearby_tiles
+        if env.access_tile(i)["events"] and env.get_tile_path(i, "arena") == arena_path
+    ]
+    return {"tile_infos": tile_infos, "arena_path": arena_path, "events": events}
+
+
+def assert_same_region(env: StanfordTownExtEnv, tile: tuple, vision_r: int):
+    region = env.observe_region(tile, vision_r)
+    expected = observe_per_tile(env, tile, vision_r)
+    assert region["tile_infos"] == expected["tile_infos"]
+    assert region["arena_path"] == expected["arena_path"]
+    assert [(i, set(events)) for i, events in region["events"]] == expected["events"]
+
+
+def test_observe_region_equals_per_tile_access(env):
+    rnd = random.Random(0)
+    tiles = [(x, y) for x in range(env.maze_width - 1) for y in range(env.maze_height - 1)]
+    event_tiles = rnd.sample(tiles, 300)
+    for i, tile in enumerate(event_tiles):
+        env.add_event_from_tile((f"subject {i}", "is", "testing", "testing"), tile)
+
+    for tile in rnd.sample(tiles, 50) + event_tiles[:20] + [(0, 0), (env.maze_width - 2, env.maze_height - 2)]:
+        assert_same_region(env, tile, rnd.choice([1, 4, 8]))
+
+    # the snapshot follows the event writers
+    for i, tile in enumerate(event_tiles[:100]):
+        env.remove_event_from_tile((f"subject {i}", "is", "testing", "testing"), tile)
+    for i, tile in enumerate(event_tiles[100:150], start=100):
+        env.turn_event_from_tile_idle((f"subject {i}", "is", "testing", "testing"), tile)
+    for i, tile in enumerate(event_tiles[150:200], start=150):
+        env.remove_subject_events_from_tile(f"subject {i}", tile)
+    for tile in event_tiles[:200:5]:
+        assert_same_region(env, tile, 4)
+
+
+def test_perception_snapshot_is_shared_until_events_change(env):
+    snapshot = env.get_perception_snapshot()
+    assert env.get_perception_snapshot() is snapshot
+
+    tile = (10, 10)
+    env.add_event_from_tile(("snapshot subject", "is", "testing", "testing"), tile)
+    new_snapshot = env.get_perception_snapshot()
+    assert new_snapshot is not snapshot
+    assert new_snapshot.version > snapshot.version
+    assert tile in new_snapshot.tiles
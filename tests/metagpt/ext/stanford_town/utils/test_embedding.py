@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Desc   : unittest of embedding service
+
+import asyncio
+
+import pytest
+
+from metagpt.ext.stanford_town.utils.embedding import (
+    EmbeddingService,
+    HashEmbedder,
+    normalize_text,
+)
+
+
+class CountingEmbedder(HashEmbedder):
+    def __init__(self):
+        super().__init__(dimensions=64)
+        self.batches = []
+
+    async def aembed(self, texts: list[str]) -> list[list[float]]:
+        self.batches.append(list(texts))
+        return self.embed(texts)
+
+
+def test_hash_embedder():
+    embedder = HashEmbedder(dimensions=64)
+    a, b, c = embedder.embed(["Isabella is cooking", "Isabella is cooking", "Klaus reads a paper"])
+    assert a == b
+    assert len(a) == 64
+    assert sum(i * i for i in a) == pytest.approx(1.0)
+    assert a != c
+
+
+@pytest.mark.asyncio
+async def test_embedding_service_batches_concurrent_roles(tmp_path):
+    embedder = CountingEmbedder()
+    service = EmbeddingService(embedder, cache_path=tmp_path / "cache.jsonl", batch_window=0.01)
+
+    rsp = await asyncio.gather(
+        service.aget_many(["idle", "sleeping", "idle"]),
+        service.aget_many(["sleeping ", "cooking"]),
+        service.aget(""),
+    )
+
+    assert len(embedder.batches) == 1
+    assert sorted(embedder.batches[0]) == sorted(["idle", "sleeping", "cooking", normalize_text("")])
+    assert rsp[0][0] == rsp[0][2] == embedder.embed(["idle"])[0]
+    assert rsp[0][1] == rsp[1][0]
+
+    await service.aget("idle")
+    assert len(embedder.batches) == 1
+
+
+@pytest.mark.asyncio
+async def test_embedding_service_persist(tmp_path):
+    cache_path = tmp_path / "cache.jsonl"
+    service = EmbeddingService(HashEmbedder(dimensions=64), cache_path=cache_path, batch_window=0)
+    expected = await service.aget_many(["idle", "cooking"])
+    service.save()
+    service.save()
+
+    embedder = CountingEmbedder()
+    reloaded = EmbeddingService(embedder, cache_path=cache_path, batch_window=0)
+    assert await reloaded.aget_many(["idle", "cooking"]) == expected
+    assert reloaded.get("idle") == expected[0]
+    assert not embedder.batches
+    assert len(cache_path.read_text().splitlines()) == 2
+
+
+@pytest.mark.asyncio
+async def test_embedding_service_cancelled_role(tmp_path):
+    service = EmbeddingService(CountingEmbedder(), cache_path=tmp_path / "cache.jsonl", batch_window=0.01)
+    cancelled = asyncio.create_task(service.aget("idle"))
+    waiting = asyncio.create_task(service.aget("idle"))
+    await asyncio.sleep(0)
+    cancelled.cancel()
+
+    assert await waiting == service.embedder.embed(["idle"])[0]
+    assert cancelled.cancelled()
@@ -0,0 +1,164 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+@File    : tool_index.py
+@Desc    : Retrieval index over tool schemas for tool recommendation: a vectorized BM25 and optional embeddings. An
+    index is built once per set of tools and persisted under TOOL_INDEX_PATH, keyed by a fingerprint of the tools, so
+    that a change of the registered tools invalidates it.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import re
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from metagpt.const import TOOL_INDEX_PATH
+from metagpt.logs import logger
+from metagpt.tools.tool_data_type import Tool
+
+INDEX_VERSION = 1
+
+_indexes: dict[str, "ToolIndex"] = {}  # fingerprint -> index, shared by all the recommenders of the process
+
+
+def tokenize(text: str) -> list[str]:
+    """Lowercase alphanumeric tokens, CamelCase and snake_case words are split"""
+    text = re.sub(r"([a-z0-9])([A-Z])", r"\1 \2", text)
+    return re.findall(r"[a-z0-9]+", text.lower())
+
+
+def tool_document(tool: Tool) -> str:
+    """The text of a tool to be indexed"""
+    methods = " ".join(tool.schemas.get("methods", {}).keys())
+    return f"{tool.name} {tool.tags}: {tool.schemas.get('description', '')} {methods}".strip()
+
+
+def tools_fingerprint(tools: dict[str, Tool]) -> str:
+    data = [INDEX_VERSION] + [[name, tool_document(tool)] for name, tool in sorted(tools.items())]
+    return hashlib.sha256(json.dumps(data, default=str).encode("utf-8")).hexdigest()[:32]
+
+
+def _model_name(embed_model) -> str:
+    return f"{type(embed_model).__name__}:{getattr(embed_model, 'model_name', '')}"
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+class ToolIndex:
+    """BM25 and embedding scores of a query against a set of tools.
+
+    The BM25 term weights are precomputed into a (vocabulary, tools) matrix, so scoring a query is a row gather and a
+    sum, with the same scores as `rank_bm25.BM25Okapi`. Embeddings are computed on first use for each embedding model.
+    """
+
+    def __init__(self, tools: dict[str, Tool], k1: float = 1.5, b: float = 0.75, epsilon: float = 0.25):
+        self.names = list(tools.keys())
+        self.fingerprint = tools_fingerprint(tools)
+        self.documents = [tool_document(tool) for tool in tools.values()]
+        self.k1 = k1
+        self.b = b
+        self.epsilon = epsilon
+        self.vocab: dict[str, int] = {}
+        self.weights = np.zeros((0, len(self.names)), dtype=np.float32)
+        self.embeddings: dict[str, np.ndarray] = {}  # embedding model -> normalized (tools, dim) matrix
+
+    @property
+    def filename(self) -> Path:
+        return TOOL_INDEX_PATH / f"{self.fingerprint}.npz"
+
+    def build(self):
+        tokenized = [tokenize(i) for i in self.documents]
+        for tokens in tokenized:
+            for token in tokens:
+                self.vocab.setdefault(token, len(self.vocab))
+        n = len(self.names)
+        tf = np.zeros((len(self.vocab), n), dtype=np.float64)
+        for col, tokens in enumerate(tokenized):
+            np.add.at(tf[:, col], [self.vocab[t] for t in tokens], 1)
+        doc_len = tf.sum(axis=0)
+        avgdl = doc_len.mean() if n and doc_len.mean() > 0 else 1.0
+        df = (tf > 0).sum(axis=1)
+        idf = np.log(n - df + 0.5) - np.log(df + 0.5)
+        if len(idf):
+            idf[idf < 0] = self.epsilon * idf.mean()
+        norm = self.k1 * (1 - self.b + self.b * doc_len / avgdl)
+        self.weights = (idf[:, None] * tf * (self.k1 + 1) / (tf + norm)).astype(np.float32)
+
+    def bm25_scores(self, query: str) -> np.ndarray:
+        ids = [self.vocab[i] for i in tokenize(query) if i in self.vocab]
+        if not ids:
+            return np.zeros(len(self.names), dtype=np.float32)
+        return self.weights[ids].sum(axis=0)
+
+    async def embedding_scores(self, query: str, embed_model: Any) -> np.ndarray:
+        """Cosine similarities between the query and the tools"""
+        model_name = _model_name(embed_model)
+        matrix = self.embeddings.get(model_name)
+        if matrix is None:
+            vectors = await embed_model.aget_text_embedding_batch(self.documents)
+            matrix = _normalize(np.asarray(vectors, dtype=np.float32))
+            self.embeddings[model_name] = matrix
+            self.save()
+        query_vector = _normalize(np.asarray(await embed_model.aget_query_embedding(query), dtype=np.float32))
+        return matrix @ query_vector
+
+    def save(self):
+        arrays = {
+            "meta": np.array(json.dumps({"version": INDEX_VERSION, "names": self.names, "params": self.params})),
+            "vocab": np.array(list(self.vocab.keys()), dtype=str),
+            "weights": self.weights,
+        }
+        for i, (model_name, matrix) in enumerate(self.embeddings.items()):
+            arrays[f"embedding_name_{i}"] = np.array(model_name)
+            arrays[f"embedding_{i}"] = matrix
+        try:
+            self.filename.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.filename, "wb") as writer:
+                np.savez(writer, **arrays)
+        except OSError as e:
+            logger.warning(f"Failed to save tool index {self.filename}: {e}")
+
+    def load(self) -> bool:
+        """Load the index persisted for the same tools, return False if there is none"""
+        if not self.filename.exists():
+            return False
+        try:
+            with np.load(self.filename, allow_pickle=False) as data:
+                meta = json.loads(str(data["meta"]))
+                if meta != {"version": INDEX_VERSION, "names": self.names, "params": self.params}:
+                    return False
+                self.vocab = {str(token): i for i, token in enumerate(data["vocab"])}
+                self.weights = data["weights"]
+                i = 0
+                while f"embedding_{i}" in data:
+                    self.embeddings[str(data[f"embedding_name_{i}"])] = data[f"embedding_{i}"]
+                    i += 1
+        except Exception as e:
+            logger.warning(f"Failed to load tool index {self.filename}: {e}")
+            return False
+        return True
+
+    @property
+    def params(self) -> list[float]:
+        return [self.k1, self.b, self.epsilon]
+
+
+def get_tool_index(tools: dict[str, Tool]) -> ToolIndex:
+    """Get the index of a set of tools, loaded from disk or built and persisted the first time"""
+    fingerprint = tools_fingerprint(tools)
+    index = _indexes.get(fingerprint)
+    if index:
+        return index
+    index = ToolIndex(tools)
+    if not index.load():
+        index.build()
+        index.save()
+    _indexes[fingerprint] = index
+    return index
@@ -1,17 +1,17 @@
 from __future__ import annotations
 
 import json
-from typing import Any
+from typing import Any, Optional
 
 import numpy as np
-from pydantic import BaseModel, field_validator
-from rank_bm25 import BM25Okapi
+from pydantic import BaseModel, PrivateAttr, field_validator
 
 from metagpt.llm import LLM
 from metagpt.logs import logger
 from metagpt.schema import Plan
 from metagpt.tools import TOOL_REGISTRY
 from metagpt.tools.tool_data_type import Tool
+from metagpt.tools.tool_index import get_tool_index
 from metagpt.tools.tool_registry import validate_tool_names
 from metagpt.utils.common import CodeParser
 
@@ -52,11 +52,18 @@ class ToolRecommender(BaseModel):
     """
     The default ToolRecommender:
     1. Recall: To be implemented in subclasses. Recall tools based on the given context and plan.
-    2. Rank: Use LLM to select final candidates from recalled set.
+    2. Rank: Use LLM to select final candidates from recalled set. Skipped if the recall scores are decisive, i.e. there
+       is a gap of at least `skip_rank_margin` (relative to the top score) between two recalled tools, after one of the
+       first topk tools.
+    Recommendations are memoized per plan goal and task.
     """
 
     tools: dict[str, Tool] = {}
     force: bool = False  # whether to forcedly recommend the specified tools
+    skip_rank_margin: Optional[float] = 0.5  # None to always rank with LLM
+    memo_size: int = 256
+
+    _memo: dict = PrivateAttr(default_factory=dict)
 
     @field_validator("tools", mode="before")
     @classmethod
@@ -91,16 +98,43 @@ class ToolRecommender(BaseModel):
             # directly use the whole set if there is no useful information
             return list(self.tools.values())
 
-        recalled_tools = await self.recall_tools(context=context, plan=plan, topk=recall_topk)
-        if not recalled_tools:
+        memo_key = (plan.goal, plan.current_task.instruction) if plan else context
+        memo_key = (memo_key, recall_topk, topk)
+        if memo_key in self._memo:
+            return list(self._memo[memo_key])
+
+        recalled = await self.recall_tools_with_scores(context=context, plan=plan, topk=recall_topk)
+        if not recalled:
             return []
 
-        ranked_tools = await self.rank_tools(recalled_tools=recalled_tools, context=context, plan=plan, topk=topk)
+        ranked_tools = self._decisive_tools(recalled=recalled, topk=topk)
+        if ranked_tools is None:
+            recalled_tools = [tool for tool, _ in recalled]
+            ranked_tools = await self.rank_tools(recalled_tools=recalled_tools, context=context, plan=plan, topk=topk)
+        else:
+            logger.info("Recall scores are decisive, skip LLM rank")
 
         logger.info(f"Recommended tools: \n{[tool.name for tool in ranked_tools]}")
 
+        if len(self._memo) >= self.memo_size:
+            self._memo.pop(next(iter(self._memo)))
+        self._memo[memo_key] = list(ranked_tools)
         return ranked_tools
 
+    def _decisive_tools(self, recalled: list[tuple[Tool, Optional[float]]], topk: int) -> Optional[list[Tool]]:
+        """Return the tools before the largest score gap within topk if the gap is decisive, otherwise None. Only the
+        gaps between recalled tools count, so a lone or last tool is never decisive by its own score."""
+        scores = [score for _, score in recalled]
+        if self.skip_rank_margin is None or any(i is None for i in scores) or scores[0] <= 0:
+            return None
+        gaps = [(scores[i] - scores[i + 1]) / scores[0] for i in range(min(topk, len(recalled) - 1))]
+        if not gaps:
+            return None
+        cut = int(np.argmax(gaps))
+        if gaps[cut] < self.skip_rank_margin:
+            return None
+        return [tool for tool, _ in recalled[: cut + 1]]
+
     async def get_recommended_tool_info(self, **kwargs) -> str:
         """
         Wrap recommended tools with their info in a string, which can be used directly in a prompt.
@@ -117,6 +151,14 @@ class ToolRecommender(BaseModel):
         """
         raise NotImplementedError
 
+    async def recall_tools_with_scores(
+        self, context: str = "", plan: Plan = None, topk: int = 20
+    ) -> list[tuple[Tool, Optional[float]]]:
+        """
+        Recall tools together with their relevance scores, in descending order. Scores are None if not available.
+        """
+        return [(tool, None) for tool in await self.recall_tools(context=context, plan=plan, topk=topk)]
+
     async def rank_tools(
         self, recalled_tools: list[Tool], context: str = "", plan: Plan = None, topk: int = 5
     ) -> list[Tool]:
@@ -162,52 +204,92 @@ class TypeMatchToolRecommender(ToolRecommender):
         return recalled_tools
 
 
-class BM25ToolRecommender(ToolRecommender):
+class IndexToolRecommender(ToolRecommender):
     """
-    A ToolRecommender using BM25 at the recall stage:
-    1. Recall: Querying tool descriptions with task instruction if plan exists. Otherwise, return all user-specified tools;
+    Base of the ToolRecommenders recalling with a `ToolIndex` over the tool schemas, built once per set of tools:
+    1. Recall: Score the tools against the task instruction if plan exists, otherwise against the context;
     2. Rank: LLM rank, the same as the default ToolRecommender.
     """
 
-    bm25: Any = None
+    index: Any = None  # ToolIndex
 
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
-        self._init_corpus()
+        self.index = get_tool_index(self.tools)
 
-    def _init_corpus(self):
-        corpus = [f"{tool.name} {tool.tags}: {tool.schemas['description']}" for tool in self.tools.values()]
-        tokenized_corpus = [self._tokenize(doc) for doc in corpus]
-        self.bm25 = BM25Okapi(tokenized_corpus)
-
-    def _tokenize(self, text):
-        return text.split()  # FIXME: needs more sophisticated tokenization
+    async def _scores(self, query: str) -> np.ndarray:
+        """Scores of the tools of the index, normalized so that the best possible score is 1"""
+        raise NotImplementedError
 
-    async def recall_tools(self, context: str = "", plan: Plan = None, topk: int = 20) -> list[Tool]:
+    async def recall_tools_with_scores(
+        self, context: str = "", plan: Plan = None, topk: int = 20
+    ) -> list[tuple[Tool, Optional[float]]]:
         query = plan.current_task.instruction if plan else context
 
-        query_tokens = self._tokenize(query)
-        doc_scores = self.bm25.get_scores(query_tokens)
-        top_indexes = np.argsort(doc_scores)[::-1][:topk]
-        recalled_tools = [list(self.tools.values())[index] for index in top_indexes]
+        doc_scores = await self._scores(query)
+        top_indexes = np.argsort(-doc_scores, kind="stable")[:topk]
+        recalled = [(self.tools[self.index.names[i]], float(doc_scores[i])) for i in top_indexes]
 
         logger.info(
-            f"Recalled tools: \n{[tool.name for tool in recalled_tools]}; Scores: {[np.round(doc_scores[index], 4) for index in top_indexes]}"
+            f"Recalled tools: \n{[tool.name for tool, _ in recalled]}; Scores: {[round(score, 4) for _, score in recalled]}"
         )
 
-        return recalled_tools
+        return recalled
+
+    async def recall_tools(self, context: str = "", plan: Plan = None, topk: int = 20) -> list[Tool]:
+        return [tool for tool, _ in await self.recall_tools_with_scores(context=context, plan=plan, topk=topk)]
+
+
+class BM25ToolRecommender(IndexToolRecommender):
+    """
+    A ToolRecommender using BM25 at the recall stage:
+    1. Recall: Querying tool descriptions with task instruction if plan exists. Otherwise, return all user-specified tools;
+    2. Rank: LLM rank, the same as the default ToolRecommender.
+    """
 
+    async def _scores(self, query: str) -> np.ndarray:
+        scores = self.index.bm25_scores(query)
+        top = scores.max(initial=0)
+        return scores / top if top > 0 else scores
 
-class EmbeddingToolRecommender(ToolRecommender):
+
+class EmbeddingToolRecommender(IndexToolRecommender):
     """
-    NOTE: To be implemented.
     A ToolRecommender using embeddings at the recall stage:
     1. Recall: Use embeddings to calculate the similarity between query and tool info;
     2. Rank: LLM rank, the same as the default ToolRecommender.
+    The tool embeddings are persisted with the index, only the query is embedded for each recommendation.
     """
 
-    def __init__(self, **kwargs):
-        super().__init__(**kwargs)
+    embed_model: Any = None  # defaults to the RAG embedding of the config
 
-    async def recall_tools(self, context: str = "", plan: Plan = None, topk: int = 20) -> list[Tool]:
-        pass
+    async def _embedding_scores(self, query: str) -> np.ndarray:
+        if self.embed_model is None:
+            from metagpt.rag.factories import get_rag_embedding
+
+            self.embed_model = get_rag_embedding()
+        return np.clip(await self.index.embedding_scores(query, self.embed_model), 0, 1)
+
+    async def _scores(self, query: str) -> np.ndarray:
+        return await self._embedding_scores(query)
+
+
+class HybridToolRecommender(EmbeddingToolRecommender):
+    """
+    A ToolRecommender combining BM25 and embeddings at the recall stage:
+    1. Recall: Weighted sum of the normalized BM25 scores and the embedding similarities, BM25 only if embedding fails;
+    2. Rank: LLM rank, the same as the default ToolRecommender.
+    """
+
+    embedding_weight: float = 0.5
+
+    async def _scores(self, query: str) -> np.ndarray:
+        bm25_scores = self.index.bm25_scores(query)
+        top = bm25_scores.max(initial=0)
+        bm25_scores = bm25_scores / top if top > 0 else bm25_scores
+        try:
+            embedding_scores = await self._embedding_scores(query)
+        except Exception as e:
+            logger.warning(f"Embedding recall failed, use BM25 only: {e}")
+            return bm25_scores
+        return (1 - self.embedding_weight) * bm25_scores + self.embedding_weight * embedding_scores
@@ -31,6 +31,8 @@ class CostManager(BaseModel):
     max_budget: float = 10.0
     total_cost: float = 0
     token_costs: dict[str, dict[str, float]] = TOKEN_COSTS  # different model's token cost
+    cache_hits: int = 0  # LLM responses served from the response cache
+    cache_misses: int = 0
 
     def update_cost(self, prompt_tokens, completion_tokens, model):
         """
@@ -86,6 +88,23 @@ class CostManager(BaseModel):
         """
         return self.total_cost
 
+    def update_cache_stats(self, hit: bool):
+        """Record a response cache lookup."""
+        if hit:
+            self.cache_hits += 1
+        else:
+            self.cache_misses += 1
+
+    def get_cache_hit_rate(self) -> float:
+        """
+        Get the ratio of LLM requests served from the response cache.
+
+        Returns:
+        float: The cache hit rate, 0 when the cache was never used.
+        """
+        lookups = self.cache_hits + self.cache_misses
+        return self.cache_hits / lookups if lookups else 0.0
+
     def get_costs(self) -> Costs:
         """Get all costs"""
         return Costs(self.total_prompt_tokens, self.total_completion_tokens, self.total_cost, self.total_budget)
@@ -8,97 +8,214 @@
 """
 from __future__ import annotations
 
+import asyncio
+import atexit
 import json
 import re
+import weakref
 from pathlib import Path
-from typing import Set
+from typing import Dict, List, Optional, Set
 
 from metagpt.utils.common import aread, awrite
 from metagpt.utils.exceptions import handle_exception
 
+# Dependency files with unsaved changes are flushed when the process exits
+_instances: weakref.WeakSet = weakref.WeakSet()
+
 
 class DependencyFile:
     """A class representing a DependencyFile for managing dependencies.
 
+    The dependencies are kept in memory, together with a reverse index of the files depending on each file. Updates
+    mark the index dirty and are written behind: the file is saved once `flush_batch_size` updates are pending, at
+    most `flush_interval` seconds after the first pending update, on `flush`, or when the process exits.
+
     :param workdir: The working directory path for the DependencyFile.
+    :param flush_batch_size: The number of pending updates that triggers a save.
+    :param flush_interval: The max delay in seconds before pending updates are saved.
     """
 
-    def __init__(self, workdir: Path | str):
+    def __init__(self, workdir: Path | str, flush_batch_size: int = 32, flush_interval: float = 1.0):
         """Initialize a DependencyFile instance.
 
         :param workdir: The working directory path for the DependencyFile.
+        :param flush_batch_size: The number of pending updates that triggers a save.
+        :param flush_interval: The max delay in seconds before pending updates are saved.
         """
-        self._dependencies = {}
+        self._dependencies: Dict[str, List[str]] = {}
+        self._dependents: Dict[str, Set[str]] = {}  # reverse index, file -> files depending on it
         self._filename = Path(workdir) / ".dependencies.json"
+        self.flush_batch_size = flush_batch_size
+        self.flush_interval = flush_interval
+        self._loaded = False
+        self._mtime: Optional[float] = None  # mtime of the file when it was last loaded or saved
+        self._dirty = False
+        self._pending = 0
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._flush_task: Optional[asyncio.Task] = None  # referenced, or the loop may collect it before it is done
+        _instances.add(self)
 
     async def load(self):
-        """Load dependencies from the file asynchronously."""
+        """Load dependencies from the file asynchronously, pending updates are saved first."""
+        if self._dirty:
+            await self.save()
+        self._loaded = True
         if not self._filename.exists():
+            self._set_all({})
+            self._mtime = None
             return
+        mtime = self._filename.stat().st_mtime
         json_data = await aread(self._filename)
         json_data = re.sub(r"\\+", "/", json_data)  # Compatible with windows path
-        self._dependencies = json.loads(json_data)
+        self._set_all(json.loads(json_data))
+        self._mtime = mtime
+
+    async def _ensure_loaded(self):
+        """Load the file the first time, and again if it was changed by someone else since."""
+        if not self._loaded:
+            await self.load()
+        elif not self._dirty and self._file_mtime() != self._mtime:
+            await self.load()
+
+    def _file_mtime(self) -> Optional[float]:
+        try:
+            return self._filename.stat().st_mtime
+        except FileNotFoundError:
+            return None
+
+    def _set_all(self, dependencies: Dict[str, List[str]]):
+        self._dependencies = {}
+        self._dependents = {}
+        for key, values in dependencies.items():
+            self._set(key, values)
+
+    def _set(self, key: str, values: Optional[List[str]]):
+        for i in self._dependencies.pop(key, []):
+            dependents = self._dependents.get(i)
+            if dependents is not None:
+                dependents.discard(key)
+                if not dependents:
+                    del self._dependents[i]
+        if values:
+            self._dependencies[key] = values
+            for i in values:
+                self._dependents.setdefault(i, set()).add(key)
 
     @handle_exception
     async def save(self):
         """Save dependencies to the file asynchronously."""
         data = json.dumps(self._dependencies)
         await awrite(filename=self._filename, data=data)
+        self._saved()
+
+    def _saved(self):
+        self._dirty = False
+        self._pending = 0
+        self._mtime = self._file_mtime()
+        if self._flush_handle:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+    async def flush(self):
+        """Save the pending updates, if any."""
+        if self._dirty:
+            await self.save()
+
+    def flush_sync(self):
+        """Save the pending updates synchronously, for callers outside of the event loop."""
+        if not self._dirty:
+            return
+        self._filename.parent.mkdir(parents=True, exist_ok=True)
+        self._filename.write_text(json.dumps(self._dependencies), encoding="utf-8")
+        self._saved()
+
+    async def _schedule_flush(self):
+        self._dirty = True
+        self._pending += 1
+        if self._pending >= self.flush_batch_size or self.flush_interval <= 0:
+            await self.flush()
+        elif not self._flush_handle:
+            loop = asyncio.get_running_loop()
+            self._flush_handle = loop.call_later(self.flush_interval, self._start_flush)
+
+    def _start_flush(self):
+        self._flush_handle = None
+        self._flush_task = asyncio.get_running_loop().create_task(self.flush())
+
+    def _key(self, filename: Path | str) -> str:
+        root = self._filename.parent
+        try:
+            key = Path(filename).relative_to(root).as_posix()
+        except ValueError:
+            key = Path(filename).as_posix()
+        return str(key)
 
     async def update(self, filename: Path | str, dependencies: Set[Path | str], persist=True):
         """Update dependencies for a file asynchronously.
 
         :param filename: The filename or path.
         :param dependencies: The set of dependencies.
-        :param persist: Whether to persist the changes immediately.
+        :param persist: Whether to sync with the file, the update is then written behind.
         """
         if persist:
-            await self.load()
+            await self._ensure_loaded()
 
         root = self._filename.parent
-        try:
-            key = Path(filename).relative_to(root).as_posix()
-        except ValueError:
-            key = filename
-        key = str(key)
-        if dependencies:
-            relative_paths = []
-            for i in dependencies:
-                try:
-                    s = str(Path(i).relative_to(root).as_posix())
-                except ValueError:
-                    s = str(i)
-                relative_paths.append(s)
-
-            self._dependencies[key] = relative_paths
-        elif key in self._dependencies:
-            del self._dependencies[key]
+        key = self._key(filename)
+        relative_paths = []
+        for i in dependencies or []:
+            try:
+                s = str(Path(i).relative_to(root).as_posix())
+            except ValueError:
+                s = str(i)
+            relative_paths.append(s)
+        if not relative_paths and key not in self._dependencies:
+            return
+        self._set(key, relative_paths)
 
         if persist:
-            await self.save()
+            await self._schedule_flush()
 
     async def get(self, filename: Path | str, persist=True):
         """Get dependencies for a file asynchronously.
 
         :param filename: The filename or path.
-        :param persist: Whether to load dependencies from the file immediately.
+        :param persist: Whether to sync with the file first.
         :return: A set of dependencies.
         """
         if persist:
-            await self.load()
+            await self._ensure_loaded()
 
-        root = self._filename.parent
-        try:
-            key = Path(filename).relative_to(root).as_posix()
-        except ValueError:
-            key = Path(filename).as_posix()
-        return set(self._dependencies.get(str(key), {}))
+        return set(self._dependencies.get(self._key(filename), {}))
+
+    async def get_dependents(self, filename: Path | str, persist=True) -> Set[str]:
+        """Get the files depending on a file asynchronously.
+
+        :param filename: The filename or path.
+        :param persist: Whether to sync with the file first.
+        :return: A set of the files whose dependencies include `filename`.
+        """
+        if persist:
+            await self._ensure_loaded()
+
+        return set(self._dependents.get(self._key(filename), set()))
 
     def delete_file(self):
         """Delete the dependency file."""
         self._filename.unlink(missing_ok=True)
+        self._set_all({})
+        self._saved()
 
     @property
     def exists(self):
         """Check if the dependency file exists."""
         return self._filename.exists()
+
+
+@atexit.register
+def _flush_all():
+    for i in list(_instances):
+        try:
+            i.flush_sync()
+        except Exception:
+            pass
@@ -8,11 +8,14 @@
 """
 from __future__ import annotations
 
+import asyncio
 import json
 import os
+import stat
+from collections import OrderedDict, deque
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Set
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Set, Tuple
 
 from metagpt.logs import logger
 from metagpt.schema import Document
@@ -20,6 +23,50 @@ from metagpt.utils.common import aread, awrite
 from metagpt.utils.json_to_markdown import json_to_markdown
 
 
+class ContentCache:
+    """LRU cache of file contents keyed by (path, mtime, size), so that a changed file is never served stale.
+
+    :param max_bytes: The max total length of the cached contents.
+    :param max_file_bytes: Files larger than this are not cached.
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, max_file_bytes: int = 4 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.max_file_bytes = max_file_bytes
+        self._items: OrderedDict[str, Tuple[Tuple[int, int], str]] = OrderedDict()
+        self._size = 0
+
+    def get(self, pathname: str, key: Tuple[int, int]) -> Optional[str]:
+        item = self._items.get(pathname)
+        if item is None or item[0] != key:
+            return None
+        self._items.move_to_end(pathname)
+        return item[1]
+
+    def put(self, pathname: str, key: Tuple[int, int], content: str):
+        self.discard(pathname)
+        if key[1] > self.max_file_bytes:
+            return
+        self._items[pathname] = (key, content)
+        self._size += len(content)
+        while self._size > self.max_bytes and self._items:
+            _, (_, evicted) = self._items.popitem(last=False)
+            self._size -= len(evicted)
+
+    def discard(self, pathname: str):
+        item = self._items.pop(pathname, None)
+        if item:
+            self._size -= len(item[1])
+
+    def clear(self):
+        self._items.clear()
+        self._size = 0
+
+
+# Shared by all the file repositories, which are cheap objects created on demand
+content_cache = ContentCache()
+
+
 class FileRepository:
     """A class representing a FileRepository associated with a Git repository.
 
@@ -39,6 +86,7 @@ class FileRepository:
         """
         self._relative_path = relative_path
         self._git_repo = git_repo
+        self._changed_files = (None, {})  # (status version of the Git repository, changed files)
 
         # Initializing
         self.workdir.mkdir(parents=True, exist_ok=True)
@@ -54,6 +102,9 @@ class FileRepository:
         pathname.parent.mkdir(parents=True, exist_ok=True)
         content = content if content else ""  # avoid `argument must be str, not None` to make it continue
         await awrite(filename=str(pathname), data=content)
+        # a rewrite of the same size within the mtime granularity keeps the (mtime, size) key of the old content
+        content_cache.discard(str(pathname))
+        self._git_repo.notify_changed(pathname)
         logger.info(f"save to: {str(pathname)}")
 
         if dependencies is not None:
@@ -73,6 +124,16 @@ class FileRepository:
         dependency_file = await self._git_repo.get_dependency()
         return await dependency_file.get(pathname)
 
+    async def get_dependents(self, filename: Path | str) -> Set[str]:
+        """Get the files depending on a file.
+
+        :param filename: The filename or path within the repository.
+        :return: Set of the filenames or paths, relative to the Git repository, whose dependencies include the file.
+        """
+        pathname = self.workdir / filename
+        dependency_file = await self._git_repo.get_dependency()
+        return await dependency_file.get_dependents(pathname)
+
     async def get_changed_dependency(self, filename: Path | str) -> Set[str]:
         """Get the dependencies of a file that have changed.
 
@@ -88,39 +149,91 @@ class FileRepository:
                 changed_dependent_files.add(df)
         return changed_dependent_files
 
-    async def get(self, filename: Path | str) -> Document | None:
+    async def get(self, filename: Path | str, use_cache=True) -> Document | None:
         """Read the content of a file.
 
         :param filename: The filename or path within the repository.
+        :param use_cache: Whether to use the content cache, which is keyed by the path, mtime and size of the file.
         :return: The content of the file.
         """
         doc = Document(root_path=str(self.root_path), filename=str(filename))
-        path_name = self.workdir / filename
-        if not path_name.exists():
+        path_name = str(self.workdir / filename)
+        try:
+            st = os.stat(path_name)
+        except (FileNotFoundError, NotADirectoryError):
             return None
-        if not path_name.is_file():
+        if not stat.S_ISREG(st.st_mode):
             return None
-        doc.content = await aread(path_name)
+        key = (st.st_mtime_ns, st.st_size)
+        content = content_cache.get(path_name, key) if use_cache else None
+        if content is None:
+            content = await aread(path_name)
+            if use_cache:
+                content_cache.put(path_name, key, content)
+        doc.content = content
         return doc
 
-    async def get_all(self, filter_ignored=True) -> List[Document]:
+    async def get_many(
+        self, filenames: Iterable[Path | str], max_concurrency: int = 16, use_cache=True
+    ) -> List[Document | None]:
+        """Read the content of several files concurrently.
+
+        :param filenames: The filenames or paths within the repository.
+        :param max_concurrency: The max number of files read at the same time.
+        :param use_cache: Whether to use the content cache.
+        :return: The documents in the order of `filenames`, None for the files that do not exist.
+        """
+        semaphore = asyncio.Semaphore(max(max_concurrency, 1))
+
+        async def _get(filename):
+            async with semaphore:
+                return await self.get(filename, use_cache=use_cache)
+
+        return list(await asyncio.gather(*[_get(i) for i in filenames]))
+
+    async def iter_all(self, filter_ignored=True, max_concurrency: int = 16, use_cache=True) -> AsyncIterator[Document]:
+        """Iterate over the content of all files in the repository.
+
+        Files are read ahead concurrently, but at most `max_concurrency` documents are held at the same time.
+
+        :param filter_ignored: Flag to indicate whether to skip the files ignored by .gitignore.
+        :param max_concurrency: The max number of files read at the same time.
+        :param use_cache: Whether to use the content cache.
+        """
+        pending = deque()
+        try:
+            for filename in self._list_files(filter_ignored=filter_ignored):
+                pending.append(asyncio.create_task(self.get(filename, use_cache=use_cache)))
+                if len(pending) >= max(max_concurrency, 1):
+                    doc = await pending.popleft()
+                    if doc:
+                        yield doc
+            while pending:
+                doc = await pending.popleft()
+                if doc:
+                    yield doc
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def get_all(self, filter_ignored=True, max_concurrency: int = 16) -> List[Document]:
         """Get the content of all files in the repository.
 
+        :param filter_ignored: Flag to indicate whether to skip the files ignored by .gitignore.
+        :param max_concurrency: The max number of files read at the same time.
         :return: List of Document instances representing files.
         """
-        docs = []
+        return await self.get_many(self._list_files(filter_ignored=filter_ignored), max_concurrency=max_concurrency)
+
+    def _list_files(self, filter_ignored=True) -> List[str | Path]:
         if filter_ignored:
-            for f in self.all_files:
-                doc = await self.get(f)
-                docs.append(doc)
-        else:
-            for root, dirs, files in os.walk(str(self.workdir)):
-                for file in files:
-                    file_path = Path(root) / file
-                    relative_path = file_path.relative_to(self.workdir)
-                    doc = await self.get(relative_path)
-                    docs.append(doc)
-        return docs
+            return self.all_files
+        files = []
+        for root, dirs, filenames in os.walk(str(self.workdir)):
+            for file in filenames:
+                file_path = Path(root) / file
+                files.append(file_path.relative_to(self.workdir))
+        return files
 
     @property
     def workdir(self):
@@ -142,6 +255,9 @@ class FileRepository:
         :return: A dictionary where keys are file paths and values are change types.
         """
         files = self._git_repo.changed_files
+        version, relative_files = self._changed_files
+        if version == self._git_repo.status_version:
+            return dict(relative_files)
         relative_files = {}
         for p, ct in files.items():
             if ct.value == "D":  # deleted
@@ -151,7 +267,8 @@ class FileRepository:
             except ValueError:
                 continue
             relative_files[str(rf)] = ct
-        return relative_files
+        self._changed_files = (self._git_repo.status_version, relative_files)
+        return dict(relative_files)
 
     @property
     def all_files(self) -> List:
@@ -231,6 +348,8 @@ class FileRepository:
         if not pathname.exists():
             return
         pathname.unlink(missing_ok=True)
+        self._git_repo.notify_changed(pathname)
+        content_cache.discard(str(pathname))
 
         dependency_file = await self._git_repo.get_dependency()
         await dependency_file.update(filename=pathname, dependencies=None)
@@ -8,18 +8,20 @@
 """
 from __future__ import annotations
 
+import os
 import shutil
+import threading
 from enum import Enum
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, Iterator, List, Optional, Set, Tuple
 
 from git.repo import Repo
 from git.repo.fun import is_git_dir
-from gitignore_parser import parse_gitignore
 
 from metagpt.logs import logger
 from metagpt.utils.dependency_file import DependencyFile
 from metagpt.utils.file_repository import FileRepository
+from metagpt.utils.gitignore import GitignoreMatcher
 
 
 class ChangeType(Enum):
@@ -37,20 +39,32 @@ class GitRepository:
 
     :param local_path: The local path to the Git repository.
     :param auto_init: If True, automatically initializes a new Git repository if the provided path is not a Git repository.
+    :param watch: If True, watch the working directory with inotify instead of checking the mtimes of its files.
 
     Attributes:
         _repository (Repo): The GitPython `Repo` object representing the Git repository.
+
+    The status returned by `changed_files` is cached. It is refreshed incrementally for the files reported by
+    `notify_changed`, by the watcher, or whose mtime or size changed since the last query, and recomputed from
+    scratch when the Git index or the .gitignore changes.
     """
 
-    def __init__(self, local_path=None, auto_init=True):
+    def __init__(self, local_path=None, auto_init=True, watch=False):
         """Initialize a GitRepository instance.
 
         :param local_path: The local path to the Git repository.
         :param auto_init: If True, automatically initializes a new Git repository if the provided path is not a Git repository.
+        :param watch: If True, watch the working directory with inotify instead of checking the mtimes of its files.
         """
         self._repository = None
         self._dependency = None
-        self._gitignore_rules = None
+        self._gitignore_rules: Optional[GitignoreMatcher] = None
+        self._gitignore_mtime = None
+        self._watch = watch
+        self._watcher = None
+        self._status_lock = threading.Lock()
+        self._status_version = 0
+        self._reset_status()
         if local_path:
             self.open(local_path=local_path, auto_init=auto_init)
 
@@ -63,7 +77,8 @@ class GitRepository:
         local_path = Path(local_path)
         if self.is_git_dir(local_path):
             self._repository = Repo(local_path)
-            self._gitignore_rules = parse_gitignore(full_path=str(local_path / ".gitignore"))
+            self._load_gitignore()
+            self._reset_status()
             return
         if not auto_init:
             return
@@ -83,7 +98,80 @@ class GitRepository:
             writer.write("\n".join(ignores))
         self._repository.index.add([".gitignore"])
         self._repository.index.commit("Add .gitignore")
-        self._gitignore_rules = parse_gitignore(full_path=gitignore_filename)
+        self._load_gitignore()
+        self._reset_status()
+
+    def _load_gitignore(self):
+        gitignore_filename = self.workdir / ".gitignore"
+        self._gitignore_mtime = self._mtime(gitignore_filename)
+        self._gitignore_rules = GitignoreMatcher.from_file(full_path=gitignore_filename)
+
+    def _reset_status(self):
+        """Drop the cached status, e.g. when the repository is opened, moved or deleted"""
+        with self._status_lock:
+            self._status: Optional[Dict[str, ChangeType]] = None
+            self._status_stale = False  # set by the watcher thread, the status is then recomputed
+            self._tracked: Set[str] = set()
+            self._index_mtime = None
+            self._file_stats: Dict[str, Tuple[int, int]] = {}
+            self._dirty_paths: Set[str] = set()
+        if self._watcher:
+            self._watcher.close()
+            self._watcher = None
+        if self._watch and self.is_valid:
+            self.start_watching()
+
+    def start_watching(self):
+        """Watch the working directory with inotify, changes are then no longer detected by mtime checks"""
+        from metagpt.utils.workspace_watcher import WorkspaceWatcher
+
+        self._watch = True
+        if self._watcher:
+            return
+        try:
+            self._watcher = WorkspaceWatcher(
+                root=self.workdir, on_change=self._on_watched_change, matcher=self._gitignore_rules
+            )
+        except (ImportError, OSError) as e:
+            logger.warning(f"Fall back to mtime checks, failed to watch {self.workdir}: {e}")
+            self._watch = False
+
+    def stop_watching(self):
+        """Stop watching the working directory, changes are detected by mtime checks again"""
+        self._watch = False
+        if self._watcher:
+            self._watcher.close()
+            self._watcher = None
+            self.notify_changed()  # the file stats are stale
+
+    def _on_watched_change(self, rel: Optional[str]):
+        with self._status_lock:
+            if rel is None:
+                self._status_stale = True
+            else:
+                self._dirty_paths.add(rel)
+
+    def notify_changed(self, *pathnames: Path | str):
+        """Mark files as changed by us, their status is refreshed by the next query.
+
+        :param pathnames: The changed files, absolute or relative to the working directory. If none, the whole
+            status is recomputed.
+        """
+        with self._status_lock:
+            if not pathnames:
+                self._status_stale = True
+                return
+            for pathname in pathnames:
+                try:
+                    rel = Path(pathname).relative_to(self.workdir)
+                except ValueError:
+                    rel = Path(pathname)
+                self._dirty_paths.add(rel.as_posix())
+
+    @property
+    def status_version(self) -> int:
+        """A number changing whenever the cached status changes"""
+        return self._status_version
 
     def add_change(self, files: Dict):
         """Add or remove files from the staging area based on the provided changes.
@@ -106,6 +194,9 @@ class GitRepository:
 
     def delete_repository(self):
         """Delete the entire repository directory."""
+        if self._watcher:
+            self._watcher.close()
+            self._watcher = None
         if self.is_valid:
             try:
                 shutil.rmtree(self._repository.working_dir)
@@ -118,10 +209,108 @@ class GitRepository:
 
         :return: A dictionary where keys are file paths and values are change types.
         """
+        if not self.is_valid:
+            return {}
+        self._refresh_status()
+        return dict(self._status)
+
+    @staticmethod
+    def _mtime(pathname: Path) -> Optional[int]:
+        try:
+            return pathname.stat().st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def _refresh_status(self):
+        with self._status_lock:
+            stale, self._status_stale = self._status_stale, False
+            dirty, self._dirty_paths = self._dirty_paths, set()
+        if self._mtime(self.workdir / ".gitignore") != self._gitignore_mtime:
+            self._load_gitignore()
+            if self._watcher:
+                self._watcher.matcher = self._gitignore_rules
+            stale = True
+        if stale or self._status is None or self._mtime(Path(self._repository.git_dir) / "index") != self._index_mtime:
+            self._compute_status()
+            return
+        if not self._watcher:
+            dirty |= self._scan_changes()
+        if dirty:
+            self._update_status(dirty)
+
+    def _compute_status(self):
+        """Compute the whole status with git"""
+        file_stats = {} if self._watcher else self._stat_files()  # before git, later changes are seen next time
         files = {i: ChangeType.UNTRACTED for i in self._repository.untracked_files}
         changed_files = {f.a_path: ChangeType(f.change_type) for f in self._repository.index.diff(None)}
         files.update(changed_files)
-        return files
+        self._tracked = {path for path, _ in self._repository.index.entries.keys()}
+        self._index_mtime = self._mtime(Path(self._repository.git_dir) / "index")  # after git, which may refresh it
+        self._file_stats = file_stats
+        self._status = files
+        self._status_version += 1
+
+    def _update_status(self, paths: Set[str]):
+        """Recompute the status of some files only"""
+        tracked = [i for i in paths if i in self._tracked]
+        for i in paths:
+            self._status.pop(i, None)
+        batch_size = 256
+        for i in range(0, len(tracked), batch_size):
+            for f in self._repository.index.diff(None, paths=tracked[i : i + batch_size]):
+                self._status[f.a_path] = ChangeType(f.change_type)
+        for i in paths.difference(tracked):
+            if (self.workdir / i).is_file() and not self._gitignore_rules.match(i, is_dir=False):
+                self._status[i] = ChangeType.UNTRACTED
+        self._status_version += 1
+
+    def _stat_files(self) -> Dict[str, Tuple[int, int]]:
+        stats = {}
+        root = str(self.workdir)
+        for pathname in self._walk(self.workdir):
+            try:
+                st = os.stat(pathname)
+            except OSError:
+                continue
+            stats[Path(pathname[len(root) + 1 :]).as_posix()] = (st.st_mtime_ns, st.st_size)
+        return stats
+
+    def _scan_changes(self) -> Set[str]:
+        """Return the files whose mtime or size changed since the last scan"""
+        file_stats = self._stat_files()
+        old = self._file_stats
+        self._file_stats = file_stats
+        return {i for i in file_stats.keys() | old.keys() if file_stats.get(i) != old.get(i)}
+
+    def _walk(self, directory: Path | str, filter_ignored=True) -> Iterator[str]:
+        """Yield the files below a directory, pruning ignored directories and the .git directory"""
+        root = str(self.workdir)
+        stack = [str(directory)]
+        while stack:
+            try:
+                it = os.scandir(stack.pop())
+            except OSError:
+                continue
+            with it:
+                for entry in it:
+                    try:
+                        is_file = entry.is_file()
+                        is_dir = not is_file and entry.is_dir(follow_symlinks=False)
+                    except OSError:
+                        continue
+                    if is_file:
+                        if filter_ignored and self._gitignore_rules.match_relative(
+                            Path(entry.path[len(root) + 1 :]).as_posix(), is_dir=False
+                        ):
+                            continue
+                        yield entry.path
+                        continue
+                    if not is_dir:  # broken symlinks, fifos, sockets, and symlinks to directories
+                        continue
+                    rel = Path(entry.path[len(root) + 1 :]).as_posix()
+                    if rel == ".git" or (filter_ignored and self._gitignore_rules.is_dir_ignored(rel)):
+                        continue
+                    stack.append(entry.path)
 
     @staticmethod
     def is_git_dir(local_path):
@@ -165,6 +354,8 @@ class GitRepository:
 
         :param comments: Comments for the archive commit.
         """
+        if self._dependency:
+            self._dependency.flush_sync()
         logger.info(f"Archive: {list(self.changed_files.keys())}")
         self.add_change(self.changed_files)
         self.commit(comments)
@@ -198,6 +389,9 @@ class GitRepository:
         """
         if self.workdir.name == new_dir_name:
             return
+        if self._dependency:
+            self._dependency.flush_sync()
+            self._dependency = None  # bound to the old directory
         new_path = self.workdir.parent / new_dir_name
         if new_path.exists():
             logger.info(f"Delete directory {str(new_path)}")
@@ -218,7 +412,8 @@ class GitRepository:
                 return
         logger.info(f"Rename directory {str(self.workdir)} to {str(new_path)}")
         self._repository = Repo(new_path)
-        self._gitignore_rules = parse_gitignore(full_path=str(new_path / ".gitignore"))
+        self._load_gitignore()
+        self._reset_status()
 
     def get_files(self, relative_path: Path | str, root_relative_path: Path | str = None, filter_ignored=True) -> List:
         """
@@ -247,21 +442,14 @@ class GitRepository:
             directory_path = Path(self.workdir) / relative_path
             if not directory_path.exists():
                 return []
-            for file_path in directory_path.iterdir():
-                if file_path.is_file():
-                    rpath = file_path.relative_to(root_relative_path)
-                    files.append(str(rpath))
-                else:
-                    subfolder_files = self.get_files(
-                        relative_path=file_path, root_relative_path=root_relative_path, filter_ignored=False
-                    )
-                    files.extend(subfolder_files)
+            if filter_ignored and self._gitignore_rules.match(directory_path, is_dir=True):
+                return []
+            # Ignored directories are pruned during the walk instead of filtering their files one by one
+            for pathname in self._walk(directory_path, filter_ignored=filter_ignored):
+                files.append(str(Path(pathname).relative_to(root_relative_path)))
         except Exception as e:
             logger.error(f"Error: {e}")
-        if not filter_ignored:
-            return files
-        filtered_files = self.filter_gitignore(filenames=files, root_relative_path=root_relative_path)
-        return filtered_files
+        return files
 
     def filter_gitignore(self, filenames: List[str], root_relative_path: Path | str = None) -> List[str]:
         """
@@ -0,0 +1,169 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+@File    : gitignore.py
+@Desc    : Compiled .gitignore matcher. All the patterns of a .gitignore are compiled once into a single regular
+    expression when there are no negations, and ignored directories are cached so that walks can prune them.
+"""
+from __future__ import annotations
+
+import os
+import re
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional
+
+
+class GitignoreRule(NamedTuple):
+    pattern: str
+    regex: str
+    negation: bool
+    directory_only: bool
+
+
+def _translate(pattern: str) -> str:
+    """Translate a gitignore glob into a regular expression matching a path relative to the .gitignore directory"""
+    i, n, res = 0, len(pattern), []
+    while i < n:
+        c = pattern[i]
+        if pattern.startswith("**/", i):
+            res.append("(?:.*/)?")  # zero or more directories
+            i += 3
+            continue
+        if pattern.startswith("**", i):
+            res.append(".*")
+            i += 2
+            continue
+        if c == "*":
+            res.append("[^/]*")
+        elif c == "?":
+            res.append("[^/]")
+        elif c == "[":
+            j = pattern.find("]", i + 2)
+            if j < 0:
+                res.append(re.escape(c))
+            else:
+                body = pattern[i + 1 : j].replace("\\", "\\\\")
+                if body.startswith("!"):
+                    body = "^" + body[1:]
+                res.append(f"[{body}]")
+                i = j + 1
+                continue
+        elif c == "\\" and i + 1 < n:
+            res.append(re.escape(pattern[i + 1]))
+            i += 2
+            continue
+        else:
+            res.append(re.escape(c))
+        i += 1
+    return "".join(res)
+
+
+def parse_rule(line: str) -> Optional[GitignoreRule]:
+    """Parse a line of .gitignore, return None for blank lines and comments"""
+    line = line.rstrip("\r\n")
+    if not line.strip() or line.startswith("#"):
+        return None
+    line = re.sub(r"(?<!\\)\s+$", "", line)
+    pattern = line
+    negation = line.startswith("!")
+    if negation:
+        line = line[1:]
+    directory_only = line.endswith("/")
+    line = line.rstrip("/")
+    if not line:
+        return None
+    anchored = "/" in line
+    body = _translate(line.lstrip("/"))
+    regex = f"^{body}$" if anchored else f"^(?:.*/)?{body}$"
+    return GitignoreRule(pattern=pattern, regex=regex, negation=negation, directory_only=directory_only)
+
+
+class GitignoreMatcher:
+    """A callable matching paths against the rules of a .gitignore, compatible with `parse_gitignore`.
+
+    :param base_path: The directory of the .gitignore, the rules apply to the paths below it.
+    :param rules: The parsed rules, in file order.
+    """
+
+    def __init__(self, base_path: Path | str, rules: List[GitignoreRule] = None):
+        self.base_path = str(Path(base_path).resolve())
+        self.rules = rules or []
+        self._has_negation = any(i.negation for i in self.rules)
+        self._regexes = [re.compile(i.regex) for i in self.rules]
+        self._all = self._combine(self.rules)
+        self._files = self._combine([i for i in self.rules if not i.directory_only])
+        self._dir_cache: Dict[str, bool] = {}
+
+    @classmethod
+    def from_file(cls, full_path: Path | str, base_path: Path | str = None) -> GitignoreMatcher:
+        """Compile a .gitignore file, a missing file ignores nothing"""
+        full_path = Path(full_path)
+        base_path = base_path or full_path.parent
+        try:
+            lines = full_path.read_text(encoding="utf-8").splitlines()
+        except FileNotFoundError:
+            lines = []
+        return cls(base_path=base_path, rules=[i for i in map(parse_rule, lines) if i])
+
+    @staticmethod
+    def _combine(rules: List[GitignoreRule]):
+        if not rules:
+            return None
+        return re.compile("|".join(f"(?:{i.regex})" for i in rules))
+
+    def relative(self, path: Path | str) -> Optional[str]:
+        """Return the posix path relative to the base path, or None if the path is outside of it"""
+        path = str(path)
+        if not os.path.isabs(path):
+            return Path(path).as_posix()
+        if path == self.base_path:
+            return ""
+        if not path.startswith(self.base_path + os.sep):
+            path = str(Path(path).resolve())
+            if not path.startswith(self.base_path + os.sep):
+                return None
+        return Path(path[len(self.base_path) + 1 :]).as_posix()
+
+    def match_relative(self, rel: str, is_dir: bool) -> bool:
+        """Match a relative path against the rules, without checking its parent directories"""
+        if not self.rules or not rel:
+            return False
+        if not self._has_negation:
+            regex = self._all if is_dir else self._files
+            return bool(regex and regex.match(rel))
+        for rule, regex in zip(reversed(self.rules), reversed(self._regexes)):
+            if rule.directory_only and not is_dir:
+                continue
+            if regex.match(rel):
+                return not rule.negation
+        return False
+
+    def is_dir_ignored(self, rel: str) -> bool:
+        """Whether a relative directory or one of its parents is ignored, cached"""
+        ignored = self._dir_cache.get(rel)
+        if ignored is None:
+            parent = rel.rpartition("/")[0]
+            ignored = (bool(parent) and self.is_dir_ignored(parent)) or self.match_relative(rel, is_dir=True)
+            self._dir_cache[rel] = ignored
+        return ignored
+
+    def match(self, path: Path | str, is_dir: bool = None) -> bool:
+        """Whether a path is ignored, either itself or because one of its parent directories is ignored.
+
+        :param path: An absolute path, or a path relative to the base path.
+        :param is_dir: Whether the path is a directory, checked on the file system if None.
+        """
+        rel = self.relative(path)
+        if not rel:
+            return False
+        if is_dir is None:
+            is_dir = os.path.isdir(os.path.join(self.base_path, rel))
+        if is_dir:
+            return self.is_dir_ignored(rel)
+        parent = rel.rpartition("/")[0]
+        if parent and self.is_dir_ignored(parent):
+            return True
+        return self.match_relative(rel, is_dir=False)
+
+    def __call__(self, path: Path | str) -> bool:
+        return self.match(path)
@@ -0,0 +1,211 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+@File    : response_cache.py
+@Desc    : Content-addressed cache of LLM completion texts, keyed on a hash of the provider, endpoint, model, messages
+    and the generation parameters that influence the output. Used by `BaseLLM` when `LLMConfig.cache_type` is set, so replays
+    and regression runs of byte-identical prompts skip the provider entirely.
+"""
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+
+from metagpt.configs.llm_config import LLMConfig
+from metagpt.const import DEFAULT_WORKSPACE_ROOT
+
+DEFAULT_RESPONSE_CACHE_PATH = DEFAULT_WORKSPACE_ROOT / ".llm_cache" / "responses.db"
+
+# LLMConfig fields that change the completion for the same messages
+CACHE_KEY_PARAMS = (
+    "max_token",
+    "temperature",
+    "top_p",
+    "top_k",
+    "repetition_penalty",
+    "stop",
+    "presence_penalty",
+    "frequency_penalty",
+    "best_of",
+    "n",
+    "seed",
+)
+
+
+def make_cache_key(config: LLMConfig, model: str, messages: list[dict]) -> str:
+    """Return the content address of a completion request."""
+    payload = {
+        "provider": config.api_type.value,
+        "base_url": config.base_url,
+        "api_version": config.api_version,  # Azure deployments answer differently across api versions
+        "model": model,
+        "messages": messages,
+        "params": {name: getattr(config, name) for name in CACHE_KEY_PARAMS},
+    }
+    raw = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class BaseResponseCache(ABC):
+    """Response cache with TTL and size-based (least recently used) eviction."""
+
+    def __init__(self, max_size: int = 4096, ttl: Optional[int] = None):
+        self.max_size = max_size
+        self.ttl = ttl
+
+    def _is_expired(self, created: float) -> bool:
+        return bool(self.ttl) and time.time() - created > self.ttl
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached completion text, or None on a miss"""
+
+    @abstractmethod
+    def set(self, key: str, value: str):
+        """Store a completion text"""
+
+    @abstractmethod
+    def delete(self, key: str):
+        """Drop an entry, e.g. a completion its caller could not use"""
+
+    @abstractmethod
+    def clear(self):
+        """Drop all entries"""
+
+    async def aget(self, key: str) -> Optional[str]:
+        return self.get(key)
+
+    async def aset(self, key: str, value: str):
+        self.set(key, value)
+
+    async def adelete(self, key: str):
+        self.delete(key)
+
+
+class MemoryResponseCache(BaseResponseCache):
+    """In-process LRU cache."""
+
+    def __init__(self, max_size: int = 4096, ttl: Optional[int] = None):
+        super().__init__(max_size=max_size, ttl=ttl)
+        self._entries: OrderedDict[str, tuple[float, str]] = OrderedDict()
+
+    def get(self, key: str) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        created, value = entry
+        if self._is_expired(created):
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: str):
+        self._entries[key] = (time.time(), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def delete(self, key: str):
+        self._entries.pop(key, None)
+
+    def clear(self):
+        self._entries.clear()
+
+
+class SQLiteResponseCache(BaseResponseCache):
+    """On-disk cache in a single SQLite file, shared by processes replaying the same runs."""
+
+    def __init__(self, path: Path = DEFAULT_RESPONSE_CACHE_PATH, max_size: int = 4096, ttl: Optional[int] = None):
+        super().__init__(max_size=max_size, ttl=ttl)
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses "
+                "(key TEXT PRIMARY KEY, value TEXT NOT NULL, created REAL NOT NULL, accessed REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)")
+        self._count = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock, self._conn:
+            row = self._conn.execute("SELECT value, created FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            value, created = row
+            if self._is_expired(created):
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._count -= 1
+                return None
+            self._conn.execute("UPDATE responses SET accessed = ? WHERE key = ?", (time.time(), key))
+            return value
+
+    def set(self, key: str, value: str):
+        now = time.time()
+        with self._lock, self._conn:
+            exists = self._conn.execute("SELECT 1 FROM responses WHERE key = ?", (key,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, created, accessed) VALUES (?, ?, ?, ?)",
+                (key, value, now, now),
+            )
+            if not exists:
+                self._count += 1
+            overflow = self._count - self.max_size
+            if overflow > 0:
+                self._conn.execute(
+                    "DELETE FROM responses WHERE key IN (SELECT key FROM responses ORDER BY accessed LIMIT ?)",
+                    (overflow,),
+                )
+                self._count -= overflow
+
+    def delete(self, key: str):
+        with self._lock, self._conn:
+            self._count -= self._conn.execute("DELETE FROM responses WHERE key = ?", (key,)).rowcount
+
+    def clear(self):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM responses")
+            self._count = 0
+
+    async def aget(self, key: str) -> Optional[str]:
+        """`get` in a worker thread, so that disk IO does not block the event loop"""
+        return await asyncio.to_thread(self.get, key)
+
+    async def aset(self, key: str, value: str):
+        await asyncio.to_thread(self.set, key, value)
+
+    async def adelete(self, key: str):
+        await asyncio.to_thread(self.delete, key)
+
+
+_caches: dict[tuple, BaseResponseCache] = {}
+
+
+def get_response_cache(config: LLMConfig) -> Optional[BaseResponseCache]:
+    """Return the cache configured by `config`, shared by every LLM with the same cache settings."""
+    if not config.cache_type:
+        return None
+    key = (config.cache_type, config.cache_path, config.cache_max_size, config.cache_ttl)
+    cache = _caches.get(key)
+    if cache is None:
+        if config.cache_type == "memory":
+            cache = MemoryResponseCache(max_size=config.cache_max_size, ttl=config.cache_ttl)
+        elif config.cache_type == "sqlite":
+            cache = SQLiteResponseCache(
+                path=Path(config.cache_path) if config.cache_path else DEFAULT_RESPONSE_CACHE_PATH,
+                max_size=config.cache_max_size,
+                ttl=config.cache_ttl,
+            )
+        else:
+            raise ValueError(f"Unsupported response cache type: {config.cache_type}")
+        _caches[key] = cache
+    return cache
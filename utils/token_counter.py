@@ -10,7 +10,12 @@ ref3: https://github.com/Significant-Gravitas/Auto-GPT/blob/master/autogpt/llm/t
 ref4: https://github.com/hwchase17/langchain/blob/master/langchain/chat_models/openai.py
 ref5: https://ai.google.dev/models/gemini
 """
-import anthropic
+import hashlib
+import math
+import re
+from collections import OrderedDict
+from typing import Callable, Protocol
+
 import tiktoken
 from openai.types import CompletionUsage
 from openai.types.chat import ChatCompletionChunk
@@ -401,89 +406,249 @@ SPARK_TOKENS = {
 }
 
 
+OPENAI_TOKENS_PER_MESSAGE_3_MODELS = {
+    "gpt-3.5-turbo-0613",
+    "gpt-3.5-turbo-16k-0613",
+    "gpt-35-turbo",
+    "gpt-35-turbo-16k",
+    "gpt-3.5-turbo-16k",
+    "gpt-3.5-turbo-1106",
+    "gpt-3.5-turbo-0125",
+    "gpt-4-0314",
+    "gpt-4-32k-0314",
+    "gpt-4-0613",
+    "gpt-4-32k-0613",
+    "gpt-4-turbo",
+    "gpt-4-turbo-preview",
+    "gpt-4-0125-preview",
+    "gpt-4-1106-preview",
+    "gpt-4-turbo",
+    "gpt-4-vision-preview",
+    "gpt-4-1106-vision-preview",
+    "gpt-4o",
+    "gpt-4o-2024-05-13",
+    "gpt-4o-2024-08-06",
+    "gpt-4o-mini",
+    "gpt-4o-mini-2024-07-18",
+    "o1-preview",
+    "o1-preview-2024-09-12",
+    "o1-mini",
+    "o1-mini-2024-09-12",
+}
+
+# Models counted with `LocalTokenEstimator` unless another estimator is registered via `TokenCounter.register`.
+LOCAL_ESTIMATOR_MODELS = (
+    "claude",
+    "deepseek",
+    "gemini",
+    "glm",
+    "qwen",
+    "llama",
+    "mistral",
+    "mixtral",
+    "moonshot",
+    "ernie",
+    "doubao",
+)
+
+_CJK_CHARS = "\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af"
+
+
+class TokenEstimator(Protocol):
+    """Count tokens of plain text for one tokenizer. `name` identifies the tokenizer in the count cache."""
+
+    name: str
+
+    def count(self, text: str) -> int:
+        ...
+
+    def count_batch(self, texts: list[str]) -> list[int]:
+        ...
+
+
+class TiktokenEstimator:
+    """Exact counting with the tiktoken encoding of a model, falling back to cl100k_base."""
+
+    def __init__(self, model: str):
+        try:
+            self.encoding = tiktoken.encoding_for_model(model)
+        except KeyError:
+            logger.info(f"Warning: model {model} not found in tiktoken. Using cl100k_base encoding.")
+            self.encoding = tiktoken.get_encoding("cl100k_base")
+        self.name = self.encoding.name
+
+    def count(self, text: str) -> int:
+        return len(self.encoding.encode(text))
+
+    def count_batch(self, texts: list[str]) -> list[int]:
+        return [len(tokens) for tokens in self.encoding.encode_batch(texts)]
+
+
+class LocalTokenEstimator:
+    """Offline, deterministic estimation for models without a local tokenizer.
+
+    Each CJK character and each punctuation mark counts as one token, other words as one token per 4 characters.
+    """
+
+    name = "local"
+    _pattern = re.compile(f"[{_CJK_CHARS}]|[^\\W{_CJK_CHARS}]+|[^\\w\\s]")
+
+    def count(self, text: str) -> int:
+        return sum(math.ceil(len(piece) / 4) for piece in self._pattern.findall(text))
+
+    def count_batch(self, texts: list[str]) -> list[int]:
+        return [self.count(text) for text in texts]
+
+
+class TokenCounter:
+    """Token counting service.
+
+    Estimators are created once per model, and per-text counts are memoized in a size-bounded LRU keyed by
+    (tokenizer, content hash), so repeated messages in a conversation are never re-encoded. Nothing here constructs
+    API clients or touches the network.
+    """
+
+    def __init__(self, max_cache_size: int = 8192):
+        self.max_cache_size = max_cache_size
+        self.hits = 0
+        self.misses = 0
+        self._cache: OrderedDict[tuple[str, bytes], int] = OrderedDict()
+        self._estimators: dict[str, TokenEstimator] = {}
+        self._factories: list[tuple[str, Callable[[str], TokenEstimator]]] = [
+            (keyword, lambda _: LocalTokenEstimator()) for keyword in LOCAL_ESTIMATOR_MODELS
+        ]
+
+    def register(self, keyword: str, factory: Callable[[str], TokenEstimator]):
+        """Use `factory(model)` to build the estimator for every model whose name contains `keyword`."""
+        self._factories.insert(0, (keyword, factory))
+        self._estimators = {}
+
+    def is_estimated(self, model: str) -> bool:
+        """Whether `model` is counted by a registered estimator rather than the default tiktoken one."""
+        return any(keyword in model for keyword, _ in self._factories)
+
+    def get_estimator(self, model: str) -> TokenEstimator:
+        estimator = self._estimators.get(model)
+        if estimator is None:
+            factory = next((f for keyword, f in self._factories if keyword in model), TiktokenEstimator)
+            estimator = self._estimators[model] = factory(model)
+            if isinstance(estimator, LocalTokenEstimator):
+                logger.warning(f"No tokenizer for {model}, its token counts are estimated and may differ from usage.")
+        return estimator
+
+    def clear(self):
+        self._cache.clear()
+        self.hits = self.misses = 0
+
+    def count_texts(self, texts: list[str], model: str) -> list[int]:
+        """Count tokens of each text; cache misses are encoded in a single batch."""
+        estimator = self.get_estimator(model)
+        counts: list[int] = [0] * len(texts)
+        misses: dict[tuple[str, bytes], list[int]] = {}
+        for i, text in enumerate(texts):
+            key = (estimator.name, hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).digest())
+            cached = self._cache.get(key)
+            if cached is None:
+                misses.setdefault(key, []).append(i)
+                continue
+            self._cache.move_to_end(key)
+            counts[i] = cached
+            self.hits += 1
+        if misses:
+            self.misses += len(misses)
+            miss_counts = estimator.count_batch([texts[indices[0]] for indices in misses.values()])
+            for (key, indices), num_tokens in zip(misses.items(), miss_counts):
+                self._cache[key] = num_tokens
+                for i in indices:
+                    counts[i] = num_tokens
+            while len(self._cache) > self.max_cache_size:
+                self._cache.popitem(last=False)
+        return counts
+
+    def count_text(self, text: str, model: str) -> int:
+        return self.count_texts([text], model)[0]
+
+    def count_messages(self, messages: list[dict], model: str) -> int:
+        return self.count_messages_batch([messages], model)[0]
+
+    def count_messages_batch(self, batch: list[list[dict]], model: str) -> list[int]:
+        """Return the number of tokens used by each list of messages in `batch`."""
+        if "gpt-3.5-turbo" == model:
+            logger.info("Warning: gpt-3.5-turbo may update over time. Returning num tokens assuming gpt-3.5-turbo-0125.")
+            model = "gpt-3.5-turbo-0125"
+        elif "gpt-4" == model:
+            logger.info("Warning: gpt-4 may update over time. Returning num tokens assuming gpt-4-0613.")
+            model = "gpt-4-0613"
+
+        if self.is_estimated(model):
+            # no chat template overhead is known, count the raw values only
+            tokens_per_message, tokens_per_name, tokens_per_reply = 0, 0, 0
+        elif model in OPENAI_TOKENS_PER_MESSAGE_3_MODELS:
+            tokens_per_message = 3  # # every reply is primed with <|start|>assistant<|message|>
+            tokens_per_name = 1
+            tokens_per_reply = 3
+        elif model == "gpt-3.5-turbo-0301":
+            tokens_per_message = 4  # every message follows <|start|>{role/name}\n{content}<|end|>\n
+            tokens_per_name = -1  # if there's a name, the role is omitted
+            tokens_per_reply = 3
+        elif "open-llm-model" == model:
+            """
+            For self-hosted open_llm api, they include lots of different models. The message tokens calculation is
+            inaccurate. It's a reference result.
+            """
+            tokens_per_message = 0  # ignore conversation message template prefix
+            tokens_per_name = 0
+            tokens_per_reply = 3
+        else:
+            raise NotImplementedError(
+                f"num_tokens_from_messages() is not implemented for model {model}. "
+                f"See https://cookbook.openai.com/examples/how_to_count_tokens_with_tiktoken "
+                f"for information on how messages are converted to tokens."
+            )
+
+        texts = []
+        for messages in batch:
+            for message in messages:
+                for value in message.values():
+                    texts.append(_message_value_text(value))
+        counts = iter(self.count_texts(texts, model))
+
+        results = []
+        for messages in batch:
+            num_tokens = 0
+            for message in messages:
+                num_tokens += tokens_per_message
+                for key in message:
+                    num_tokens += next(counts)
+                    if key == "name":
+                        num_tokens += tokens_per_name
+            num_tokens += tokens_per_reply  # every reply is primed with <|start|>assistant<|message|>
+            results.append(num_tokens)
+        return results
+
+
+def _message_value_text(value) -> str:
+    if isinstance(value, list):
+        # for gpt-4v
+        content = value
+        for item in value:
+            if isinstance(item, dict) and item.get("type") in ["text"]:
+                content = item.get("text", "")
+        value = content
+    return value if isinstance(value, str) else str(value)
+
+
+TOKEN_COUNTER = TokenCounter()
+
+
 def count_input_tokens(messages, model="gpt-3.5-turbo-0125"):
     """Return the number of tokens used by a list of messages."""
-    if "claude" in model:
-        # rough estimation for models newer than claude-2.1
-        vo = anthropic.Client()
-        num_tokens = 0
-        for message in messages:
-            for key, value in message.items():
-                num_tokens += vo.count_tokens(str(value))
-        return num_tokens
-    try:
-        encoding = tiktoken.encoding_for_model(model)
-    except KeyError:
-        logger.info(f"Warning: model {model} not found in tiktoken. Using cl100k_base encoding.")
-        encoding = tiktoken.get_encoding("cl100k_base")
-    if model in {
-        "gpt-3.5-turbo-0613",
-        "gpt-3.5-turbo-16k-0613",
-        "gpt-35-turbo",
-        "gpt-35-turbo-16k",
-        "gpt-3.5-turbo-16k",
-        "gpt-3.5-turbo-1106",
-        "gpt-3.5-turbo-0125",
-        "gpt-4-0314",
-        "gpt-4-32k-0314",
-        "gpt-4-0613",
-        "gpt-4-32k-0613",
-        "gpt-4-turbo",
-        "gpt-4-turbo-preview",
-        "gpt-4-0125-preview",
-        "gpt-4-1106-preview",
-        "gpt-4-turbo",
-        "gpt-4-vision-preview",
-        "gpt-4-1106-vision-preview",
-        "gpt-4o",
-        "gpt-4o-2024-05-13",
-        "gpt-4o-2024-08-06",
-        "gpt-4o-mini",
-        "gpt-4o-mini-2024-07-18",
-        "o1-preview",
-        "o1-preview-2024-09-12",
-        "o1-mini",
-        "o1-mini-2024-09-12",
-    }:
-        tokens_per_message = 3  # # every reply is primed with <|start|>assistant<|message|>
-        tokens_per_name = 1
-    elif model == "gpt-3.5-turbo-0301":
-        tokens_per_message = 4  # every message follows <|start|>{role/name}\n{content}<|end|>\n
-        tokens_per_name = -1  # if there's a name, the role is omitted
-    elif "gpt-3.5-turbo" == model:
-        logger.info("Warning: gpt-3.5-turbo may update over time. Returning num tokens assuming gpt-3.5-turbo-0125.")
-        return count_input_tokens(messages, model="gpt-3.5-turbo-0125")
-    elif "gpt-4" == model:
-        logger.info("Warning: gpt-4 may update over time. Returning num tokens assuming gpt-4-0613.")
-        return count_input_tokens(messages, model="gpt-4-0613")
-    elif "open-llm-model" == model:
-        """
-        For self-hosted open_llm api, they include lots of different models. The message tokens calculation is
-        inaccurate. It's a reference result.
-        """
-        tokens_per_message = 0  # ignore conversation message template prefix
-        tokens_per_name = 0
-    else:
-        raise NotImplementedError(
-            f"num_tokens_from_messages() is not implemented for model {model}. "
-            f"See https://cookbook.openai.com/examples/how_to_count_tokens_with_tiktoken "
-            f"for information on how messages are converted to tokens."
-        )
-    num_tokens = 0
-    for message in messages:
-        num_tokens += tokens_per_message
-        for key, value in message.items():
-            content = value
-            if isinstance(value, list):
-                # for gpt-4v
-                for item in value:
-                    if isinstance(item, dict) and item.get("type") in ["text"]:
-                        content = item.get("text", "")
-            num_tokens += len(encoding.encode(content))
-            if key == "name":
-                num_tokens += tokens_per_name
-    num_tokens += 3  # every reply is primed with <|start|>assistant<|message|>
-    return num_tokens
+    return TOKEN_COUNTER.count_messages(messages, model)
+
+
+def count_input_tokens_batch(batch: list[list[dict]], model="gpt-3.5-turbo-0125") -> list[int]:
+    """Return the number of tokens used by each list of messages in `batch`."""
+    return TOKEN_COUNTER.count_messages_batch(batch, model)
 
 
 def count_output_tokens(string: str, model: str) -> int:
@@ -497,16 +662,7 @@ def count_output_tokens(string: str, model: str) -> int:
     Returns:
         int: The number of tokens in the text string.
     """
-    if "claude" in model:
-        vo = anthropic.Client()
-        num_tokens = vo.count_tokens(string)
-        return num_tokens
-    try:
-        encoding = tiktoken.encoding_for_model(model)
-    except KeyError:
-        logger.info(f"Warning: model {model} not found in tiktoken. Using cl100k_base encoding.")
-        encoding = tiktoken.get_encoding("cl100k_base")
-    return len(encoding.encode(string))
+    return TOKEN_COUNTER.count_text(string, model)
 
 
 def get_max_completion_tokens(messages: list[dict], model: str, default: int) -> int:
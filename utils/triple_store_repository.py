@@ -0,0 +1,301 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+@File    : triple_store_repository.py
+@Desc    : Graph repository based on an in-memory triple store.
+    Triples are kept in SPO/POS/OSP hash indexes, so `select` and `delete` cost O(matches) for any combination of
+    fixed subject, predicate and object, and several predicates can link the same pair of nodes. Besides the
+    node-link JSON format shared with `DiGraphRepository`, the repository can be persisted in a compact binary format.
+"""
+from __future__ import annotations
+
+import json
+import struct
+import sys
+import zlib
+from array import array
+from pathlib import Path
+from typing import Dict, Iterable, List, Tuple
+
+from metagpt.utils.common import aread, aread_bin, awrite, awrite_bin
+from metagpt.utils.graph_repository import SPO, GraphRepository
+
+BINARY_MAGIC = b"TSR1"
+
+# An insertion-ordered set
+_OrderedSet = Dict[str, None]
+
+
+class TripleStoreRepository(GraphRepository):
+    """Graph repository based on an indexed triple store."""
+
+    def __init__(self, name: str | Path, **kwargs):
+        super().__init__(name=str(name), **kwargs)
+        self._clear()
+
+    def _clear(self):
+        self._nodes: _OrderedSet = {}
+        self._spo: Dict[str, Dict[str, _OrderedSet]] = {}
+        self._pos: Dict[str, Dict[str, _OrderedSet]] = {}
+        self._osp: Dict[str, Dict[str, _OrderedSet]] = {}
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _add(self, subject: str, predicate: str, object_: str):
+        objects = self._spo.setdefault(subject, {}).setdefault(predicate, {})
+        if object_ in objects:
+            return
+        objects[object_] = None
+        self._pos.setdefault(predicate, {}).setdefault(object_, {})[subject] = None
+        self._osp.setdefault(object_, {}).setdefault(subject, {})[predicate] = None
+        self._nodes[subject] = None
+        self._nodes[object_] = None
+        self._count += 1
+
+    @staticmethod
+    def _discard(index: Dict[str, Dict[str, _OrderedSet]], a: str, b: str, c: str):
+        inner = index[a]
+        inner[b].pop(c, None)
+        if not inner[b]:
+            del inner[b]
+            if not inner:
+                del index[a]
+
+    def _remove(self, subject: str, predicate: str, object_: str):
+        self._discard(self._spo, subject, predicate, object_)
+        self._discard(self._pos, predicate, object_, subject)
+        self._discard(self._osp, object_, subject, predicate)
+        self._count -= 1
+
+    async def insert(self, subject: str, predicate: str, object_: str):
+        """Insert a new triple into the triple store.
+
+        Args:
+            subject (str): The subject of the triple.
+            predicate (str): The predicate describing the relationship.
+            object_ (str): The object of the triple.
+
+        Example:
+            await my_triple_store_repo.insert(subject="Node1", predicate="connects_to", object_="Node2")
+            # Adds a relationship: Node1 connects_to Node2
+        """
+        self._add(subject, predicate, object_)
+
+    async def insert_many(self, triples: Iterable[SPO | Tuple[str, str, str]]):
+        """Insert a batch of triples into the triple store.
+
+        Args:
+            triples (Iterable[SPO | Tuple[str, str, str]]): SPO objects or (subject, predicate, object) tuples.
+        """
+        for triple in triples:
+            if isinstance(triple, SPO):
+                self._add(triple.subject, triple.predicate, triple.object_)
+            else:
+                self._add(*triple)
+
+    def _match(self, subject: str = None, predicate: str = None, object_: str = None) -> Iterable[Tuple[str, str, str]]:
+        if subject:
+            predicates = self._spo.get(subject, {})
+            if predicate:
+                objects = predicates.get(predicate, {})
+                if object_:
+                    if object_ in objects:
+                        yield subject, predicate, object_
+                    return
+                for o in objects:
+                    yield subject, predicate, o
+                return
+            if object_:
+                for p in self._osp.get(object_, {}).get(subject, {}):
+                    yield subject, p, object_
+                return
+            for p, objects in predicates.items():
+                for o in objects:
+                    yield subject, p, o
+            return
+        if predicate:
+            objects = self._pos.get(predicate, {})
+            if object_:
+                for s in objects.get(object_, {}):
+                    yield s, predicate, object_
+                return
+            for o, subjects in objects.items():
+                for s in subjects:
+                    yield s, predicate, o
+            return
+        if object_:
+            for s, predicates in self._osp.get(object_, {}).items():
+                for p in predicates:
+                    yield s, p, object_
+            return
+        for s, predicates in self._spo.items():
+            for p, objects in predicates.items():
+                for o in objects:
+                    yield s, p, o
+
+    async def select(self, subject: str = None, predicate: str = None, object_: str = None) -> List[SPO]:
+        """Retrieve triples from the triple store based on specified criteria.
+
+        Args:
+            subject (str, optional): The subject of the triple to filter by.
+            predicate (str, optional): The predicate describing the relationship to filter by.
+            object_ (str, optional): The object of the triple to filter by.
+
+        Returns:
+            List[SPO]: A list of SPO objects representing the selected triples.
+        """
+        return [SPO(subject=s, predicate=p, object_=o) for s, p, o in self._match(subject, predicate, object_)]
+
+    async def delete(self, subject: str = None, predicate: str = None, object_: str = None) -> int:
+        """Delete triples from the triple store based on specified criteria.
+
+        Args:
+            subject (str, optional): The subject of the triple to filter by.
+            predicate (str, optional): The predicate describing the relationship to filter by.
+            object_ (str, optional): The object of the triple to filter by.
+
+        Returns:
+            int: The number of triples deleted from the repository.
+        """
+        rows = list(self._match(subject, predicate, object_))
+        for row in rows:
+            self._remove(*row)
+        return len(rows)
+
+    def json(self) -> str:
+        """Convert the triple store to a node-link JSON string of a multigraph keyed by predicate, as several predicates
+        can link the same pair of nodes. `DiGraphRepository.load_json` reads it as a `MultiDiGraph`."""
+        m = {
+            "directed": True,
+            "multigraph": True,
+            "graph": {},
+            "nodes": [{"id": i} for i in self._nodes],
+            "links": [{"predicate": p, "source": s, "target": o, "key": p} for s, p, o in self._match()],
+        }
+        return json.dumps(m)
+
+    def load_json(self, val: str):
+        """Load a node-link JSON string, as written by `json` or `DiGraphRepository.json`.
+
+        Args:
+            val (str): A JSON-encoded string representing a graph structure.
+
+        Returns:
+            self: Returns the instance of the class with the loaded triples.
+
+        Raises:
+            ValueError: If a link has no predicate.
+        """
+        self._clear()
+        if not val:
+            return self
+        m = json.loads(val)
+        for node in m.get("nodes", []):
+            self._nodes[node["id"]] = None
+        for link in m.get("links", m.get("edges", [])):
+            if link.get("predicate") is None:
+                raise ValueError(f"Link without predicate: {link}")
+            self._add(link["source"], link["predicate"], link["target"])
+        return self
+
+    def dumps_binary(self) -> bytes:
+        """Serialize the triple store as a zlib-compressed string table plus an array of uint32 (s, p, o) ids."""
+        ids: Dict[str, int] = {}
+        for node in self._nodes:
+            ids.setdefault(node, len(ids))
+        triples = array("I")
+        for s, p, o in self._match():
+            triples.extend((ids[s], ids.setdefault(p, len(ids)), ids[o]))
+        strings = [i.encode("utf-8") for i in ids]
+        payload = bytearray(struct.pack("<III", len(strings), len(self._nodes), len(triples) // 3))
+        for i in strings:
+            payload += struct.pack("<I", len(i))
+            payload += i
+        if sys.byteorder == "big":
+            triples.byteswap()
+        payload += triples.tobytes()
+        return BINARY_MAGIC + zlib.compress(bytes(payload))
+
+    def loads_binary(self, data: bytes):
+        """Load the triple store from `dumps_binary` output."""
+        self._clear()
+        if not data:
+            return self
+        if data[: len(BINARY_MAGIC)] != BINARY_MAGIC:
+            raise ValueError("Not a triple store binary file")
+        payload = zlib.decompress(data[len(BINARY_MAGIC) :])
+        n_strings, n_nodes, n_triples = struct.unpack_from("<III", payload, 0)
+        offset = 12
+        strings = []
+        for _ in range(n_strings):
+            (size,) = struct.unpack_from("<I", payload, offset)
+            offset += 4
+            strings.append(payload[offset : offset + size].decode("utf-8"))
+            offset += size
+        for node in strings[:n_nodes]:
+            self._nodes[node] = None
+        triples = array("I")
+        triples.frombytes(payload[offset : offset + n_triples * 3 * 4])
+        if sys.byteorder == "big":
+            triples.byteswap()
+        for i in range(0, len(triples), 3):
+            self._add(strings[triples[i]], strings[triples[i + 1]], strings[triples[i + 2]])
+        return self
+
+    async def save(self, path: str | Path = None):
+        """Save the triple store to a node-link JSON file.
+
+        Args:
+            path (Union[str, Path], optional): The directory path where the JSON file will be saved.
+                If not provided, the default path is taken from the 'root' key in the keyword arguments.
+        """
+        pathname = self._pathname(path).with_suffix(".json")
+        await awrite(filename=pathname, data=self.json(), encoding="utf-8")
+
+    async def save_binary(self, path: str | Path = None):
+        """Save the triple store to a compact binary `.bin` file, see `dumps_binary`."""
+        pathname = self._pathname(path).with_suffix(".bin")
+        await awrite_bin(filename=pathname, data=self.dumps_binary())
+
+    def _pathname(self, path: str | Path = None) -> Path:
+        path = Path(path or self._kwargs.get("root"))
+        if not path.exists():
+            path.mkdir(parents=True, exist_ok=True)
+        return path / self.name
+
+    async def load(self, pathname: str | Path):
+        """Load the triple store from a `.bin` file, or from a node-link JSON file otherwise."""
+        pathname = Path(pathname)
+        if pathname.suffix == ".bin":
+            self.loads_binary(await aread_bin(filename=pathname))
+        else:
+            self.load_json(await aread(filename=pathname, encoding="utf-8"))
+
+    @staticmethod
+    async def load_from(pathname: str | Path) -> GraphRepository:
+        """Create and load a triple store repository from a JSON or binary file.
+
+        Args:
+            pathname (Union[str, Path]): The path to the file to be loaded.
+
+        Returns:
+            GraphRepository: A new instance of the graph repository loaded from the specified file.
+        """
+        pathname = Path(pathname)
+        graph = TripleStoreRepository(name=pathname.stem, root=pathname.parent)
+        if pathname.exists():
+            await graph.load(pathname=pathname)
+        return graph
+
+    @property
+    def root(self) -> str:
+        """Return the root directory path for the graph repository files."""
+        return self._kwargs.get("root")
+
+    @property
+    def pathname(self) -> Path:
+        """Return the path and filename to the graph repository file."""
+        p = Path(self.root) / self.name
+        return p.with_suffix(".json")
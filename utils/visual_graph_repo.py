@@ -18,8 +18,8 @@ from pydantic import BaseModel, Field
 from metagpt.const import AGGREGATION, COMPOSITION, GENERALIZATION
 from metagpt.schema import UMLClassView
 from metagpt.utils.common import split_namespace
-from metagpt.utils.di_graph_repository import DiGraphRepository
 from metagpt.utils.graph_repository import GraphKeyword, GraphRepository
+from metagpt.utils.triple_store_repository import TripleStoreRepository
 
 
 class _VisualClassView(BaseModel):
@@ -85,7 +85,7 @@ class VisualDiGraphRepo(VisualGraphRepo):
     @classmethod
     async def load_from(cls, filename: str | Path):
         """Load a VisualDiGraphRepo instance from a file."""
-        graph_db = await DiGraphRepository.load_from(str(filename))
+        graph_db = await TripleStoreRepository.load_from(str(filename))
         return cls(graph_db=graph_db)
 
     async def get_mermaid_class_view(self) -> str:
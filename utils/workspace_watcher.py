@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+@File    : workspace_watcher.py
+@Desc    : inotify based watcher of a workspace, reporting the changed files of a Git repository so that its status
+    can be updated incrementally. Linux only, requires `inotify_simple`.
+"""
+from __future__ import annotations
+
+import os
+import threading
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+from metagpt.logs import logger
+from metagpt.utils.gitignore import GitignoreMatcher
+
+# Called with the changed path relative to the workspace root, or None if the changes are unknown
+ChangeCallback = Callable[[Optional[str]], None]
+
+
+class WorkspaceWatcher:
+    """Watch the non-ignored directories of a workspace in a daemon thread.
+
+    :param root: The workspace root.
+    :param on_change: The callback of changes, called from the watcher thread.
+    :param matcher: The gitignore matcher pruning the watched directories.
+    """
+
+    def __init__(self, root: Path | str, on_change: ChangeCallback, matcher: GitignoreMatcher = None):
+        try:
+            from inotify_simple import INotify, flags
+        except ImportError:
+            raise ImportError("Please install inotify_simple first, e.g. `pip install inotify_simple`.")
+
+        self.root = Path(root)
+        self.on_change = on_change
+        self.matcher = matcher
+        self._flags = flags
+        self._mask = (
+            flags.CREATE | flags.DELETE | flags.MODIFY | flags.CLOSE_WRITE | flags.MOVED_FROM | flags.MOVED_TO
+        )
+        self._inotify = INotify()
+        self._dirs: Dict[int, str] = {}  # watch descriptor -> relative directory
+        self._stop = threading.Event()
+        self._add_tree("")
+        self._thread = threading.Thread(target=self._run, name=f"watch:{self.root.name}", daemon=True)
+        self._thread.start()
+
+    def _ignored(self, rel: str) -> bool:
+        if rel == ".git" or rel.startswith(".git/"):
+            return True
+        return bool(self.matcher and self.matcher.is_dir_ignored(rel))
+
+    def _add_tree(self, rel: str, report: bool = False):
+        """Watch a directory and its subdirectories, report their files if they were created while unwatched"""
+        stack = [rel]
+        while stack:
+            rel = stack.pop()
+            try:
+                wd = self._inotify.add_watch(str(self.root / rel), self._mask)
+            except OSError as e:
+                logger.warning(f"Failed to watch {self.root / rel}: {e}")
+                continue
+            self._dirs[wd] = rel
+            try:
+                with os.scandir(self.root / rel) as it:
+                    for entry in it:
+                        child = f"{rel}/{entry.name}" if rel else entry.name
+                        if entry.is_dir(follow_symlinks=False):
+                            if not self._ignored(child):
+                                stack.append(child)
+                        elif report:
+                            self.on_change(child)
+            except OSError:
+                continue
+
+    def _run(self):
+        flags = self._flags
+        while not self._stop.is_set():
+            try:
+                events = self._inotify.read(timeout=200)
+            except (OSError, ValueError):
+                break  # closed
+            for event in events:
+                if event.mask & flags.Q_OVERFLOW:
+                    self.on_change(None)
+                    continue
+                parent = self._dirs.get(event.wd)
+                if parent is None:
+                    continue
+                if event.mask & flags.IGNORED:
+                    self._dirs.pop(event.wd, None)
+                    continue
+                rel = f"{parent}/{event.name}" if parent else event.name
+                if not event.mask & flags.ISDIR:
+                    self.on_change(rel)
+                elif event.mask & (flags.CREATE | flags.MOVED_TO):
+                    if not self._ignored(rel):
+                        self._add_tree(rel, report=True)
+                elif event.mask & (flags.DELETE | flags.MOVED_FROM):
+                    self.on_change(None)  # the files of the directory are gone
+
+    def close(self):
+        """Stop watching"""
+        self._stop.set()
+        self._thread.join(timeout=1)
+        self._inotify.close()